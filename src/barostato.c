@@ -0,0 +1,95 @@
+/* Barostatos para simular a presión constante (NPT). La caja se escala de
+forma isotrópica junto con las posiciones, y las celdas se recalculan para el
+nuevo tamaño. */
+
+#include "stdio.h"
+#include "math.h"
+
+#include "barostato.h"
+#include "energia.h"
+#include "celdas.h"
+
+
+int actualizar_caja(sistema *s){
+    int M;
+
+    if(s->cabeza != NULL) {
+        M = celdas_por_lado(s->L, s->rc);
+        s->M_cel = M < s->M_cel_max ? M : s->M_cel_max;
+    }
+    if(s->cabeza_vec != NULL) {
+        M = celdas_por_lado(s->L, s->rc + s->skin);
+        s->M_vec = M < s->M_vec_max ? M : s->M_vec_max;
+    }
+    return 0;
+}
+
+
+static int dilatar(sistema *s, double factor){
+    // Escala la caja y las posiciones por factor
+    for(int i=0; i<3*s->n; i++){
+        s->pos[i] *= factor;
+    }
+    s->L *= factor;
+    return actualizar_caja(s);
+}
+
+
+static double presion(sistema *s, double ecin){
+    // Presión instantánea con el virial del último cálculo de la fuerza
+    double V = (double)s->L * s->L * s->L;
+    return (2 * ecin + s->p_exceso) / (3 * V);
+}
+
+
+static int mtk_medio_paso(sistema *s, int nf){
+    // Medio paso (h/2) de la velocidad del barostato
+    double ecin = cinetica(s->vel, s->n);
+    double V = (double)s->L * s->L * s->L;
+    double W = (nf + 3) * s->T_objetivo * s->tau_P * s->tau_P;
+    double G = ((1 + 3.0 / nf) * 2 * ecin + s->p_exceso -
+                3 * V * s->P_objetivo) / W;
+
+    s->v_eps += G * s->h / 2;
+    return 0;
+}
+
+
+static int mtk_velocidades(sistema *s, int nf){
+    // Las velocidades se frenan (o aceleran) con la caja durante h/2
+    double escala = exp(-(1 + 3.0 / nf) * s->v_eps * s->h / 2);
+
+    for(int i=0; i<3*s->n; i++){
+        s->vel[i] *= escala;
+    }
+    return 0;
+}
+
+
+int barostato(sistema *s, int etapa){
+    // Grados de libertad con la misma convención que el termostato
+    int nf = 3 * s->n;
+    double mu3;
+
+    if(s->barostato == BAROSTATO_MTK){
+        if(etapa == 0){
+            mtk_medio_paso(s, nf);
+            mtk_velocidades(s, nf);
+            dilatar(s, exp(s->v_eps * s->h / 2));
+        }
+        else if(etapa == 1){
+            dilatar(s, exp(s->v_eps * s->h / 2));
+        }
+        else {
+            mtk_velocidades(s, nf);
+            mtk_medio_paso(s, nf);
+        }
+    }
+    else if(s->barostato == BAROSTATO_BERENDSEN && etapa == 2){
+        mu3 = 1 - s->compresibilidad * s->h / s->tau_P *
+              (s->P_objetivo - presion(s, cinetica(s->vel, s->n)));
+        dilatar(s, cbrt(mu3));
+    }
+
+    return 0;
+}
@@ -0,0 +1,46 @@
+#ifndef BAROSTATO_H
+#define BAROSTATO_H
+
+#include "integrador.h"
+
+int barostato(sistema *s, int etapa);
+/*
+ * Función: barostato
+ * ------------------
+ * Aplica el barostato configurado en s->barostato con presión objetivo
+ * s->P_objetivo y tiempo de relajación s->tau_P, cambiando el tamaño de la
+ * caja y escalando las posiciones (isotrópico). La presión instantánea es
+ * P = (2 Ecin + virial) / 3V, con el virial en s->p_exceso. Se llama tres
+ * veces por paso de Verlet: con etapa=0 antes de primer_paso, con etapa=1
+ * entre primer_paso y el cálculo de la fuerza y con etapa=2 después de
+ * ultimo_paso.
+ *
+ *   BAROSTATO_BERENDSEN: escala la caja con
+ *     mu³ = 1 - compresibilidad h/tau_P (P0 - P), sólo en la etapa 2
+ *   BAROSTATO_MTK: barostato de Martyna, Tobias y Klein con velocidad
+ *     s->v_eps y masa W = (3N + 3) T0 tau_P². Medio paso de v_eps y de las
+ *     velocidades en las etapas 0 y 2, y la dilatación de la caja repartida
+ *     en dos medios pasos alrededor del avance de las posiciones
+ *
+ * El MTK da el ensamble NPT junto con un termostato que muestree el
+ * canónico (CSVR o Nosé-Hoover); con Berendsen el volumen relaja pero sus
+ * fluctuaciones no son las correctas.
+ *
+ * s: (sistema *) Estado de la simulación
+ * etapa: (int) 0 antes, 1 en el medio y 2 después del paso de Verlet
+ */
+
+int actualizar_caja(sistema *s);
+/*
+ * Función: actualizar_caja
+ * ------------------------
+ * Recalcula las celdas por lado (de la fuerza y de la lista de vecinos)
+ * para el tamaño actual de la caja, sin pasar de M_cel_max y M_vec_max,
+ * que es lo que entra en la memoria de cabeza y cabeza_vec. Con la caja más
+ * grande las celdas quedan más grandes que el corte, lo que sigue siendo
+ * correcto.
+ *
+ * s: (sistema *) Estado de la simulación
+ */
+
+#endif
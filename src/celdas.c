@@ -0,0 +1,153 @@
+/* Lista de celdas (linked-cell) para recorrer solo los pares de particulas
+que se encuentran en celdas vecinas. Con celdas de lado >= rc el costo de
+calcular la fuerza pasa a ser O(N) en lugar de O(N^2). */
+
+#include "stdio.h"
+#include "math.h"
+
+#include "celdas.h"
+#include "lennardjones.h"
+
+
+int celdas_por_lado(real L, real rc){
+    // Cantidad de celdas por lado con lado de celda >= rc
+    return floor(L/rc);
+}
+
+
+int indice_celda(real *pos_i, real L, int M){
+    // Calcula el indice de celda para cada coordenada
+    int c[3];
+    for(int k=0; k<3; k++){
+        c[k] = floor(pos_i[k]/L*M);
+        // condiciones de contorno (pos puede estar fuera de la caja)
+        c[k] = ((c[k] % M) + M) % M;
+    }
+    return c[0] + M*c[1] + M*M*c[2];
+}
+
+
+int armar_celdas(real *pos, int n, real L, int M, int *cabeza, int *lista){
+    int c;
+
+    // vacia todas las celdas
+    for(int i=0; i<M*M*M; i++){
+        cabeza[i] = -1;
+    }
+
+    // agrega cada particula al principio de la lista de su celda
+    for(int i=0; i<n; i++){
+        c = indice_celda(&pos[i*3], L, M);
+        lista[i] = cabeza[c];
+        cabeza[c] = i;
+    }
+
+    return 0;
+}
+
+
+real fuerza_par(real *pos, acum *fza, int i, int j, real L,
+    real rc, real *FZA_LUT, real *LJ_LUT, int g, int tabla,
+    acum *potencial){
+    // Calcula la fuerza entre el par i, j, suma su energia en potencial y
+    // devuelve su aporte a la presion
+
+    real rij2, fuerza, radial_r;
+    real dr[3];
+
+    rij2 = 0;
+
+    for(int k=0; k<3; k++){
+        // calcula los dk con k = (x, y, z)
+        dr[k] = pos[i*3+k] - pos[j*3+k];
+
+        // condiciones de contorno para dk
+        if(dr[k] > L/2){
+            dr[k] -= L;
+        }
+        if(dr[k] < -L/2){
+            dr[k] += L;
+        }
+
+        // suma las diferencias cuadradas
+        rij2 += dr[k] * dr[k];
+    }
+
+    if(rij2 >= rc*rc) {
+        return 0;
+    }
+
+    // parte radial de la fuerza (dividida por r) y energía mediante la LUT
+    radial_r = interaccion(rij2, FZA_LUT, LJ_LUT, g, tabla, potencial);
+
+    for(int k=0; k<3; k++) {
+        // calcula la componente k
+        fuerza = radial_r * dr[k];
+        // le suma la fza a la particula i con componente k
+        fza[i * 3 + k] += fuerza;
+        // idem por simetria
+        fza[j * 3 + k] += -fuerza;
+    }
+
+    return rij2 * radial_r;
+}
+
+
+acum nueva_fza_celdas(real *pos, acum *fza, int n, real L, real rc,
+    real *FZA_LUT, real *LJ_LUT, int g, int tabla, int M, int *cabeza,
+    int *lista, acum *epot){
+
+    int c, v, cx, cy, cz;
+    acum p_exceso = 0;
+    acum potencial = 0;
+
+    //inicializa las fuerzas a cero
+    for(int i=0; i<3*n; i++) {
+        fza[i] = 0;
+    }
+
+    armar_celdas(pos, n, L, M, cabeza, lista);
+
+    for(cz=0; cz<M; cz++) {
+    for(cy=0; cy<M; cy++) {
+    for(cx=0; cx<M; cx++) {
+
+        c = cx + M*cy + M*M*cz;
+
+        // pares dentro de la misma celda
+        for(int i=cabeza[c]; i!=-1; i=lista[i]) {
+            for(int j=lista[i]; j!=-1; j=lista[j]) {
+                p_exceso += fuerza_par(pos, fza, i, j, L, rc, FZA_LUT,
+                                       LJ_LUT, g, tabla, &potencial);
+            }
+        }
+
+        // pares con la mitad de las celdas vecinas
+        for(int dz=-1; dz<=1; dz++) {
+        for(int dy=-1; dy<=1; dy++) {
+        for(int dx=-1; dx<=1; dx++) {
+
+            // se queda con las 13 vecinas "posteriores" a la celda c
+            if(dz < 0 || (dz == 0 && dy < 0) ||
+               (dz == 0 && dy == 0 && dx <= 0)) {
+                continue;
+            }
+
+            v = (cx+dx+M)%M + M*((cy+dy+M)%M) + M*M*((cz+dz+M)%M);
+
+            for(int i=cabeza[c]; i!=-1; i=lista[i]) {
+                for(int j=cabeza[v]; j!=-1; j=lista[j]) {
+                    p_exceso += fuerza_par(pos, fza, i, j, L, rc, FZA_LUT,
+                                           LJ_LUT, g, tabla, &potencial);
+                }
+            }
+        }
+        }
+        }
+    }
+    }
+    }
+
+    *epot = potencial;
+    return p_exceso;
+}
@@ -0,0 +1,99 @@
+#ifndef CELDAS_H
+#define CELDAS_H
+
+#include "precision.h"
+
+int celdas_por_lado(real L, real rc);
+/*
+ * Función: celdas_por_lado
+ * ------------------------
+ * Calcula la cantidad de celdas por lado de la caja de forma que cada celda
+ * tenga lado mayor o igual a rc.
+ *
+ * L: (real) Tamano de la caja
+ * rc: (real) Distancia de corte para el potencial
+ *
+ * return: (int) Cantidad de celdas por lado (M). Si es menor a 3 las celdas
+ *         vecinas se repiten y conviene usar el recorrido de todos los pares.
+ */
+
+int indice_celda(real *pos_i, real L, int M);
+/*
+ * Función: indice_celda
+ * ---------------------
+ * Devuelve el índice de la celda que contiene a la partícula. Aplica las
+ * condiciones de contorno, por lo que admite posiciones fuera de [0, L).
+ *
+ * pos_i: (real *) Vector de dimensión 3 para la posición de la partícula.
+ * L: (real) Tamano de la caja
+ * M: (int) Cantidad de celdas por lado
+ */
+
+int armar_celdas(real *pos, int n, real L, int M, int *cabeza, int *lista);
+/*
+ * Función: armar_celdas
+ * ---------------------
+ * Distribuye las partículas en las M^3 celdas mediante listas enlazadas.
+ * cabeza[c] es la primera partícula de la celda c y lista[i] la siguiente
+ * partícula en la misma celda que i (-1 indica el final de la lista).
+ *
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * n: (int) Cantidad de particulas
+ * L: (real) Tamano de la caja
+ * M: (int) Cantidad de celdas por lado
+ * cabeza: (int *) Vector de dimensión M^3 con la primer partícula de cada celda
+ * lista: (int *) Vector de dimensión N con la siguiente partícula de la celda
+ */
+
+real fuerza_par(real *pos, acum *fza, int i, int j, real L, real rc,
+                real *FZA_LUT, real *LJ_LUT, int g, int tabla,
+                acum *potencial);
+/*
+ * Función: fuerza_par
+ * -------------------
+ * Suma a fza la fuerza entre las partículas i, j (mediante la Lookup-table)
+ * y a potencial su energía de interacción, si están a distancia menor a rc.
+ *
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * fza: (acum *) Vector de dimensión 3N donde se suman las fuerzas.
+ * i, j: (int) Índices de las partículas
+ * L: (real) Tamano de la caja
+ * rc: (real) Distancia de corte para el potencial
+ * FZA_LUT: (real *) Lookup-table de la fuerza
+ * LJ_LUT: (real *) Lookup-table del potencial de Lennard-Jones
+ * g: (int) Precision de la Lookup-table
+ * tabla: (int) Tipo de Lookup-table (TABLA_R o TABLA_R2)
+ * potencial: (acum *) Acumulador de la energia potencial
+ *
+ * return: (real) Aporte del par a la presion de exceso
+ */
+
+acum nueva_fza_celdas(real *pos, acum *fza, int n, real L, real rc,
+                      real *FZA_LUT, real *LJ_LUT, int g, int tabla,
+                      int M, int *cabeza, int *lista, acum *epot);
+/*
+ * Función: nueva_fza_celdas
+ * -------------------------
+ * Calcula la nueva fuerza usando la Lookup-table, recorriendo sólo los pares
+ * de partículas en celdas vecinas. Cada celda interactúa consigo misma y con
+ * 13 de sus 26 vecinas, de forma que cada par se visita una única vez. En el
+ * mismo recorrido acumula la energia potencial y la presion de exceso.
+ *
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * fza: (acum *) Vector de dimensión 3N para las fuerzas.
+ * n: (int) Cantidad de particulas
+ * L: (real) Tamano de la caja
+ * rc: (real) Distancia de corte para el potencial
+ * FZA_LUT: (real *) Lookup-table de la fuerza
+ * LJ_LUT: (real *) Lookup-table del potencial de Lennard-Jones
+ * g: (int) Precision de la Lookup-table
+ * tabla: (int) Tipo de Lookup-table (TABLA_R o TABLA_R2)
+ * M: (int) Cantidad de celdas por lado (al menos 3)
+ * cabeza: (int *) Vector de dimensión M^3 (memoria de trabajo)
+ * lista: (int *) Vector de dimensión N (memoria de trabajo)
+ * epot: (acum *) Donde se guarda la energia potencial
+ *
+ * return: (acum) Presion de exceso
+ */
+
+#endif
@@ -5,8 +5,8 @@
 #include "energia.h"
 #include "lennardjones.h"
 
-float cinetica(float *vel, int N){
-    float cinetica = 0;
+acum cinetica(real *vel, int N){
+    acum cinetica = 0;
     for(int i=0; i<N; i++){
     	// suma la energía cinética
     	cinetica += velocidad2(&vel[i*3]) / 2;
@@ -15,10 +15,10 @@ float cinetica(float *vel, int N){
     return cinetica;
 }
 
-float potencial(float *pos, int N, float L, float *LJ_LUT, int g, float rc){
-    float potencial=0;
-    float rij2, rij;
-    float dr[3];
+acum potencial(real *pos, int N, real L, real *LJ_LUT, int g, real rc){
+    acum potencial=0;
+    real rij2, rij;
+    real dr[3];
 
     // Calcula la energia potencial de las n particulas
     for(int i=0; i<N; i++){
@@ -53,10 +53,10 @@ float potencial(float *pos, int N, float L, float *LJ_LUT, int g, float rc){
     return potencial;
 }
 
-float potencial_exacto(float *pos, int N, float L, float rc) {
-    float potencial=0;
-    float rij, rij2, exp2, exp6, exp12;
-    float dr[3];
+acum potencial_exacto(real *pos, int N, real L, real rc) {
+    acum potencial=0;
+    real rij, rij2, exp2, exp6, exp12;
+    real dr[3];
 
     // Calcula la energia potencial de las n particulas
     for(int i=0; i<N; i++){
@@ -100,16 +100,16 @@ float potencial_exacto(float *pos, int N, float L, float rc) {
     return potencial;
 }
 
-float velocidad2(float *vel)
+real velocidad2(real *vel)
 {
     // Calcula y devuelve el cuadrado de la velocidad
     return (vel[0] * vel[0]) + (vel[1] * vel[1]) + (vel[2] * vel[2]);
 }
 
-float distancia2(float *pos_i, float *pos_j)
+real distancia2(real *pos_i, real *pos_j)
 {
     // Calcula y devuelve la distancia al cuadrado
-    float x, y, z, r2;
+    real x, y, z, r2;
     x = pos_i[0] - pos_j[0];
     y = pos_i[1] - pos_j[1];
     z = pos_i[2] - pos_j[2];
@@ -118,9 +118,9 @@ float distancia2(float *pos_i, float *pos_j)
 }
 
 
-float lambda_verlet (float *pos, float N, float L) {
+real lambda_verlet (real *pos, real N, real L) {
     int i;
-    float a, lx, ly, lz, l, b;
+    real a, lx, ly, lz, l, b;
     a = L/N; //separacion entre partículas
     b = (2*M_PI)/a; // parte del argumento de coseno
     lx = 0;
@@ -137,9 +137,9 @@ float lambda_verlet (float *pos, float N, float L) {
 }
 
 
-float Hboltzmann (float *vel, float N, float T){
+real Hboltzmann (real *vel, real N, real T){
     int i;
-    float h;
+    real h;
     h = 0;
     for (i=0;i<3*N;i++) {
         h += funcionH (vel[i],T);
@@ -147,17 +147,17 @@ float Hboltzmann (float *vel, float N, float T){
     return h;
 }
 
-float funcionH (float vel, float T) {
-    float f;
+real funcionH (real vel, real T) {
+    real f;
     f = (4*M_PI) * pow((2*M_PI*T),(-3.0/2)) * vel * vel * exp(-(vel * vel) / (2*T));
     return f * log(f) * 0.05;
 }
 
 
-float distrib_radial(float *distrad, float *pos, float n, float L, float rho, float Q) {
+real distrib_radial(real *distrad, real *pos, real n, real L, real rho, real Q) {
     int bin;
-    float rij, rij2, dR1;
-    float dr[3];
+    real rij, rij2, dR1;
+    real dr[3];
 
     dR1 = L/(Q + 2); // longitud de un bin
 
@@ -0,0 +1,140 @@
+/* Calculo de la fuerza en paralelo. Los pares se reparten entre los hilos
+de forma intercalada (i = t, t + hilos, ...) para equilibrar la carga del
+recorrido triangular, y cada hilo escribe en su propio vector de fuerzas. */
+
+#include "stdio.h"
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#include "hilos.h"
+#include "celdas.h"
+
+
+static acum fza_parcial(sistema *s, int modo, int t, acum *fza,
+    acum *potencial){
+    // Calcula la parte de la fuerza que le toca al hilo t
+
+    int n = s->n;
+    int T = s->hilos;
+    int M = s->M_cel;
+    int v, cx, cy, cz;
+    acum p_exceso = 0;
+
+    //inicializa las fuerzas del hilo a cero
+    for(int i=0; i<3*n; i++) {
+        fza[i] = 0;
+    }
+
+    if(modo == MODO_VECINOS) {
+        for(int i=t; i<n; i+=T) {
+            for(int a=s->inicio[i]; a<s->inicio[i+1]; a++) {
+                p_exceso += fuerza_par(s->pos, fza, i, s->vecinos[a], s->L,
+                                       s->rc, s->FZA_LUT, s->LJ_LUT, s->g,
+                                       s->tabla, potencial);
+            }
+        }
+    }
+    else if(modo == MODO_CELDAS) {
+        for(int c=t; c<M*M*M; c+=T) {
+
+            cx = c % M;
+            cy = (c / M) % M;
+            cz = c / (M * M);
+
+            // pares dentro de la misma celda
+            for(int i=s->cabeza[c]; i!=-1; i=s->lista[i]) {
+                for(int j=s->lista[i]; j!=-1; j=s->lista[j]) {
+                    p_exceso += fuerza_par(s->pos, fza, i, j, s->L, s->rc,
+                                           s->FZA_LUT, s->LJ_LUT, s->g,
+                                           s->tabla, potencial);
+                }
+            }
+
+            // pares con la mitad de las celdas vecinas
+            for(int dz=-1; dz<=1; dz++) {
+            for(int dy=-1; dy<=1; dy++) {
+            for(int dx=-1; dx<=1; dx++) {
+
+                if(dz < 0 || (dz == 0 && dy < 0) ||
+                   (dz == 0 && dy == 0 && dx <= 0)) {
+                    continue;
+                }
+
+                v = (cx+dx+M)%M + M*((cy+dy+M)%M) + M*M*((cz+dz+M)%M);
+
+                for(int i=s->cabeza[c]; i!=-1; i=s->lista[i]) {
+                    for(int j=s->cabeza[v]; j!=-1; j=s->lista[j]) {
+                        p_exceso += fuerza_par(s->pos, fza, i, j, s->L,
+                                               s->rc, s->FZA_LUT, s->LJ_LUT,
+                                               s->g, s->tabla, potencial);
+                    }
+                }
+            }
+            }
+            }
+        }
+    }
+    else {
+        for(int i=t; i<n-1; i+=T) {
+            for(int j=i+1; j<n; j++) {
+                p_exceso += fuerza_par(s->pos, fza, i, j, s->L, s->rc,
+                                       s->FZA_LUT, s->LJ_LUT, s->g,
+                                       s->tabla, potencial);
+            }
+        }
+    }
+
+    return p_exceso;
+}
+
+
+int nueva_fza_hilos(sistema *s, int modo){
+
+    int n = s->n;
+    int T = s->hilos;
+    acum virial[T];
+    acum potencial[T];
+    acum suma;
+
+    if(modo == MODO_CELDAS) {
+        armar_celdas(s->pos, n, s->L, s->M_cel, s->cabeza, s->lista);
+    }
+
+    // cada hilo calcula su parte en su propia memoria
+#ifdef _OPENMP
+    #pragma omp parallel num_threads(T)
+    {
+        int t = omp_get_thread_num();
+        potencial[t] = 0;
+        virial[t] = fza_parcial(s, modo, t, &s->fza_hilos[t*3*n],
+                                &potencial[t]);
+    }
+#else
+    for(int t=0; t<T; t++) {
+        potencial[t] = 0;
+        virial[t] = fza_parcial(s, modo, t, &s->fza_hilos[t*3*n],
+                                &potencial[t]);
+    }
+#endif
+
+    // suma las contribuciones de los hilos siempre en el mismo orden
+    #pragma omp parallel for num_threads(T) schedule(static) private(suma)
+    for(int i=0; i<3*n; i++) {
+        suma = 0;
+        for(int t=0; t<T; t++) {
+            suma += s->fza_hilos[t*3*n + i];
+        }
+        s->fza[i] = suma;
+    }
+
+    s->epot = 0;
+    s->p_exceso = 0;
+    for(int t=0; t<T; t++) {
+        s->epot += potencial[t];
+        s->p_exceso += virial[t];
+    }
+
+    return 0;
+}
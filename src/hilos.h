@@ -0,0 +1,22 @@
+#ifndef HILOS_H
+#define HILOS_H
+
+#include "integrador.h"
+
+int nueva_fza_hilos(sistema *s, int modo);
+/*
+ * Función: nueva_fza_hilos
+ * ------------------------
+ * Calcula la nueva fuerza con la Lookup-table repartiendo los pares entre
+ * s->hilos hilos (OpenMP). Cada hilo acumula fuerza, energia y virial en su
+ * propia memoria (s->fza_hilos) y al final se suman siempre en el mismo
+ * orden, por lo que no hacen falta operaciones atómicas y el resultado es
+ * reproducible para una cantidad de hilos fija. Sin OpenMP los hilos se
+ * recorren en serie con el mismo resultado.
+ *
+ * s: (sistema *) Estado de la simulación. Guarda la energia potencial y la
+ *    presion de exceso en s->epot y s->p_exceso.
+ * modo: (int) MODO_LUT (todos los pares), MODO_CELDAS o MODO_VECINOS
+ */
+
+#endif
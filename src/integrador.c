@@ -0,0 +1,222 @@
+/* Integrador de varios pasos. Evoluciona el sistema sin volver a Python en
+cada paso, guardando los observables cada k pasos. */
+
+#include "stdio.h"
+#include "stdlib.h"
+
+#include "integrador.h"
+#include "energia.h"
+#include "celdas.h"
+#include "vecinos.h"
+#include "hilos.h"
+#include "termostato.h"
+#include "barostato.h"
+// verlet.h va al final porque define M como macro
+#include "verlet.h"
+
+
+int actualizar_vecinos(sistema *s){
+    int pares;
+
+    // La lista sigue siendo valida mientras nadie se mueva mas de skin/2
+    if(s->n_armados > 0 && !s->desborde &&
+       desplazamiento_max(s->pos, s->pos_ref, s->n, s->L) <= s->skin / 2) {
+        return 0;
+    }
+
+    pares = armar_vecinos(s->pos, s->pos_ref, s->n, s->L, s->rc + s->skin,
+                          s->M_vec, s->cabeza_vec, s->lista_vec, s->inicio,
+                          s->vecinos, s->max_vecinos);
+    if(pares < 0) {
+        s->desborde = 1;
+        return -1;
+    }
+
+    s->desborde = 0;
+    s->n_armados += 1;
+    s->pares_acumulados += pares;
+
+    return 0;
+}
+
+
+int calc_fza(sistema *s){
+    int modo = s->modo;
+
+    if(modo == MODO_VECINOS && actualizar_vecinos(s) < 0) {
+        // sin lista valida usa las celdas (si las hay) o todos los pares
+        modo = s->cabeza != NULL ? MODO_CELDAS : MODO_LUT;
+    }
+
+    // si la caja se achicó (barostato) puede que no entren 3 celdas por lado
+    if(modo == MODO_CELDAS && s->M_cel < 3) {
+        modo = MODO_LUT;
+    }
+
+    if(s->hilos > 1 && modo != MODO_EXACTO) {
+        nueva_fza_hilos(s, modo);
+    }
+    else if(modo == MODO_EXACTO) {
+        s->p_exceso = nueva_fza_exacto(s->pos, s->fza, s->n, s->L, s->rc,
+                                       &s->epot);
+    }
+    else if(modo == MODO_VECINOS) {
+        s->p_exceso = nueva_fza_vecinos(s->pos, s->fza, s->n, s->L, s->rc,
+                                        s->FZA_LUT, s->LJ_LUT, s->g, s->tabla,
+                                        s->inicio, s->vecinos, &s->epot);
+    }
+    else if(modo == MODO_CELDAS) {
+        s->p_exceso = nueva_fza_celdas(s->pos, s->fza, s->n, s->L, s->rc,
+                                       s->FZA_LUT, s->LJ_LUT, s->g, s->tabla,
+                                       s->M_cel, s->cabeza, s->lista,
+                                       &s->epot);
+    }
+    else {
+        s->p_exceso = nueva_fza(s->pos, s->fza, s->n, s->L, s->rc,
+                                s->FZA_LUT, s->LJ_LUT, s->g, s->tabla,
+                                &s->epot);
+    }
+
+    return 0;
+}
+
+
+static int fuerza_rapida(sistema *s){
+    // Parte rápida de la fuerza (r < rc_interno) con sus propias celdas
+    acum epot;
+
+    if(s->M_rapido >= 3) {
+        nueva_fza_celdas(s->pos, s->fza_rapida, s->n, s->L, s->rc_interno,
+                         s->FZA_LUT_rapida, s->LJ_LUT, s->g, s->tabla,
+                         s->M_rapido, s->cabeza_rapida, s->lista_rapida,
+                         &epot);
+    }
+    else {
+        nueva_fza(s->pos, s->fza_rapida, s->n, s->L, s->rc_interno,
+                  s->FZA_LUT_rapida, s->LJ_LUT, s->g, s->tabla, &epot);
+    }
+
+    return 0;
+}
+
+
+static int paso_lento(sistema *s){
+    // Medio paso de velocidad con la fuerza lenta (completa menos rápida)
+    for(int i=0; i<3*s->n; i++){
+        s->vel[i] += 0.5 * s->h * (s->fza[i] - s->fza_rapida[i]);
+    }
+    return 0;
+}
+
+
+static int paso_respa(sistema *s){
+    real h = s->h / s->respa;
+
+    paso_lento(s);
+
+    // subpasos de Verlet con la fuerza rápida
+    for(int i=0; i<s->respa; i++){
+        primer_paso(s->pos, s->vel, s->fza_rapida, s->n, h);
+        fuerza_rapida(s);
+        ultimo_paso(s->vel, s->fza_rapida, s->n, h);
+    }
+
+    // la fuerza completa da la lenta y además la energía y el virial
+    calc_fza(s);
+    paso_lento(s);
+
+    return 0;
+}
+
+
+int evolucionar(sistema *s, int desde, int hasta, int k,
+    acum *ecin, acum *epot, acum *virial){
+
+    int i;
+    int respa = s->respa > 1 && s->modo != MODO_EXACTO;
+
+    // La fuerza completa (s->fza) es la del último paso, la rápida se
+    // calcula para las posiciones actuales
+    if(respa) {
+        fuerza_rapida(s);
+    }
+
+    for(int t=desde; t<hasta; t++) {
+
+        if(s->termostato != TERMOSTATO_NVE) {
+            termostato(s, 0);
+        }
+
+        if(respa) {
+            paso_respa(s);
+        }
+        else {
+            if(s->barostato != BAROSTATO_NINGUNO) {
+                barostato(s, 0);
+            }
+
+            // medio paso de velocidad y uno de posicion
+            primer_paso(s->pos, s->vel, s->fza, s->n, s->h);
+
+            if(s->barostato != BAROSTATO_NINGUNO) {
+                barostato(s, 1);
+            }
+
+            // fuerza, energia potencial y virial en el modo configurado
+            calc_fza(s);
+
+            // medio paso restante de velocidad
+            ultimo_paso(s->vel, s->fza, s->n, s->h);
+
+            if(s->barostato != BAROSTATO_NINGUNO) {
+                barostato(s, 2);
+            }
+        }
+
+        if(s->termostato != TERMOSTATO_NVE) {
+            termostato(s, 1);
+        }
+
+        // condiciones de contorno
+        c_cont(s->pos, s->n, s->L);
+
+        // guarda los observables cada k pasos
+        if(k > 0 && (t + 1) % k == 0) {
+            i = (t + 1) / k - 1;
+            if(ecin != NULL) {
+                ecin[i] = cinetica(s->vel, s->n);
+            }
+            if(epot != NULL) {
+                epot[i] = s->epot;
+            }
+            if(virial != NULL) {
+                virial[i] = s->p_exceso;
+            }
+        }
+
+        // sin memoria para la lista de vecinos devuelve el control
+        if(s->desborde) {
+            return t + 1;
+        }
+    }
+
+    return hasta;
+}
+
+
+int evolucionar_lote(sistema **s, int R, int pasos, int k, acum *ecin,
+    acum *epot, acum *virial, int hilos){
+
+    int largo = k > 0 ? pasos / k : 0;
+
+    // cada sistema es independiente: no hace falta sincronizar nada
+    #pragma omp parallel for num_threads(hilos) schedule(dynamic)
+    for(int r=0; r<R; r++) {
+        evolucionar(s[r], 0, pasos, k,
+                    ecin != NULL ? ecin + r * largo : NULL,
+                    epot != NULL ? epot + r * largo : NULL,
+                    virial != NULL ? virial + r * largo : NULL);
+    }
+
+    return 0;
+}
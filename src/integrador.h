@@ -0,0 +1,183 @@
+#ifndef INTEGRADOR_H
+#define INTEGRADOR_H
+
+#include "precision.h"
+
+// Modos para el calculo de la fuerza
+#define MODO_LUT      0
+#define MODO_EXACTO   1
+#define MODO_CELDAS   2
+#define MODO_VECINOS  3
+
+// Termostatos (ver termostato.h)
+#define TERMOSTATO_NVE          0
+#define TERMOSTATO_BERENDSEN    1
+#define TERMOSTATO_CSVR         2
+#define TERMOSTATO_ANDERSEN     3
+#define TERMOSTATO_NOSE_HOOVER  4
+
+// Barostatos (ver barostato.h)
+#define BAROSTATO_NINGUNO       0
+#define BAROSTATO_BERENDSEN     1
+#define BAROSTATO_MTK           2
+
+/*
+ * Estructura: sistema
+ * -------------------
+ * Agrupa el estado de la simulación para poder evolucionarla varios pasos
+ * con una única llamada. Toda la memoria es propiedad de quien la crea
+ * (en general md_class.py); aquí sólo se guardan los punteros.
+ */
+typedef struct {
+    // Particulas
+    real *pos;              // Vector de dimensión 3N para las posiciones
+    real *vel;              // Vector de dimensión 3N para las velocidades
+    acum *fza;              // Vector de dimensión 3N para las fuerzas
+    int n;                  // Cantidad de particulas
+
+    // Caja, paso temporal y potencial
+    real L;                 // Tamano de la caja
+    real h;                 // Tamaño del paso de Verlet
+    real rc;                // Distancia de corte para el potencial
+    real *FZA_LUT;          // Lookup-table de la fuerza
+    real *LJ_LUT;           // Lookup-table del potencial
+    int g;                  // Precision de las Lookup-tables
+    int tabla;              // Tipo de Lookup-table (TABLA_R o TABLA_R2)
+
+    // Modo de calculo de la fuerza (MODO_*)
+    int modo;
+
+    // Lista de celdas
+    int M_cel;              // Celdas por lado
+    int *cabeza;            // Vector de dimensión M^3
+    int *lista;             // Vector de dimensión N
+
+    // Lista de vecinos
+    real skin;              // Margen de la lista (rv = rc + skin)
+    int M_vec;              // Celdas por lado para armar la lista
+    int *cabeza_vec;        // Vector de dimensión M_vec^3
+    int *lista_vec;         // Vector de dimensión N
+    int *inicio;            // Vector de dimensión N+1
+    int *vecinos;           // Vector de dimensión max_vecinos
+    int max_vecinos;        // Capacidad de vecinos
+    real *pos_ref;          // Posiciones con las que se armó la lista
+    int n_armados;          // Cantidad de veces que se armó la lista
+    double pares_acumulados; // Suma del largo de las listas armadas
+    int desborde;           // 1 si la lista no entró en vecinos
+
+    // Resultados del ultimo calculo de la fuerza
+    acum epot;              // Energia potencial
+    acum p_exceso;          // Presion de exceso (virial)
+
+    // Calculo en paralelo
+    int hilos;              // Cantidad de hilos (1: en serie)
+    acum *fza_hilos;        // Vector de dimensión hilos*3N (memoria de trabajo)
+
+    // Termostato
+    int termostato;         // TERMOSTATO_* (TERMOSTATO_NVE: sin termostato)
+    real T_objetivo;        // Temperatura del baño
+    real tau;               // Tiempo de relajación (1/frecuencia en Andersen)
+    int largo_cadena;       // Largo de la cadena de Nosé-Hoover
+    double *xi;             // Vector de dimensión largo_cadena
+    double *v_xi;           // Vector de dimensión largo_cadena
+    unsigned long long semilla; // Estado del generador aleatorio
+
+    // Barostato (la caja cambia de tamaño: L, M_cel y M_vec se actualizan)
+    int barostato;          // BAROSTATO_* (BAROSTATO_NINGUNO: volumen fijo)
+    real P_objetivo;        // Presión del baño
+    real tau_P;             // Tiempo de relajación de la presión
+    real compresibilidad;   // Compresibilidad isotérmica (Berendsen)
+    double v_eps;           // Velocidad del barostato MTK (d ln V / dt / 3)
+    int M_cel_max;          // Celdas por lado para las que alcanza cabeza
+    int M_vec_max;          // Celdas por lado para las que alcanza cabeza_vec
+
+    // r-RESPA: la fuerza se separa en una parte rápida (r < rc_interno), que
+    // se integra con respa subpasos de h/respa, y una lenta (el resto)
+    int respa;              // Subpasos por paso (<= 1: Verlet simple)
+    real rc_interno;        // Corte de la fuerza rápida
+    real *FZA_LUT_rapida;   // Lookup-table de la fuerza rápida S(r) F(r)
+    acum *fza_rapida;       // Vector de dimensión 3N para la fuerza rápida
+    int M_rapido;           // Celdas por lado para la fuerza rápida
+    int *cabeza_rapida;     // Vector de dimensión M_rapido^3
+    int *lista_rapida;      // Vector de dimensión N
+} sistema;
+
+
+int actualizar_vecinos(sistema *s);
+/*
+ * Función: actualizar_vecinos
+ * ---------------------------
+ * Arma la lista de vecinos si nunca se armó o si alguna partícula se movió
+ * más de skin/2 desde la última vez.
+ *
+ * s: (sistema *) Estado de la simulación
+ *
+ * return: (int) 0 si la lista es válida, -1 si no alcanzó la memoria. En ese
+ *         caso s->desborde queda en 1 hasta que, ampliado s->vecinos, se
+ *         logre armar la lista.
+ */
+
+int calc_fza(sistema *s);
+/*
+ * Función: calc_fza
+ * -----------------
+ * Calcula la fuerza en el modo configurado y guarda en s la energia
+ * potencial y la presion de exceso. Si la lista de vecinos desborda usa la
+ * lista de celdas (o todos los pares) para no perder el paso. Con más de un
+ * hilo usa nueva_fza_hilos (salvo en el modo exacto).
+ *
+ * s: (sistema *) Estado de la simulación
+ */
+
+int evolucionar(sistema *s, int desde, int hasta, int k,
+                acum *ecin, acum *epot, acum *virial);
+/*
+ * Función: evolucionar
+ * --------------------
+ * Realiza los pasos de Verlet desde..hasta-1 (velocidad, fuerza, velocidad y
+ * condiciones de contorno), aplicando el termostato y el barostato
+ * configurados. Con s->respa > 1 (y fuera del modo exacto) cada paso es
+ * uno de r-RESPA: medio paso con la fuerza lenta (s->fza - s->fza_rapida),
+ * respa subpasos de Verlet de h/respa con la fuerza rápida, la fuerza
+ * completa y el medio paso lento restante. Cada k pasos guarda las energias
+ * y el virial en
+ * los vectores recibidos, en la posición (paso+1)/k - 1. Cualquiera de los
+ * vectores puede ser NULL, y con k=0 no se guarda nada.
+ *
+ * s: (sistema *) Estado de la simulación
+ * desde: (int) Primer paso a realizar
+ * hasta: (int) Paso en el que se detiene (sin realizarlo)
+ * k: (int) Cada cuántos pasos se guardan los observables
+ * ecin: (acum *) Energia cinetica cada k pasos
+ * epot: (acum *) Energia potencial cada k pasos
+ * virial: (acum *) Presion de exceso cada k pasos
+ *
+ * return: (int) Siguiente paso a realizar. Es menor a hasta sólo si la lista
+ *         de vecinos desbordó; ampliando la memoria se puede continuar.
+ */
+
+int evolucionar_lote(sistema **s, int R, int pasos, int k, acum *ecin,
+                     acum *epot, acum *virial, int hilos);
+/*
+ * Función: evolucionar_lote
+ * -------------------------
+ * Evoluciona R sistemas independientes (cada uno con su caja, temperatura y
+ * semilla) pasos pasos con una única llamada, repartiendo los sistemas
+ * entre hilos hilos (OpenMP). Cada sistema se calcula en serie, por lo que
+ * conviene para muchos sistemas chicos en los que un solo sistema no
+ * alcanza para ocupar un núcleo. Los observables del sistema r se guardan
+ * en la fila r de los vectores recibidos (de dimensión R*(pasos/k)), que
+ * pueden ser NULL. No admite lista de vecinos (no se puede ampliar su
+ * memoria desde aquí).
+ *
+ * s: (sistema **) Vector de dimensión R con los sistemas
+ * R: (int) Cantidad de sistemas
+ * pasos: (int) Pasos a realizar en cada sistema
+ * k: (int) Cada cuántos pasos se guardan los observables
+ * ecin: (acum *) Energia cinetica de cada sistema cada k pasos
+ * epot: (acum *) Energia potencial de cada sistema cada k pasos
+ * virial: (acum *) Presion de exceso de cada sistema cada k pasos
+ * hilos: (int) Cantidad de hilos entre los que se reparten los sistemas
+ */
+
+#endif
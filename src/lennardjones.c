@@ -9,7 +9,7 @@ de la derivada alrededor de rc. */
 #include "lennardjones.h"
 
 
-int lennardjones_lut(float *LJ_LUT, int k, float rc){
+int lennardjones_lut(real *LJ_LUT, int k, real rc){
     // Genera un vector con las posiciones reales a evaluar
 
     // LUT de Lennard-Jones con el shift
@@ -24,22 +24,22 @@ int lennardjones_lut(float *LJ_LUT, int k, float rc){
 }
 
 
-float lennardjones(float r){
+real lennardjones(real r){
     /* Evalua el potencial de Lennard-Jones de forma analitica. */
     return 4*(pow(r, -12) - pow(r, -6));
 }
 
 
-int spline(float *LJ_LUT, int k, float rc){
+int spline(real *LJ_LUT, int k, real rc){
     /* Introduce el spline para suavizar la curva */
     int p = k/10; // Pasos anteriores a rc donde empieza el spline
-    float x1 = (k-p+1)*(rc/k); // posicion donde empieza el spline
-    float x2 = rc; // posicion donde termina el spline
-    float y1 = LJ_LUT[k-p]; // valor en x1
+    real x1 = (k-p+1)*(rc/k); // posicion donde empieza el spline
+    real x2 = rc; // posicion donde termina el spline
+    real y1 = LJ_LUT[k-p]; // valor en x1
     // Derivada en x1
-    float k1 = (LJ_LUT[k-p+1]-LJ_LUT[k-p])/((k-p+1+1)*(rc/k)-(k-p+1)*(rc/k));
-    float a = k1*(x2-x1) + y1;
-    float b = -y1;
+    real k1 = (LJ_LUT[k-p+1]-LJ_LUT[k-p])/((k-p+1+1)*(rc/k)-(k-p+1)*(rc/k));
+    real a = k1*(x2-x1) + y1;
+    real b = -y1;
 
     // Evalua el valor del spline y lo reemplaza en la LUT
     for(int i=k-p; i<k; i++){
@@ -52,14 +52,14 @@ int spline(float *LJ_LUT, int k, float rc){
 }
 
 
-float t(float x, float x1, float x2){
+real t(real x, real x1, real x2){
     // Funcion auxiliar para facilitar el calculo del spline
     return (x-x1)/(x2-x1);
 }
 
 
-int fuerza_lut(float *FZA_LUT, float *LJ_LUT, int k, float rc){
-    float delta_r = rc/k;
+int fuerza_lut(real *FZA_LUT, real *LJ_LUT, int k, real rc){
+    real delta_r = rc/k;
     for(int i=0; i<k; i++){
         // Caso aparte para el ultimo elemento de la fuerza
         if(i == k-1){
@@ -75,13 +75,13 @@ int fuerza_lut(float *FZA_LUT, float *LJ_LUT, int k, float rc){
 }
 
 
-int indice_lut(int g, float r){
+int indice_lut(int g, real r){
     // Devuelve el indice a donde mirar en la LUT
     return floor(r*g);
 }
 
 
-float lookup(float *LUT, int g, float r){
+real lookup(real *LUT, int g, real r){
     // Calcula el valor en una LUT segun la distancia r
 
     int indice = indice_lut(g, r); // Indice en la Lookup-table
@@ -90,12 +90,105 @@ float lookup(float *LUT, int g, float r){
     return LUT[indice];
 
     // Version mas complicada: interpola linealmente entre ambos valores
-    // float x1 = floor(r*g)/(float)g;
-    // float x2 = x1 + (float)1/g;
-    // float y1 = LUT[indice];
-    // float y2 = LUT[indice + 1];
-    // float m = (y2-y1) / (x2-x1);
-    // float b = (y1*x2 - x1*y2) / (x2 - x1);
+    // real x1 = floor(r*g)/(real)g;
+    // real x2 = x1 + (real)1/g;
+    // real y1 = LUT[indice];
+    // real y2 = LUT[indice + 1];
+    // real m = (y2-y1) / (x2-x1);
+    // real b = (y1*x2 - x1*y2) / (x2 - x1);
     //
     // return m * r + b;
 }
+
+
+real lennardjones_suave(real r, real rc){
+    /* Potencial de la tabla por r evaluado de forma analitica: con el shift
+    y con el mismo spline en el ultimo 10% antes de rc */
+    real x1 = (1 - SPLINE_ANCHO)*rc; // posicion donde empieza el spline
+    real y1 = lennardjones(x1) - lennardjones(rc); // valor en x1
+    real k1 = -24*(2*pow(x1, -13) - pow(x1, -7)); // derivada en x1
+    real a = k1*(rc-x1) + y1;
+    real b = -y1;
+    real s;
+
+    if(r >= rc){
+        return 0;
+    }
+    if(r < x1){
+        return lennardjones(r) - lennardjones(rc);
+    }
+
+    s = t(r, x1, rc);
+    return (1-s)*y1 + s*(1-s)*(a*(1-s) + b*s);
+}
+
+
+real fuerza_suave(real r, real rc){
+    /* Fuerza -dV/dr del potencial de lennardjones_suave */
+    real x1 = (1 - SPLINE_ANCHO)*rc;
+    real y1 = lennardjones(x1) - lennardjones(rc);
+    real k1 = -24*(2*pow(x1, -13) - pow(x1, -7));
+    real a = k1*(rc-x1) + y1;
+    real b = -y1;
+    real s;
+
+    if(r >= rc){
+        return 0;
+    }
+    if(r < x1){
+        return 24*(2*pow(r, -13) - pow(r, -7));
+    }
+
+    // derivada del spline respecto de s, con ds/dr = 1/(rc-x1)
+    s = t(r, x1, rc);
+    return -(-y1 + (1-2*s)*(a*(1-s) + b*s) + s*(1-s)*(b-a))/(rc-x1);
+}
+
+
+int lennardjones_lut2(real *LJ_LUT, int k, int g, real rc){
+    // LUT de Lennard-Jones suavizado, en r^2 = i/g
+    for(int i=0; i<k; i++){
+        LJ_LUT[i] = lennardjones_suave(sqrt((real)i/g), rc);
+    }
+
+    return 0;
+}
+
+
+int fuerza_lut2(real *FZA_LUT, int k, int g, real rc){
+    real r;
+    for(int i=0; i<k; i++){
+        // F(r)/r en r^2 = i/g
+        r = sqrt((real)i/g);
+        FZA_LUT[i] = fuerza_suave(r, rc)/r;
+    }
+
+    return 0;
+}
+
+
+real lookup2(real *LUT, int g, real rij2){
+    // Interpola linealmente entre los dos valores que rodean a rij2
+    real x = rij2*g;
+    int indice = (int)x;
+    real a = x - indice;
+
+    return LUT[indice] + a*(LUT[indice+1] - LUT[indice]);
+}
+
+
+real interaccion(real rij2, real *FZA_LUT, real *LJ_LUT, int g,
+    int tabla, acum *potencial){
+
+    real rij;
+
+    if(tabla == TABLA_R2){
+        *potencial += lookup2(LJ_LUT, g, rij2);
+        return lookup2(FZA_LUT, g, rij2);
+    }
+
+    // la tabla por r necesita el módulo de la distancia
+    rij = sqrt(rij2);
+    *potencial += lookup(LJ_LUT, g, rij);
+    return lookup(FZA_LUT, g, rij) / rij;
+}
@@ -1,96 +1,197 @@
 #ifndef LENNARDJONES_H
 #define LENNARDJONES_H
 
+#include "precision.h"
 
-int lennardjones_lut(float *LJ_LUT, int k, float rc);
+// Tipos de Lookup-table: indexada por r (valor de la izquierda) o por r^2
+// (interpolación lineal, sin raíz cuadrada en el cálculo de la fuerza)
+#define TABLA_R   0
+#define TABLA_R2  1
+
+// Fracción de rc (antes del corte) en la que el spline suaviza el potencial
+#define SPLINE_ANCHO  0.1
+
+
+int lennardjones_lut(real *LJ_LUT, int k, real rc);
 /*
  * Funcion: lennardjones_lut
  * -------------------------
  * Crea una Lookup-table para el potencial de Lennard-Jones. Lo trunca en r=rc,
  * lo mueve para arriba y suaviza la curva cerca de rc.
  *
- * LJ_LUT: (float *) Vector de dimension k con el potencial de Lennard-Jones.
+ * LJ_LUT: (real *) Vector de dimension k con el potencial de Lennard-Jones.
  * k: (int) Tamano de la Lookup-table
- * rc: (float) Distancia de corte para el potencial
+ * rc: (real) Distancia de corte para el potencial
  *
  */
 
 
-float lennardjones(float r);
+real lennardjones(real r);
 /*
  * Funcion: lennardjones
  * ---------------------
  * Evalua analiticamente el potencial de Lennard-Jones.
  *
- * r: (float) Distancia entre dos particulas.
+ * r: (real) Distancia entre dos particulas.
  *
  */
 
 
-int spline(float *LJ_LUT, int k, float rc);
+int spline(real *LJ_LUT, int k, real rc);
 /*
  * Funcion: spline
  * ---------------
  * Introduce un spline en el potencial para suavizar la derivada cerca de rc
  *
- * LJ_LUT: (float *) Vector de dimension k con el potencial de Lennard-Jones.
+ * LJ_LUT: (real *) Vector de dimension k con el potencial de Lennard-Jones.
  * k: (int) Tamano de la Lookup-table
- * vec_pos: (float *) Vector de dimension k con los valores de la distancia.
- * rc: (float) Distancia de corte para el potencial
+ * vec_pos: (real *) Vector de dimension k con los valores de la distancia.
+ * rc: (real) Distancia de corte para el potencial
  *
  */
 
 
-float t(float x, float x1, float x2);
+real t(real x, real x1, real x2);
 /*
  * Funcion: t
  * ----------
  * Funcion auxiliar para facilitar el calculo del spline.
  *
- * x: (float) Distancia actual.
- * x1: (float) Posicion donde empieza el spline
- * x2: (float) Posicion donde termina el spline
+ * x: (real) Distancia actual.
+ * x1: (real) Posicion donde empieza el spline
+ * x2: (real) Posicion donde termina el spline
  *
  */
 
 
-int fuerza_lut(float *FZA_LUT, float *LJ_LUT, int k, float rc);
+int fuerza_lut(real *FZA_LUT, real *LJ_LUT, int k, real rc);
 /*
  * Funcion: fuerza_lut
  * -------------------
  * Crea una Lookup-table de la fuerza haciendo la derivada de Lennard-Jones
  * usando la LUT ya creada y usando diferencia finita.
  *
- * FZA_LUT: (float *) Lookup-table de la fuerza de dimension k.
- * LJ_LUT: (float *) Vector de dimension k con el potencial de Lennard-Jones.
+ * FZA_LUT: (real *) Lookup-table de la fuerza de dimension k.
+ * LJ_LUT: (real *) Vector de dimension k con el potencial de Lennard-Jones.
  * k: (int) Tamano de la Lookup-table
- * rc: (float) Distancia de corte para el potencial
+ * rc: (real) Distancia de corte para el potencial
  *
  */
 
 
-int indice_lut(int g, float r);
+int indice_lut(int g, real r);
 /*
  * Funcion: indice_lut
  * -------------------
  * Devuelve el índice para el r recibido en la tabla.
  *
  * g: (int) Precisión de la LUT (rc/g)
- * r: (float) Distancia
+ * r: (real) Distancia
  *
  */
 
 
-float lookup(float *LUT, int g, float r);
+real lookup(real *LUT, int g, real r);
 /*
  * Funcion: lookup
  * ---------------
  * Busca en la LUT especificada el valor correspondiente para el r dado
  *
- * LUT: (float *) Lookup-table con precisión rc/g.
+ * LUT: (real *) Lookup-table con precisión rc/g.
  * g: (int) Precisión de la LUT (dr=1/g)
- * r: (float) Distancia
+ * r: (real) Distancia
+ *
+ */
+
+
+real lennardjones_suave(real r, real rc);
+/*
+ * Funcion: lennardjones_suave
+ * ---------------------------
+ * Evalua analiticamente el mismo potencial que guarda lennardjones_lut:
+ * truncado en rc, con el shift y con el spline en el último SPLINE_ANCHO*rc
+ * (que lleva la fuerza a cero en rc). Vale 0 para r >= rc.
+ *
+ * r: (real) Distancia entre dos particulas.
+ * rc: (real) Distancia de corte para el potencial
+ *
+ */
+
+
+real fuerza_suave(real r, real rc);
+/*
+ * Funcion: fuerza_suave
+ * ---------------------
+ * Fuerza F(r) = -dV/dr del potencial de lennardjones_suave.
+ *
+ * r: (real) Distancia entre dos particulas.
+ * rc: (real) Distancia de corte para el potencial
+ *
+ */
+
+
+int lennardjones_lut2(real *LJ_LUT, int k, int g, real rc);
+/*
+ * Funcion: lennardjones_lut2
+ * --------------------------
+ * Crea una Lookup-table del potencial de lennardjones_suave (el mismo que la
+ * tabla por r) indexada por r^2: el elemento i corresponde a r^2 = i/g. Más
+ * allá de rc vale 0, para poder interpolar hasta el corte.
+ *
+ * LJ_LUT: (real *) Vector de dimension k con el potencial de Lennard-Jones.
+ * k: (int) Tamano de la Lookup-table (al menos g*rc^2 + 2)
+ * g: (int) Precisión de la LUT (elementos por unidad de r^2)
+ * rc: (real) Distancia de corte para el potencial
+ *
+ */
+
+
+int fuerza_lut2(real *FZA_LUT, int k, int g, real rc);
+/*
+ * Funcion: fuerza_lut2
+ * --------------------
+ * Crea una Lookup-table indexada por r^2 de la fuerza dividida por r,
+ * F(r)/r (ver fuerza_suave), para obtener las componentes multiplicando
+ * directamente por dx, dy y dz.
+ *
+ * FZA_LUT: (real *) Lookup-table de la fuerza de dimension k.
+ * k: (int) Tamano de la Lookup-table
+ * g: (int) Precisión de la LUT (elementos por unidad de r^2)
+ * rc: (real) Distancia de corte para el potencial
+ *
+ */
+
+
+real lookup2(real *LUT, int g, real rij2);
+/*
+ * Funcion: lookup2
+ * ----------------
+ * Interpola linealmente en una LUT indexada por r^2
+ *
+ * LUT: (real *) Lookup-table con precisión 1/g en r^2
+ * g: (int) Precisión de la LUT (elementos por unidad de r^2)
+ * rij2: (real) Distancia al cuadrado
+ *
+ */
+
+
+real interaccion(real rij2, real *FZA_LUT, real *LJ_LUT, int g,
+                 int tabla, acum *potencial);
+/*
+ * Funcion: interaccion
+ * --------------------
+ * Evalua la interacción de un par a distancia r con la Lookup-table del tipo
+ * indicado. La fuerza sobre i es el valor devuelto por dr (el vector de j a
+ * i) y el aporte a la presion de exceso es rij2 por el valor devuelto.
+ *
+ * rij2: (real) Distancia al cuadrado (menor a rc^2)
+ * FZA_LUT: (real *) Lookup-table de la fuerza
+ * LJ_LUT: (real *) Lookup-table del potencial de Lennard-Jones
+ * g: (int) Precision de la Lookup-table
+ * tabla: (int) TABLA_R o TABLA_R2
+ * potencial: (real *) Acumulador de la energia potencial
  *
+ * return: (real) Parte radial de la fuerza dividida por r
  */
 
 #endif
@@ -10,12 +10,13 @@
 
 int main(int argc, char **argv) {
     int N = 512; // Nr de particulas
-    float rho = 0.6; //Densidad
-    float L = pow(N/rho, 1.0/3); // Longitud de la caja
-    float rc = 0.5*L; // Maxima influencia del potencial
-    float h = 0.001; // Intervalo de tiempo entre simulaciones
+    real rho = 0.6; //Densidad
+    real L = pow(N/rho, 1.0/3); // Longitud de la caja
+    real rc = 0.5*L; // Maxima influencia del potencial
+    real h = 0.001; // Intervalo de tiempo entre simulaciones
     int niter = 5000; // Nro de veces que se deja evolucionar
-    float T = 0.5; // Temperatura
+    real T = 0.5; // Temperatura
+    acum epot; // Energia potencial
     int g = 1000; // Precision de LUT (1/g)
     int i; // Indices para loopear
     // int Q = 400; // presicion para la funcion g(r)
@@ -24,13 +25,13 @@ int main(int argc, char **argv) {
     int long_lut = floor(g*rc); // Tamano de la Lookup-table
 
     // Aloja memoria para los vectores
-    float *LJ_LUT = (float *)malloc(long_lut*sizeof(float));
-    float *FZA_LUT = (float *)malloc(long_lut*sizeof(float));
-    float *pos = (float *)malloc(3*N*sizeof(float));
-    float *vel = (float *)malloc(3*N*sizeof(float));
-    float *fza = (float *)malloc(3*N*sizeof(float));
-    float *lambda = (float *)malloc(niter*sizeof(float));
-    // float *distrad = (float *)malloc(Q*sizeof(float));
+    real *LJ_LUT = (real *)malloc(long_lut*sizeof(real));
+    real *FZA_LUT = (real *)malloc(long_lut*sizeof(real));
+    real *pos = (real *)malloc(3*N*sizeof(real));
+    real *vel = (real *)malloc(3*N*sizeof(real));
+    acum *fza = (acum *)malloc(3*N*sizeof(acum));
+    real *lambda = (real *)malloc(niter*sizeof(real));
+    // real *distrad = (real *)malloc(Q*sizeof(real));
 
     srand(time(NULL));
 
@@ -45,8 +46,8 @@ int main(int argc, char **argv) {
 
     for(i=0;i<niter;i++){
         primer_paso(pos, vel, fza, N, h);
-        // nueva_fza(pos, fza, N, L, rc, FZA_LUT, g);
-        nueva_fza_exacto(pos, fza, N, L, rc);
+        // nueva_fza(pos, fza, N, L, rc, FZA_LUT, LJ_LUT, g, TABLA_R, &epot);
+        nueva_fza_exacto(pos, fza, N, L, rc, &epot);
         ultimo_paso(vel, fza, N, h);
         c_cont(pos, N, L);
     }
@@ -9,59 +9,51 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from mpl_toolkits.mplot3d import Axes3D
 
-CLIB = C.CDLL('../bin/libmd.so')
-
-# Abreviaturas
-flp = C.POINTER(C.c_float)
-
-# Funciones de C
-CLIB.primer_paso.argtypes = [flp, flp, flp, C.c_int, C.c_float]
-CLIB.nueva_fza.argtypes = [flp, flp, C.c_int, C.c_float, C.c_float,
-                           flp, C.c_int]
-CLIB.nueva_fza_exacto.argtypes = [flp, flp, C.c_int, C.c_float, C.c_float]
-CLIB.ultimo_paso.argtypes = [flp, flp, C.c_int, C.c_float]
-CLIB.c_cont.argtypes = [flp, C.c_int, C.c_float]
-CLIB.lennardjones_lut.argtypes = [flp, C.c_int, C.c_float]
-CLIB.fuerza_lut.argtypes = [flp, flp, C.c_int, C.c_float]
-
-CLIB.cinetica.argtypes = [flp, C.c_int]
-CLIB.potencial.argtypes = [flp, C.c_int, C.c_float, flp, C.c_int, C.c_float]
-CLIB.potencial_exacto.argtypes = [flp, C.c_int, C.c_float, C.c_float]
-
-# Return types
-CLIB.cinetica.restype = C.c_float
-CLIB.potencial.restype = C.c_float
-CLIB.potencial_exacto.restype = C.c_float
+from md_backend import cargar_backend, Sistema, flp, MODO_LUT, MODO_EXACTO
+from md_backend import TABLA_R
+
+# Backend ('c' si libmd.so está compilada, sino 'numpy'; ver MD_BACKEND)
+CLIB = cargar_backend()
 
 ##############################
 # Paso completo de MD
 ##############################
 
 
-def paso(pos, vel, fza, N, L, h, rc, FZA_LUT, g):
-    """ Da un paso en la simulacion usando las LUT. """
+def paso(pos, vel, fza, N, L, h, rc, FZA_LUT, LJ_LUT, g):
+    """ Da un paso en la simulacion usando las LUT.
+    Devuelve la energia potencial calculada junto con la fuerza. """
     p_pos = pos.ctypes.data_as(flp)
     p_vel = vel.ctypes.data_as(flp)
     p_fza = fza.ctypes.data_as(flp)
     p_FZA_LUT = FZA_LUT.ctypes.data_as(flp)
+    p_LJ_LUT = LJ_LUT.ctypes.data_as(flp)
+    epot = C.c_float(0.0)
 
     CLIB.primer_paso(p_pos, p_vel, p_fza, N, h)
-    CLIB.nueva_fza(p_pos, p_fza, N, L, rc, p_FZA_LUT, g)
+    CLIB.nueva_fza(p_pos, p_fza, N, L, rc, p_FZA_LUT, p_LJ_LUT, g, TABLA_R,
+                   C.pointer(epot))
     CLIB.ultimo_paso(p_vel, p_fza, N, h)
     CLIB.c_cont(p_pos, N, L)
 
+    return epot.value
+
 
 def paso_exacto(pos, vel, fza, N, L, h, rc):
-    """ Da un paso en la simulacion de forma exacta. """
+    """ Da un paso en la simulacion de forma exacta.
+    Devuelve la energia potencial calculada junto con la fuerza. """
     p_pos = pos.ctypes.data_as(flp)
     p_vel = vel.ctypes.data_as(flp)
     p_fza = fza.ctypes.data_as(flp)
+    epot = C.c_float(0.0)
 
     CLIB.primer_paso(p_pos, p_vel, p_fza, N, h)
-    CLIB.nueva_fza_exacto(p_pos, p_fza, N, L, rc)
+    CLIB.nueva_fza_exacto(p_pos, p_fza, N, L, rc, C.pointer(epot))
     CLIB.ultimo_paso(p_vel, p_fza, N, h)
     CLIB.c_cont(p_pos, N, L)
 
+    return epot.value
+
 ##############################
 # Funciones auxiliares
 ##############################
@@ -159,14 +151,14 @@ vel = llenar_vel(N, T)
 # Memoria para las fuerzas
 fza = np.zeros(3 * N, dtype=C.c_float)
 
-# Memoria para las LUT
-LJ_LUT = np.zeros(int(g * rc), dtype=C.c_float)
-FZA_LUT = np.zeros(int(g * rc), dtype=C.c_float)
+# Memoria para las LUT (con un elemento nulo extra, ver largo_lut)
+LJ_LUT = np.zeros(long_lut + 1, dtype=C.c_float)
+FZA_LUT = np.zeros(long_lut + 1, dtype=C.c_float)
 
 # Memoria para la energia
 energia = np.zeros(niter, dtype=float)
-cinetica = np.zeros(niter, dtype=float)
-potencial = np.zeros(niter, dtype=float)
+cinetica = np.zeros(niter, dtype=C.c_float)
+potencial = np.zeros(niter, dtype=C.c_float)
 
 # Llenar las LUT
 p_lj_lut = LJ_LUT.ctypes.data_as(flp)
@@ -201,30 +193,30 @@ p_vel = vel.ctypes.data_as(flp)
 # 0: Calcula potencial y fuerza mediante Lookup-tables
 exacto = 0
 
-for i in range(niter):
-    if exacto:
-        # Exacto
-        paso_exacto(pos, vel, fza, N, L, h, rc)
-        potencial[i] = CLIB.potencial_exacto(p_pos, N, L, rc)
-    else:
-        # Con Lookup-table
-        paso(pos, vel, fza, N, L, h, rc, FZA_LUT, g)
-        potencial[i] = CLIB.potencial(p_pos, N, L, p_lj_lut, g, rc)
-
-
-    cinetica[i] = CLIB.cinetica(p_vel, N)
-    energia[i] = cinetica[i] + potencial[i]
-
-    # ax.cla()
-    # x, y, z = transforma_xyz(pos)
-    # scatter = ax.scatter(x, y, z)
-    # vx, vy, vz = transforma_xyz(vel)
-    # # quiver = ax.quiver(x, y, z, vx, vy, vz)
-    # ax.set_xlim([0, L])
-    # ax.set_ylim([0, L])
-    # ax.set_zlim([0, L])
-    # plt.draw()
-    # plt.pause(0.0001)
+# Estado para el integrador de C, que evoluciona los niter pasos guardando
+# las energias en cada paso sin volver a Python
+sis = Sistema(pos=p_pos, vel=p_vel, fza=fza.ctypes.data_as(flp), n=N, L=L,
+              h=h, rc=rc, FZA_LUT=p_fza_lut, LJ_LUT=p_lj_lut, g=g,
+              tabla=TABLA_R, modo=MODO_EXACTO if exacto else MODO_LUT)
+
+CLIB.evolucionar(C.pointer(sis), 0, niter, 1, cinetica.ctypes.data_as(flp),
+                 potencial.ctypes.data_as(flp), None)
+
+energia = cinetica.astype(float) + potencial
+
+# Para animar hay que avanzar de a un paso con paso() o paso_exacto():
+# for i in range(niter):
+#     paso(pos, vel, fza, N, L, h, rc, FZA_LUT, LJ_LUT, g)
+#     ax.cla()
+#     x, y, z = transforma_xyz(pos)
+#     scatter = ax.scatter(x, y, z)
+#     vx, vy, vz = transforma_xyz(vel)
+#     # quiver = ax.quiver(x, y, z, vx, vy, vz)
+#     ax.set_xlim([0, L])
+#     ax.set_ylim([0, L])
+#     ax.set_zlim([0, L])
+#     plt.draw()
+#     plt.pause(0.0001)
 
 path = '../datos/'
 name = 'ej1a'
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_backend.py
+
+import ctypes as C
+import os
+
+# Abreviaturas
+flp = C.POINTER(C.c_float)
+inp = C.POINTER(C.c_int)
+dbp = C.POINTER(C.c_double)
+
+
+# Precisiones (ver precision.h): tipos de almacenamiento (real) y de los
+# acumuladores de fuerzas, energías y virial (acum)
+PRECISIONES = {'simple': (C.c_float, C.c_float),
+               'mixta': (C.c_float, C.c_double),
+               'doble': (C.c_double, C.c_double)}
+
+# Biblioteca de C compilada para cada precisión
+BIBLIOTECAS = {'simple': 'libmd.so', 'mixta': 'libmd_mixta.so',
+               'doble': 'libmd_doble.so'}
+
+
+def tipos(precision='simple'):
+    '''
+    Devuelve los tipos de ctypes (real, acum) de la precisión pedida
+    '''
+    if precision not in PRECISIONES:
+        raise ValueError('Precisión desconocida: %s (opciones: %s)' %
+                         (precision, ', '.join(PRECISIONES)))
+    return PRECISIONES[precision]
+
+
+def campos_sistema(real, acum):
+    '''
+    Campos de la estructura sistema de integrador.h con los tipos dados
+    '''
+    rlp = C.POINTER(real)
+    acp = C.POINTER(acum)
+    return [('pos', rlp), ('vel', rlp), ('fza', acp), ('n', C.c_int),
+            ('L', real), ('h', real), ('rc', real),
+            ('FZA_LUT', rlp), ('LJ_LUT', rlp), ('g', C.c_int),
+            ('tabla', C.c_int),
+            ('modo', C.c_int),
+            ('M_cel', C.c_int), ('cabeza', inp), ('lista', inp),
+            ('skin', real), ('M_vec', C.c_int),
+            ('cabeza_vec', inp), ('lista_vec', inp), ('inicio', inp),
+            ('vecinos', inp), ('max_vecinos', C.c_int),
+            ('pos_ref', rlp), ('n_armados', C.c_int),
+            ('pares_acumulados', C.c_double), ('desborde', C.c_int),
+            ('epot', acum), ('p_exceso', acum),
+            ('hilos', C.c_int), ('fza_hilos', acp),
+            ('termostato', C.c_int), ('T_objetivo', real),
+            ('tau', real), ('largo_cadena', C.c_int),
+            ('xi', dbp), ('v_xi', dbp), ('semilla', C.c_uint64),
+            ('barostato', C.c_int), ('P_objetivo', real),
+            ('tau_P', real), ('compresibilidad', real),
+            ('v_eps', C.c_double), ('M_cel_max', C.c_int),
+            ('M_vec_max', C.c_int),
+            ('respa', C.c_int), ('rc_interno', real),
+            ('FZA_LUT_rapida', rlp), ('fza_rapida', acp),
+            ('M_rapido', C.c_int), ('cabeza_rapida', inp),
+            ('lista_rapida', inp)]
+
+
+class Sistema(C.Structure):
+    '''
+    Espejo de la estructura sistema de integrador.h (precisión simple)
+    '''
+    _fields_ = campos_sistema(C.c_float, C.c_float)
+
+
+class SistemaMixta(C.Structure):
+    '''
+    Espejo de la estructura sistema de integrador.h compilada con -DMIXTA
+    '''
+    _fields_ = campos_sistema(C.c_float, C.c_double)
+
+
+class SistemaDoble(C.Structure):
+    '''
+    Espejo de la estructura sistema de integrador.h compilada con -DDOBLE
+    '''
+    _fields_ = campos_sistema(C.c_double, C.c_double)
+
+
+SISTEMAS = {'simple': Sistema, 'mixta': SistemaMixta, 'doble': SistemaDoble}
+
+
+# Modos para el calculo de la fuerza (ver integrador.h)
+MODO_LUT, MODO_EXACTO, MODO_CELDAS, MODO_VECINOS = 0, 1, 2, 3
+
+# Tipos de Lookup-table (ver lennardjones.h): indexada por r o por r²
+TABLA_R, TABLA_R2 = 0, 1
+TABLAS = {'r': TABLA_R, 'r2': TABLA_R2}
+
+# Fracción de rc en la que el spline suaviza el potencial (ver lennardjones.h)
+SPLINE_ANCHO = 0.1
+
+# Termostatos (ver integrador.h y termostato.h)
+TERMOSTATO_NVE, TERMOSTATO_BERENDSEN, TERMOSTATO_CSVR = 0, 1, 2
+TERMOSTATO_ANDERSEN, TERMOSTATO_NOSE_HOOVER = 3, 4
+TERMOSTATOS = {'nve': TERMOSTATO_NVE, 'berendsen': TERMOSTATO_BERENDSEN,
+               'csvr': TERMOSTATO_CSVR, 'andersen': TERMOSTATO_ANDERSEN,
+               'nose-hoover': TERMOSTATO_NOSE_HOOVER}
+
+# Barostatos (ver integrador.h y barostato.h)
+BAROSTATO_NINGUNO, BAROSTATO_BERENDSEN, BAROSTATO_MTK = 0, 1, 2
+BAROSTATOS = {'ninguno': BAROSTATO_NINGUNO,
+              'berendsen': BAROSTATO_BERENDSEN, 'mtk': BAROSTATO_MTK}
+
+sisp = C.POINTER(Sistema)
+
+# Nombres de los backends disponibles
+BACKENDS = ('c', 'numpy', 'numba')
+
+# Bibliotecas de C por precisión (se cargan la primera vez que se piden)
+CLIB = {}
+
+
+def largo_lut(g, rc, tabla=TABLA_R):
+    '''
+    Largo de las Lookup-tables con precisión g. La tabla por r tiene g
+    elementos por unidad de r hasta rc y uno más, nulo, por si r² < rc² pero
+    el redondeo de la raíz da r = rc. La tabla por r² tiene g elementos por
+    unidad de r² y dos más para interpolar hasta rc².
+    '''
+    if tabla == TABLA_R2:
+        return int(g * rc * rc) + 2
+    return int(g * rc) + 1
+
+
+def cargar_clib(ruta=None, precision='simple'):
+    '''
+    Carga libmd.so (o la variante de la precisión pedida) y configura los
+    tipos de sus funciones. Devuelve None si la biblioteca no está compilada.
+    '''
+    real, acum = tipos(precision)
+    if ruta is None:
+        ruta = '../bin/' + BIBLIOTECAS[precision]
+
+    if ruta in CLIB:
+        return CLIB[ruta]
+
+    try:
+        lib = C.CDLL(ruta)
+    except OSError:
+        return None
+
+    # Abreviaturas de los punteros de esta precisión
+    rlp = C.POINTER(real)
+    acp = C.POINTER(acum)
+    sisp = C.POINTER(SISTEMAS[precision])
+
+    # Funciones de C
+    lib.primer_paso.argtypes = [rlp, rlp, acp, C.c_int, real]
+    lib.nueva_fza.argtypes = [rlp, acp, C.c_int, real, real,
+                              rlp, rlp, C.c_int, C.c_int, acp]
+    lib.nueva_fza_exacto.argtypes = [rlp, acp, C.c_int, real, real, acp]
+    lib.ultimo_paso.argtypes = [rlp, acp, C.c_int, real]
+    lib.c_cont.argtypes = [rlp, C.c_int, real]
+    lib.lennardjones_lut.argtypes = [rlp, C.c_int, real]
+    lib.fuerza_lut.argtypes = [rlp, rlp, C.c_int, real]
+    lib.lennardjones_lut2.argtypes = [rlp, C.c_int, C.c_int, real]
+    lib.fuerza_lut2.argtypes = [rlp, C.c_int, C.c_int, real]
+
+    lib.cinetica.argtypes = [rlp, C.c_int]
+    lib.potencial.argtypes = [rlp, C.c_int, real, rlp, C.c_int, real]
+    lib.potencial_exacto.argtypes = [rlp, C.c_int, real, real]
+
+    lib.nueva_fza_celdas.argtypes = [rlp, acp, C.c_int, real, real,
+                                     rlp, rlp, C.c_int, C.c_int, C.c_int, inp,
+                                     inp, acp]
+    lib.celdas_por_lado.argtypes = [real, real]
+
+    lib.armar_vecinos.argtypes = [rlp, rlp, C.c_int, real, real,
+                                  C.c_int, inp, inp, inp, inp, C.c_int]
+    lib.desplazamiento_max.argtypes = [rlp, rlp, C.c_int, real]
+    lib.nueva_fza_vecinos.argtypes = [rlp, acp, C.c_int, real, real,
+                                      rlp, rlp, C.c_int, C.c_int,
+                                      inp, inp, acp]
+
+    lib.distrib_radial.argtypes = [rlp, rlp, real, real, real, real]
+    lib.histograma_radial.argtypes = [dbp, rlp, C.c_int, real, real, C.c_int,
+                                      C.c_int, inp, inp]
+    lib.histograma_radial_vecinos.argtypes = [dbp, rlp, C.c_int, real, real,
+                                              C.c_int, inp, inp]
+
+    lib.actualizar_vecinos.argtypes = [sisp]
+    lib.calc_fza.argtypes = [sisp]
+    lib.evolucionar.argtypes = [sisp, C.c_int, C.c_int, C.c_int,
+                                acp, acp, acp]
+    lib.termostato.argtypes = [sisp, C.c_int]
+    lib.evolucionar_lote.argtypes = [C.POINTER(sisp), C.c_int, C.c_int,
+                                     C.c_int, acp, acp, acp, C.c_int]
+
+    # Return types
+    lib.cinetica.restype = acum
+    lib.potencial.restype = acum
+    lib.potencial_exacto.restype = acum
+    lib.nueva_fza.restype = acum
+    lib.nueva_fza_exacto.restype = acum
+    lib.nueva_fza_celdas.restype = acum
+    lib.desplazamiento_max.restype = real
+    lib.nueva_fza_vecinos.restype = acum
+
+    CLIB[ruta] = lib
+    return lib
+
+
+def evolucionar_en_serie(evolucionar, p_sis, R, pasos, k, ecin, epot,
+                         virial):
+    '''
+    evolucionar_lote para los backends de Python: evoluciona uno por uno los
+    R sistemas del vector p_sis con la función evolucionar del backend,
+    guardando los observables del sistema r en la fila r de cada vector
+    '''
+    largo = pasos // k if k > 0 else 0
+
+    def fila(p, r):
+        # Puntero al comienzo de la fila r (o None)
+        if not p:
+            return None
+        return C.cast(C.addressof(p.contents) +
+                      r * largo * C.sizeof(p._type_), type(p))
+
+    for r in range(R):
+        evolucionar(p_sis[r], 0, pasos, k, fila(ecin, r), fila(epot, r),
+                    fila(virial, r))
+    return 0
+
+
+def cargar_backend(nombre=None, precision='simple'):
+    '''
+    Devuelve el backend pedido: 'c' (libmd.so), 'numpy' (md_numpy.py) o
+    'numba' (md_numba.py). Todos exponen las mismas funciones con los mismos
+    argumentos. Si no se especifica se usa la variable MD_BACKEND, o 'c' si
+    está compilada. En C la precisión elige la biblioteca; numpy y numba
+    trabajan con los tipos de los punteros que reciben.
+    '''
+    tipos(precision)
+    if nombre is None:
+        nombre = os.environ.get('MD_BACKEND')
+
+    if nombre is None:
+        nombre = 'c' if cargar_clib(precision=precision) is not None \
+            else 'numpy'
+
+    if nombre == 'c':
+        clib = cargar_clib(precision=precision)
+        if clib is None:
+            raise OSError('No se encontró %s, compilar con make all' %
+                          BIBLIOTECAS[precision])
+        return clib
+    elif nombre == 'numpy':
+        import md_numpy
+        return md_numpy
+    elif nombre == 'numba':
+        try:
+            import md_numba
+        except ImportError as e:
+            raise ImportError('El backend numba requiere numba (%s)' % e)
+        return md_numba
+
+    raise ValueError('Backend desconocido: %s (opciones: %s)' %
+                     (nombre, ', '.join(BACKENDS)))
+
+
+def backend_nombre(lib):
+    '''
+    Devuelve el nombre del backend recibido
+    '''
+    if isinstance(lib, C.CDLL):
+        return 'c'
+    return lib.NOMBRE
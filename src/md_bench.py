@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_bench.py
+
+from md_class import md
+from md_backend import cargar_backend, backend_nombre
+import argparse
+import time
+import numpy as np
+
+######################
+# PARÁMETROS EXTERNOS
+######################
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-N', type=int, default=4096)
+parser.add_argument('-rho', type=float, default=0.8442)
+parser.add_argument('-T', type=float, default=0.728)
+parser.add_argument('-pasos', type=int, default=200)
+parser.add_argument('-term', type=int, default=20)
+parser.add_argument('-skin', type=float, default=0.3)
+parser.add_argument('-hilos', type=int, nargs='+', default=[1, 2, 4, 8])
+parser.add_argument('-backend', type=str, default=None)
+parser.add_argument('-reordenar', type=int, default=0)
+parser.add_argument('-precision', type=str, default='simple')
+
+params = parser.parse_args()
+
+N = params.N
+rho = params.rho
+T = params.T
+pasos = params.pasos
+term = params.term
+skin = params.skin
+backend = params.backend
+reordenar = params.reordenar
+precision = params.precision
+lista_hilos = sorted(set(params.hilos) | {1})
+
+modos = [('pares', {}),
+         ('celdas', {'celdas': True}),
+         ('vecinos', {'skin': skin})]
+
+
+############
+# FUNCIONES
+############
+
+def medir(hilos, **kwargs):
+    '''
+    Devuelve el tiempo por paso (en ms) para la configuración dada
+    '''
+    np.random.seed(0)
+    mdsys = md(N=N, rho=rho, T=T, hilos=hilos, backend=backend,
+               reordenar=reordenar, precision=precision, **kwargs)
+    mdsys.n_pasos(term)
+
+    inicio = time.perf_counter()
+    mdsys.n_pasos(pasos)
+    return (time.perf_counter() - inicio) / pasos * 1e3
+
+
+#####################
+# PROGRAMA PRINCIPAL
+#####################
+
+print('N: %d, rho: %6.3f, pasos: %d, backend: %s, precisión: %s\n' %
+      (N, rho, pasos, backend_nombre(cargar_backend(backend, precision)),
+       precision))
+print('%-8s %6s %12s %10s %10s' %
+      ('Modo', 'Hilos', 'ms/paso', 'Speedup', 'Eficiencia'))
+
+for nombre, kwargs in modos:
+    t_serie = None
+    for hilos in lista_hilos:
+        t_paso = medir(hilos, **kwargs)
+        if t_serie is None:
+            t_serie = t_paso
+        speedup = t_serie / t_paso
+        # Eficiencia paralela: speedup / hilos
+        print('%-8s %6d %12.3f %10.2f %10.2f' %
+              (nombre, hilos, t_paso, speedup, speedup / hilos))
+    print('')
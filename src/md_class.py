@@ -11,51 +11,198 @@ import matplotlib.animation as animation
 
 import os
 
-CLIB = C.CDLL('../bin/libmd.so')
-
-# Abreviaturas
-flp = C.POINTER(C.c_float)
-
-# Funciones de C
-CLIB.primer_paso.argtypes = [flp, flp, flp, C.c_int, C.c_float]
-CLIB.nueva_fza.argtypes = [flp, flp, C.c_int, C.c_float, C.c_float,
-                           flp, C.c_int]
-CLIB.nueva_fza_exacto.argtypes = [flp, flp, C.c_int, C.c_float, C.c_float]
-CLIB.ultimo_paso.argtypes = [flp, flp, C.c_int, C.c_float]
-CLIB.c_cont.argtypes = [flp, C.c_int, C.c_float]
-CLIB.lennardjones_lut.argtypes = [flp, C.c_int, C.c_float]
-CLIB.fuerza_lut.argtypes = [flp, flp, C.c_int, C.c_float]
-
-CLIB.cinetica.argtypes = [flp, C.c_int]
-CLIB.potencial.argtypes = [flp, C.c_int, C.c_float, flp, C.c_int, C.c_float]
-CLIB.potencial_exacto.argtypes = [flp, C.c_int, C.c_float, C.c_float]
-
-CLIB.distrib_radial.argtypes = [flp, flp, C.c_float, C.c_float, C.c_float,
-                                C.c_float]
-
-# Return types
-CLIB.cinetica.restype = C.c_float
-CLIB.potencial.restype = C.c_float
-CLIB.nueva_fza.restype = C.c_float
+from md_backend import cargar_backend, backend_nombre, SISTEMAS, tipos, inp
+from md_backend import MODO_LUT, MODO_EXACTO, MODO_CELDAS, MODO_VECINOS
+from md_backend import TABLA_R2, TABLAS, largo_lut
+from md_backend import TERMOSTATOS, BAROSTATOS, dbp
+from md_estadistica import acumulador, tiempo_integrado
+
+# Precisión por defecto de cada tipo de Lookup-table (elementos por unidad de
+# r o de r²). Ambas guardan el mismo potencial suavizado; con interpolación
+# lineal la de r² con g = 1000 (6252 elementos) tiene un error en la presión
+# de ~6e-5 contra ~1e-2 de la de r (25001 elementos) (ver md_lut.py, N=512)
+LUT_PRECISION = {'r': 10000, 'r2': 1000}
+
+# Registro de Lookup-tables compartidas por todas las instancias, con clave
+# (lut_precision, rc, tabla, potencial). Se guardan además como .npy en
+# RUTA_LUTS y se abren como memory-map de sólo lectura, de modo que los
+# procesos de un barrido comparten una única copia en memoria
+LUTS = {}
+RUTA_LUTS = os.environ.get('MD_LUTS', '../datos/luts/')
+
+# Versión del contenido de las tablas guardadas: cambia cuando cambia cómo se
+# calculan, para no reutilizar archivos viejos del mismo largo
+VERSION_LUTS = 2
+
+# Ancho de la zona en la que la fuerza pasa de rápida a lenta en r-RESPA
+ANCHO_RESPA = 0.3
+
+# Máximo factor en el que el controlador de h lo cambia entre dos bloques
+FACTOR_H = 1.5
+
+# Muestras efectivas que debe tener la parte estacionaria de cada observable
+# para dar por terminada la termalización (ver termalizar)
+MUESTRAS_EQUILIBRIO = 20
+
+
+def cargar_luts(lib, g, rc, tabla='r', potencial='lj', ruta=None,
+                real=C.c_float):
+    '''
+    Devuelve las Lookup-tables (FZA_LUT, LJ_LUT) para los parámetros dados,
+    con elementos de tipo real. Las busca en el registro, luego en disco y
+    sólo si no existen las calcula con el backend lib. Son de sólo lectura.
+    '''
+    tipo = np.dtype(real).name
+    clave = (int(g), float(rc), tabla, potencial, tipo)
+    if clave in LUTS:
+        return LUTS[clave]
+
+    if potencial != 'lj':
+        raise ValueError('Potencial desconocido: %s' % potencial)
+
+    ruta = RUTA_LUTS if ruta is None else ruta
+    archivo = os.path.join(ruta, '%s_%s_g%d_rc%g_%s_v%d.npy' %
+                           (potencial, tabla, g, rc, tipo, VERSION_LUTS))
+    long_lut = largo_lut(g, rc, TABLAS[tabla])
+
+    # Un archivo con otro largo (de una versión anterior) se recalcula
+    if os.path.isfile(archivo):
+        luts = np.load(archivo, mmap_mode='r')
+        if luts.shape == (2, long_lut):
+            LUTS[clave] = (luts[0], luts[1])
+            return LUTS[clave]
+
+    luts = np.zeros((2, long_lut), dtype=real)
+    p_fza = luts[0].ctypes.data_as(C.POINTER(real))
+    p_lj = luts[1].ctypes.data_as(C.POINTER(real))
+
+    if TABLAS[tabla] == TABLA_R2:
+        lib.lennardjones_lut2(p_lj, long_lut, g, rc)
+        lib.fuerza_lut2(p_fza, long_lut, g, rc)
+    else:
+        # el último elemento queda en cero (ver largo_lut)
+        lib.lennardjones_lut(p_lj, long_lut - 1, rc)
+        lib.fuerza_lut(p_fza, p_lj, long_lut - 1, rc)
+
+    # Se escribe en un temporal y se renombra para que otro proceso nunca lea
+    # un archivo a medio escribir
+    try:
+        os.makedirs(ruta, exist_ok=True)
+        temporal = '%s.%d.tmp' % (archivo, os.getpid())
+        with open(temporal, 'wb') as f:
+            np.save(f, luts)
+        os.replace(temporal, archivo)
+        luts = np.load(archivo, mmap_mode='r')
+    except OSError:
+        # sin permiso de escritura se usan las tablas en memoria
+        luts.setflags(write=False)
+
+    LUTS[clave] = (luts[0], luts[1])
+    return LUTS[clave]
+
+
+def lut_rapida(fza_lut, g, tabla, rc_interno, ancho=ANCHO_RESPA):
+    '''
+    Lookup-table de la parte rápida de la fuerza para r-RESPA: S(r) F(r),
+    con S = 1 hasta rc_interno - ancho, S = 0 desde rc_interno y un polinomio
+    cúbico suave en el medio. La parte lenta es la fuerza completa menos esta.
+    '''
+    x = np.arange(fza_lut.size, dtype=float) / g
+    r = np.sqrt(x) if tabla == 'r2' else x
+    u = np.clip((r - (rc_interno - ancho)) / ancho, 0, 1)
+    S = 1 + u**2 * (2 * u - 3)
+    with np.errstate(invalid='ignore'):
+        rapida = np.where(S > 0, S * fza_lut, 0)
+    return rapida.astype(fza_lut.dtype)
+
+
+def detectar_equilibrio(x, candidatos=50, minimo=10):
+    '''
+    Busca el inicio t0 de la parte estacionaria de la serie x como el corte
+    que maximiza la cantidad de muestras efectivas (n - t0) / g de lo que
+    queda, con g el tiempo integrado de autocorrelación calculado con FFT
+    (ver md_estadistica.tiempo_integrado) (Chodera, J. Chem. Theory Comput.
+    12, 1799 (2016)). Prueba hasta candidatos cortes equiespaciados dejando
+    al menos minimo muestras. Devuelve t0, g y la cantidad de muestras
+    efectivas desde t0.
+    '''
+    x = np.asarray(x, dtype=float)
+    n = x.size
+    if n <= minimo:
+        return 0, 1.0, float(n)
+
+    mejor = (0, 1.0, 0.0)
+    cortes = np.unique(np.linspace(0, n - minimo, candidatos).astype(int))
+    for t0 in cortes:
+        g = tiempo_integrado(x[t0:])
+        efectivas = (n - t0) / g
+        if efectivas > mejor[2]:
+            mejor = (int(t0), g, efectivas)
+    return mejor
 
 
 class md():
 
-    def __init__(self, N=512, rho=0.8442, h=0.001, T=2, lut_precision=10000,
-                 Q=400):
+    def __init__(self, N=512, rho=0.8442, h=0.001, T=2, lut_precision=None,
+                 Q=400, celdas=False, skin=None, hilos=None, backend=None,
+                 reordenar=0, tabla='r', termostato=None, tau=0.1, cadena=3,
+                 barostato=None, P=None, tau_P=1.0, compresibilidad=1.0,
+                 respa=1, rc_interno=1.6, h_adaptativo=False, h_min=None,
+                 h_max=None, tol_deriva=1e-3, bins_max=200,
+                 precision='simple'):
+
+        # Precisión (ver precision.h): 'simple' todo en float, 'mixta'
+        # posiciones, velocidades y tablas en float y fuerzas, energías y
+        # virial acumulados en double, 'doble' todo en double
+        self._precision = precision
+        self._real, self._acum = tipos(precision)
+        self._rlp = C.POINTER(self._real)
+        self._acp = C.POINTER(self._acum)
+
+        # Backend para los cálculos ('c', 'numpy', 'numba' o None para
+        # elegirlo solo)
+        self._lib = cargar_backend(backend, precision)
+        self._backend = backend_nombre(self._lib)
+
+        # Celdas, vecinos e hilos sólo existen en el backend de C. El de numba
+        # usa siempre celdas internamente y respeta la cantidad de hilos
+        if self._backend == 'numpy':
+            celdas, skin, hilos = False, None, 1
+        elif self._backend == 'numba':
+            celdas, skin = False, None
 
         # Almacena los parámetros recibidos
         self._N = N
         self._rho = rho
         self._h = h
         self._T = T
+        if tabla not in TABLAS:
+            raise ValueError('Tabla desconocida: %s (opciones: %s)' %
+                             (tabla, ', '.join(TABLAS)))
+        if termostato is None:
+            termostato = 'nve'
+        if termostato not in TERMOSTATOS:
+            raise ValueError('Termostato desconocido: %s (opciones: %s)' %
+                             (termostato, ', '.join(TERMOSTATOS)))
+        if barostato is None:
+            barostato = 'ninguno'
+        if barostato not in BAROSTATOS:
+            raise ValueError('Barostato desconocido: %s (opciones: %s)' %
+                             (barostato, ', '.join(BAROSTATOS)))
+        if barostato != 'ninguno' and P is None:
+            raise ValueError('El barostato necesita la presión objetivo P')
+        if respa > 1 and barostato != 'ninguno':
+            raise ValueError('r-RESPA no está implementado con barostato')
+        if lut_precision is None:
+            lut_precision = LUT_PRECISION[tabla]
+        self._tabla = tabla
         self._g = lut_precision
         self._Q = Q
 
         # Calcula otros parámetros internos
         self._L = (N / rho)**(1.0 / 3.0)
         self._rc = 2.5  # 0.5 * self._L
-        self._long_lut = int(lut_precision * self._rc)
+        self._long_lut = largo_lut(lut_precision, self._rc, TABLAS[tabla])
 
         # Cantidad de pasos realizados
 
@@ -64,37 +211,145 @@ class md():
         # Prepara las posiciones y velocidades con sus punteros
         self._pos = self.llenar_pos()
         self._vel = self.llenar_vel()
-        self._p_pos = self._pos.ctypes.data_as(flp)
-        self._p_vel = self._vel.ctypes.data_as(flp)
+        self._p_pos = self._pos.ctypes.data_as(self._rlp)
+        self._p_vel = self._vel.ctypes.data_as(self._rlp)
 
         # Prepara la memoria para almacenar la fuerza con su puntero
-        self._fza = np.zeros(3 * N, dtype=C.c_float)
-        self._p_fza = self._fza.ctypes.data_as(flp)
-
-        # Prepara la memoria para almacenar dist. radial y su puntero
-        self._distrad = np.zeros(self._Q, dtype=C.c_float)
-        self._p_distrad = self._distrad.ctypes.data_as(flp)
+        self._fza = np.zeros(3 * N, dtype=self._acum)
+        self._p_fza = self._fza.ctypes.data_as(self._acp)
 
-        # Calcula la LUT para el potencial de Lennard-Jones
-        self._LJ_LUT = np.zeros(self._long_lut, dtype=C.c_float)
-        self._p_LJ_LUT = self._LJ_LUT.ctypes.data_as(flp)
-        CLIB.lennardjones_lut(self._p_LJ_LUT, self._long_lut, self._rc)
+        # Histograma de la distribución radial (ver reiniciar_gr); Q es la
+        # cantidad de intervalos por defecto
+        self._hist_gr = None
 
-        # Calcula la LUT para las fuerzas
-        self._FZA_LUT = np.zeros(self._long_lut, dtype=C.c_float)
-        self._p_FZA_LUT = self._FZA_LUT.ctypes.data_as(flp)
-        CLIB.fuerza_lut(self._p_FZA_LUT, self._p_LJ_LUT,
-                        self._long_lut, self._rc)
+        # LUT para las fuerzas y el potencial de Lennard-Jones (compartidas
+        # entre instancias, ver cargar_luts)
+        self._FZA_LUT, self._LJ_LUT = cargar_luts(self._lib, self._g,
+                                                  self._rc, tabla,
+                                                  real=self._real)
+        self._p_FZA_LUT = self._FZA_LUT.ctypes.data_as(self._rlp)
+        self._p_LJ_LUT = self._LJ_LUT.ctypes.data_as(self._rlp)
 
         # Modo configurado para calculos
         self._exacto = False
 
-        # Tiempo de termalizacion
-        self._t_termalizacion = 1000
+        # Lista de celdas (sólo tiene sentido con al menos 3 celdas por lado)
+        self._M = self._lib.celdas_por_lado(self._L, self._rc)
+        self._celdas = celdas and self._M >= 3
+        # Celdas por lado para las que alcanza la memoria (con barostato la
+        # caja cambia y se amplía en actualizar_caja)
+        self._M_max = self._M
+        if self._celdas:
+            self._cabeza = np.zeros(self._M**3, dtype=C.c_int)
+            self._lista = np.zeros(N, dtype=C.c_int)
+            self._p_cabeza = self._cabeza.ctypes.data_as(inp)
+            self._p_lista = self._lista.ctypes.data_as(inp)
+
+        # Lista de vecinos de Verlet con radio rc + skin
+        self._vecinos = skin is not None and skin > 0
+        self._skin = skin
+        self._M_vec = 0
+        if self._vecinos:
+            self._rv = self._rc + skin
+            self._M_vec = self._lib.celdas_por_lado(self._L, self._rv)
+            self._M_vec_max = self._M_vec
+            self._cabeza_vec = np.zeros(max(self._M_vec, 1)**3,
+                                        dtype=C.c_int)
+            self._lista_vec = np.zeros(N, dtype=C.c_int)
+            self._inicio = np.zeros(N + 1, dtype=C.c_int)
+            self._pos_ref = np.zeros(3 * N, dtype=self._real)
+            self._p_cabeza_vec = self._cabeza_vec.ctypes.data_as(inp)
+            self._p_lista_vec = self._lista_vec.ctypes.data_as(inp)
+            self._p_inicio = self._inicio.ctypes.data_as(inp)
+            self._p_pos_ref = self._pos_ref.ctypes.data_as(self._rlp)
+
+            # Estima la cantidad de pares dentro de rv con un margen
+            pares = 2 * np.pi / 3 * self._rv**3 * rho * N
+            self._max_vecinos = int(1.5 * pares) + N
+            self._lista_vecinos = np.zeros(self._max_vecinos, dtype=C.c_int)
+
+        # Hilos para calcular la fuerza (por defecto de la variable MD_HILOS)
+        if hilos is None:
+            hilos = int(os.environ.get('MD_HILOS', 1))
+        self._hilos = max(hilos, 1)
+        if self._hilos > 1 and self._backend == 'c':
+            self._fza_hilos = np.zeros(3 * N * self._hilos,
+                                       dtype=self._acum)
+
+        # Reordenamiento de las partículas en memoria cada 'reordenar' pasos
+        # (0: nunca). _ids[i] es la identidad de la partícula guardada en i
+        self._reordenar = max(reordenar, 0)
+        self._ids = np.arange(N)
+
+        # Termostato con temperatura objetivo T (la pedida, no la inicial
+        # medida en llenar_vel) y su cadena de Nosé-Hoover
+        self._termostato = termostato
+        self._T_objetivo = T
+        self._tau = tau
+        self._xi = np.zeros(max(cadena, 1), dtype=float)
+        self._v_xi = np.zeros(max(cadena, 1), dtype=float)
+        # Semilla del generador del termostato (reproducible con np.random)
+        self._semilla = int(np.random.randint(1, 2**62))
+
+        # Barostato con presión objetivo P. El tamaño de la caja (y con él
+        # _L, _rho y las celdas) pasa a ser una variable más del sistema
+        self._barostato = barostato
+        self._P_objetivo = P
+        self._tau_P = tau_P
+        self._compresibilidad = compresibilidad
+
+        # r-RESPA: h es el paso de la fuerza lenta y la rápida (r menor que
+        # rc_interno) se integra con respa subpasos de h / respa
+        self._respa = max(respa, 1)
+        self._rc_interno = rc_interno
+        if self._respa > 1:
+            if not 0 < rc_interno - ANCHO_RESPA < rc_interno < self._rc:
+                raise ValueError('rc_interno debe estar entre %g y rc' %
+                                 ANCHO_RESPA)
+            self._FZA_LUT_rapida = lut_rapida(self._FZA_LUT, self._g, tabla,
+                                              rc_interno)
+            self._fza_rapida = np.zeros(3 * N, dtype=self._acum)
+            self._M_rapido = self._lib.celdas_por_lado(self._L, rc_interno)
+            self._cabeza_rapida = np.zeros(max(self._M_rapido, 1)**3,
+                                           dtype=C.c_int)
+            self._lista_rapida = np.zeros(N, dtype=C.c_int)
+
+        # Controlador de h entre bloques de muestreo (ver ajustar_h). Se
+        # guarda la historia como pares (cant_pasos, h) desde los que vale h
+        self._h_adaptativo = h_adaptativo
+        self._h_min = h / 10 if h_min is None else h_min
+        self._h_max = h * 10 if h_max is None else h_max
+        self._tol_deriva = tol_deriva
+        self._bins_max = bins_max
+        self._historia_h = [(0, h)]
+
+        # Pasos descartados por no ser estacionarios en la última
+        # termalización (ver termalizar)
+        self._t_termalizacion = 0
+
+        # Vectores en los que evolucionar guarda los observables al muestrear
+        # (se reutilizan mientras no cambie su largo) y acumuladores de la
+        # última medición, por observable (ver md_estadistica)
+        self._muestras = np.zeros((3, 0), dtype=self._acum)
+        self._acumuladores = {}
 
         # Presion de exceso
         self._p_exceso = 0.0
 
+        # Energia potencial, calculada junto con la fuerza. Sólo es válida
+        # (junto con la presión) si las posiciones no cambiaron desde entonces
+        self._epot = 0.0
+        self._fza_vigente = False
+
+        # Estado compartido con el integrador de C
+        self._sis = SISTEMAS[precision]()
+        self._p_sis = C.pointer(self._sis)
+        self.enlazar()
+
+        # r-RESPA parte de la fuerza lenta del paso anterior
+        if self._respa > 1:
+            self.calc_fza()
+
     @property
     def N(self):
         return self._N
@@ -107,14 +362,44 @@ class md():
     def h(self):
         return self._h
 
+    @h.setter
+    def h(self, h):
+        self.fijar_h(h)
+
+    @property
+    def historia_h(self):
+        return self._historia_h
+
+    @property
+    def tiempo(self):
+        '''
+        Tiempo simulado, sumando los pasos hechos con cada h
+        '''
+        pasos = [p for p, h in self._historia_h] + [self._cant_pasos]
+        return sum((pasos[i + 1] - pasos[i]) * h
+                   for i, (p, h) in enumerate(self._historia_h))
+
+    @property
+    def resolucion_lut(self):
+        '''
+        Ancho en r de un elemento de la Lookup-table en r = 1 (sigma)
+        '''
+        if self._tabla == 'r2':
+            return 1 / (2 * self._g)
+        return 1 / self._g
+
     @property
     def T(self):
-        return self.calc_temp
+        return self.calc_temp()
 
     @property
     def lut_precision(self):
         return self._g
 
+    @property
+    def tabla(self):
+        return self._tabla
+
     @property
     def rc(self):
         return self._rc
@@ -127,6 +412,265 @@ class md():
     def cant_pasos(self):
         return self._cant_pasos
 
+    @property
+    def t_termalizacion(self):
+        return self._t_termalizacion
+
+    @property
+    def celdas(self):
+        return self._celdas
+
+    @property
+    def skin(self):
+        return self._skin
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def precision(self):
+        return self._precision
+
+    @property
+    def hilos(self):
+        return self._hilos
+
+    @property
+    def termostato(self):
+        return self._termostato
+
+    @property
+    def tau(self):
+        return self._tau
+
+    @property
+    def T_objetivo(self):
+        return self._T_objetivo
+
+    @T_objetivo.setter
+    def T_objetivo(self, T):
+        self._T_objetivo = T
+        self._sis.T_objetivo = T
+
+    @property
+    def acumuladores(self):
+        return self._acumuladores
+
+    def fijar_termostato(self, termostato, T=None, tau=None):
+        '''
+        Cambia el termostato (y opcionalmente la temperatura objetivo y el
+        tiempo de relajación). Con 'nve' se vuelve a energía constante.
+        '''
+        if termostato not in TERMOSTATOS:
+            raise ValueError('Termostato desconocido: %s (opciones: %s)' %
+                             (termostato, ', '.join(TERMOSTATOS)))
+        self._termostato = termostato
+        if T is not None:
+            self._T_objetivo = T
+        if tau is not None:
+            self._tau = tau
+        # la cadena de Nosé-Hoover arranca en reposo
+        self._xi[:] = 0
+        self._v_xi[:] = 0
+        self.enlazar()
+
+    @property
+    def barostato(self):
+        return self._barostato
+
+    @property
+    def tau_P(self):
+        return self._tau_P
+
+    @property
+    def P_objetivo(self):
+        return self._P_objetivo
+
+    @P_objetivo.setter
+    def P_objetivo(self, P):
+        self._P_objetivo = P
+        self._sis.P_objetivo = P
+
+    @property
+    def volumen(self):
+        return self._L**3
+
+    def fijar_h(self, h):
+        '''
+        Cambia el paso temporal y lo agrega a la historia
+        '''
+        self._h = h
+        self._sis.h = h
+        if self._historia_h[-1][0] == self._cant_pasos:
+            self._historia_h[-1] = (self._cant_pasos, h)
+        else:
+            self._historia_h.append((self._cant_pasos, h))
+
+    def ajustar_h(self, energia):
+        '''
+        Controlador de h entre bloques de muestreo. Achica h si la deriva de
+        la energía en el bloque (pendiente de un ajuste lineal, por partícula
+        y en todo el bloque) supera tol_deriva, o si el desplazamiento
+        máximo en un paso supera bins_max elementos de la Lookup-table. Si
+        no, lo agranda (como mucho FACTOR_H por bloque y entre h_min y
+        h_max). Con termostato la energía no se conserva y sólo se usa el
+        desplazamiento.
+        '''
+        N = self._N
+        h = self._h
+        factor = FACTOR_H
+
+        if self._termostato == 'nve' and len(energia) > 1:
+            t = np.arange(len(energia))
+            pendiente = np.polyfit(t, np.asarray(energia, dtype=float), 1)[0]
+            deriva = abs(pendiente) * (len(energia) - 1) / N
+            # el error de Verlet crece como h²
+            if deriva > 0:
+                factor = min(factor, 0.9 * (self._tol_deriva / deriva)**0.5)
+
+        v = np.linalg.norm(self._vel.reshape(N, 3), axis=1).max()
+        f = np.linalg.norm(self._fza.reshape(N, 3), axis=1).max()
+        desplazamiento = v * h + 0.5 * f * h**2
+        if desplazamiento > 0:
+            factor = min(factor, self._bins_max * self.resolucion_lut /
+                         desplazamiento)
+
+        factor = max(factor, 1 / FACTOR_H)
+        self.fijar_h(float(np.clip(h * factor, self._h_min, self._h_max)))
+
+    def fijar_barostato(self, barostato, P=None, tau_P=None):
+        '''
+        Cambia el barostato (y opcionalmente la presión objetivo y el tiempo
+        de relajación). Con 'ninguno' el volumen queda fijo en el actual.
+        '''
+        if barostato not in BAROSTATOS:
+            raise ValueError('Barostato desconocido: %s (opciones: %s)' %
+                             (barostato, ', '.join(BAROSTATOS)))
+        if P is not None:
+            self._P_objetivo = P
+        if barostato != 'ninguno' and self._P_objetivo is None:
+            raise ValueError('El barostato necesita la presión objetivo P')
+        self._barostato = barostato
+        if tau_P is not None:
+            self._tau_P = tau_P
+        # el barostato MTK arranca en reposo
+        self._sis.v_eps = 0
+        self.enlazar()
+
+    @property
+    def respa(self):
+        return self._respa
+
+    @property
+    def rc_interno(self):
+        return self._rc_interno
+
+    @property
+    def reordenar(self):
+        return self._reordenar
+
+    @property
+    def ids(self):
+        return self._ids
+
+    @property
+    def exacto(self):
+        return self._exacto
+
+    @exacto.setter
+    def exacto(self, exacto):
+        self._exacto = exacto
+        self._sis.modo = self.modo()
+        self._fza_vigente = False
+
+    @property
+    def n_armados(self):
+        '''
+        Cantidad de veces que se armó la lista de vecinos
+        '''
+        return self._sis.n_armados
+
+    @property
+    def vecinos_promedio(self):
+        '''
+        Largo medio de la lista de vecinos (pares por partícula)
+        '''
+        if self._sis.n_armados == 0:
+            return 0.0
+        return self._sis.pares_acumulados / (self._sis.n_armados * self._N)
+
+    def modo(self):
+        '''
+        Modo de cálculo de la fuerza según la configuración
+        '''
+        if self._exacto:
+            return MODO_EXACTO
+        elif self._vecinos:
+            return MODO_VECINOS
+        elif self._celdas:
+            return MODO_CELDAS
+        return MODO_LUT
+
+    def enlazar(self):
+        '''
+        Actualiza los punteros y parámetros del estado compartido con C.
+        Debe llamarse cada vez que se reemplaza alguno de los vectores.
+        '''
+        sis = self._sis
+        sis.pos = self._pos.ctypes.data_as(self._rlp)
+        sis.vel = self._vel.ctypes.data_as(self._rlp)
+        sis.fza = self._fza.ctypes.data_as(self._acp)
+        sis.n = self._N
+        sis.L = self._L
+        sis.h = self._h
+        sis.rc = self._rc
+        sis.FZA_LUT = self._p_FZA_LUT
+        sis.LJ_LUT = self._p_LJ_LUT
+        sis.g = self._g
+        sis.tabla = TABLAS[self._tabla]
+        sis.modo = self.modo()
+        sis.M_cel = self._M
+        sis.M_cel_max = self._M_max
+        if self._celdas:
+            sis.cabeza = self._p_cabeza
+            sis.lista = self._p_lista
+        if self._vecinos:
+            sis.skin = self._skin
+            sis.M_vec = self._M_vec
+            sis.M_vec_max = self._M_vec_max
+            sis.cabeza_vec = self._p_cabeza_vec
+            sis.lista_vec = self._p_lista_vec
+            sis.inicio = self._p_inicio
+            sis.vecinos = self._lista_vecinos.ctypes.data_as(inp)
+            sis.max_vecinos = self._max_vecinos
+            sis.pos_ref = self._p_pos_ref
+        sis.hilos = self._hilos
+        if self._hilos > 1 and self._backend == 'c':
+            sis.fza_hilos = self._fza_hilos.ctypes.data_as(self._acp)
+        sis.termostato = TERMOSTATOS[self._termostato]
+        sis.T_objetivo = self._T_objetivo
+        sis.tau = self._tau
+        sis.largo_cadena = self._xi.size
+        sis.xi = self._xi.ctypes.data_as(dbp)
+        sis.v_xi = self._v_xi.ctypes.data_as(dbp)
+        if sis.semilla == 0:
+            sis.semilla = self._semilla
+        sis.barostato = BAROSTATOS[self._barostato]
+        if self._P_objetivo is not None:
+            sis.P_objetivo = self._P_objetivo
+        sis.tau_P = self._tau_P
+        sis.compresibilidad = self._compresibilidad
+        sis.respa = self._respa
+        if self._respa > 1:
+            sis.rc_interno = self._rc_interno
+            sis.FZA_LUT_rapida = self._FZA_LUT_rapida.ctypes.data_as(
+                self._rlp)
+            sis.fza_rapida = self._fza_rapida.ctypes.data_as(self._acp)
+            sis.M_rapido = self._M_rapido
+            sis.cabeza_rapida = self._cabeza_rapida.ctypes.data_as(inp)
+            sis.lista_rapida = self._lista_rapida.ctypes.data_as(inp)
+
     @classmethod
     def transforma_1D(cls, x, y, z):
         '''
@@ -171,8 +715,9 @@ class md():
         # Transforma las coordenadas xyz al vector 3N que usan las func. de C
         pos = self.transforma_1D(x, y, z)
 
-        # Devuelve la cantidad de posiciones pedidas como vector de c_floats
-        return pos[0:3 * N].astype(C.c_float)
+        # Devuelve la cantidad de posiciones pedidas con el tipo de la
+        # precisión elegida
+        return pos[0:3 * N].astype(self._real)
 
     def llenar_vel(self):
         '''
@@ -183,14 +728,17 @@ class md():
 
         # Genera una distribucion normal de velocidades
         vel = np.random.normal(loc=0, scale=T**0.5, size=3 * N)
-        # Resta el promedio para evitar que Pt sea igual a cero
-        vel -= np.mean(vel)
+        # Resta la velocidad del centro de masa (en cada eje) para que el
+        # momento total sea cero
+        vel = vel.reshape(N, 3)
+        vel -= np.mean(vel, axis=0)
+        vel = vel.ravel()
 
         # Calcula la T inicial
         self._T = np.var(vel)
 
-        # Devuelve las velocidades como vector de c_floats
-        return vel.astype(C.c_float)
+        # Devuelve las velocidades con el tipo de la precisión elegida
+        return vel.astype(self._real)
 
     def ver_pos(self, plot_vel=False, size=30):
         '''
@@ -218,53 +766,212 @@ class md():
         """
         Da un paso en la simulacion usando las LUT o exacto
         """
-        # Llama a la función que da medio paso de velocidad y uno de posición
-        CLIB.primer_paso(self._p_pos, self._p_vel,
-                         self._p_fza, self._N, self._h)
+        self.evolucionar(1)
 
-        # Calcula la nueva fuerza en el modo configurado
-        if self._exacto:
-            CLIB.nueva_fza_exacto(self._p_pos, self._p_fza,
-                                  self._N, self._L, self._rc)
-        else:
-            # Al calcular la nueva fuerza actualiza la presión de exceso
-            self._p_exceso = CLIB.nueva_fza(self._p_pos, self._p_fza, self._N,
-                                            self._L, self._rc, self._p_FZA_LUT,
-                                            self._g)
+    def evolucionar(self, pasos, k=0, ecin=None, epot=None, virial=None):
+        '''
+        Realiza pasos de Verlet en C sin volver a Python. Cada k pasos guarda
+        energía cinética, potencial y virial en los vectores recibidos
+        (del tipo de los acumuladores, ver precision, de largo pasos // k),
+        que pueden ser None.
+        '''
+        p_ecin = None if ecin is None else ecin.ctypes.data_as(self._acp)
+        p_epot = None if epot is None else epot.ctypes.data_as(self._acp)
+        p_virial = None if virial is None else virial.ctypes.data_as(
+            self._acp)
+
+        t = 0
+        while t < pasos:
+            # Se detiene en el próximo reordenamiento (si corresponde)
+            hasta = pasos
+            if self._reordenar:
+                faltan = self._reordenar - \
+                    (self._cant_pasos + t) % self._reordenar
+                hasta = min(pasos, t + faltan)
+
+            t = self._lib.evolucionar(self._p_sis, t, hasta, k,
+                                      p_ecin, p_epot, p_virial)
+            if self._sis.desborde:
+                self.ampliar_vecinos()
+            self.actualizar_caja()
+            if self._reordenar and \
+                    (self._cant_pasos + t) % self._reordenar == 0:
+                self.ordenar_celdas()
+
+        self._cant_pasos += pasos
+        # Sin pasos C no calculó fuerzas y el estado no cambió
+        if pasos > 0:
+            self.leer_resultados()
+
+    def ordenar_celdas(self):
+        '''
+        Reordena las partículas en memoria siguiendo una curva de Morton
+        sobre la grilla de celdas, para que las vecinas queden cerca en
+        memoria. Posiciones, velocidades y fuerzas se permutan en el lugar
+        (los punteros siguen valiendo) y _ids guarda la permutación.
+        '''
+        N = self._N
+        M = max(self._M, 1)
+
+        # Coordenadas de la celda de cada partícula
+        x = self._pos.reshape(N, 3)
+        c = np.floor(x / self._L * M).astype(np.int64) % M
+
+        # Clave de Morton: intercala los bits de cx, cy y cz
+        clave = np.zeros(N, dtype=np.int64)
+        for b in range(int(M - 1).bit_length()):
+            for k in range(3):
+                clave |= ((c[:, k] >> b) & 1) << (3 * b + k)
+
+        orden = np.argsort(clave, kind='stable')
+
+        for vector in (self._pos, self._vel, self._fza):
+            v = vector.reshape(N, 3)
+            v[:] = v[orden]
+        self._ids = self._ids[orden]
+
+        # La lista de vecinos guarda índices viejos: se marca como inválida
+        # para que se vuelva a armar en el próximo cálculo de la fuerza
+        if self._vecinos:
+            self._sis.desborde = 1
+
+    def en_orden(self, vector):
+        '''
+        Devuelve una copia del vector 3N con las partículas ordenadas por
+        identidad (el orden inicial), sin importar los reordenamientos
+        '''
+        N = self._N
+        ordenado = np.empty((N, 3), dtype=vector.dtype)
+        ordenado[self._ids] = vector.reshape(N, 3)
+        return ordenado.reshape(3 * N)
+
+    def actualizar_caja(self):
+        '''
+        Lee de C el tamaño de la caja, que cambia con el barostato, y
+        actualiza la densidad y las celdas (ver fijar_caja).
+        '''
+        if self._barostato == 'ninguno':
+            return
+
+        self.fijar_caja(self._sis.L)
+
+    def fijar_densidad(self, rho):
+        '''
+        Lleva el sistema a la densidad rho escalando la caja y las
+        posiciones de forma afín (las velocidades no cambian), y recalcula
+        la fuerza para poder seguir evolucionando.
+        '''
+        factor = (self._rho / rho)**(1.0 / 3.0)
+        self._pos *= factor
+        self.fijar_caja(self._L * factor)
+
+        # la lista de vecinos se arma de nuevo
+        if self._vecinos:
+            self._sis.desborde = 1
+        self._fza_vigente = False
+        self.calc_fza()
+
+    def fijar_caja(self, L):
+        '''
+        Fija el tamaño de la caja (sin mover las partículas) y actualiza la
+        densidad y las celdas. Si la caja creció tanto que entran más celdas
+        que las que hay en memoria, la amplía.
+        '''
+        self._L = L
+        self._sis.L = L
+        self._rho = self._N / self._L**3
+
+        if self._celdas:
+            self._M = self._lib.celdas_por_lado(self._L, self._rc)
+            if self._M > self._M_max:
+                self._M_max = self._M
+                self._cabeza = np.zeros(self._M**3, dtype=C.c_int)
+                self._p_cabeza = self._cabeza.ctypes.data_as(inp)
+                self._sis.cabeza = self._p_cabeza
+                self._sis.M_cel_max = self._M_max
+            self._sis.M_cel = self._M
+
+        if self._vecinos:
+            self._M_vec = self._lib.celdas_por_lado(self._L, self._rv)
+            if self._M_vec > self._M_vec_max:
+                self._M_vec_max = self._M_vec
+                self._cabeza_vec = np.zeros(self._M_vec**3, dtype=C.c_int)
+                self._p_cabeza_vec = self._cabeza_vec.ctypes.data_as(inp)
+                self._sis.cabeza_vec = self._p_cabeza_vec
+                self._sis.M_vec_max = self._M_vec_max
+            self._sis.M_vec = self._M_vec
+
+        if self._respa > 1:
+            self._M_rapido = self._lib.celdas_por_lado(self._L,
+                                                       self._rc_interno)
+            if max(self._M_rapido, 1)**3 > self._cabeza_rapida.size:
+                self._cabeza_rapida = np.zeros(self._M_rapido**3,
+                                               dtype=C.c_int)
+                self._sis.cabeza_rapida = self._cabeza_rapida.ctypes.data_as(
+                    inp)
+            self._sis.M_rapido = self._M_rapido
+
+    def ampliar_vecinos(self):
+        '''
+        Duplica la memoria de la lista de vecinos
+        '''
+        self._max_vecinos *= 2
+        self._lista_vecinos = np.zeros(self._max_vecinos, dtype=C.c_int)
+        self._sis.vecinos = self._lista_vecinos.ctypes.data_as(inp)
+        self._sis.max_vecinos = self._max_vecinos
 
-        # Da el ultimo medio paso de velocidad
-        CLIB.ultimo_paso(self._p_vel, self._p_fza, self._N, self._h)
+    def actualizar_vecinos(self):
+        '''
+        Rearma la lista de vecinos si alguna partícula se movió más de skin/2
+        '''
+        while self._lib.actualizar_vecinos(self._p_sis) < 0:
+            self.ampliar_vecinos()
+
+    def leer_resultados(self):
+        '''
+        Lee del estado de C la presión y energía del último cálculo de fuerza.
+        Sólo debe llamarse después de que C haya calculado las fuerzas para
+        las posiciones actuales, porque las marca como vigentes
+        '''
+        self._p_exceso = self._sis.p_exceso
+        self._epot = self._sis.epot
+        self._fza_vigente = True
 
-        # Aplica condiciones de contorno
-        CLIB.c_cont(self._p_pos, self._N, self._L)
+    def calc_fza(self):
+        '''
+        Calcula la fuerza en el modo configurado (exacto, vecinos, celdas o
+        LUT). En el mismo recorrido actualiza la presión de exceso y la
+        energía potencial.
+        '''
+        if self._vecinos and not self._exacto:
+            self.actualizar_vecinos()
 
-        self._cant_pasos += 1
+        self._lib.calc_fza(self._p_sis)
+        self.leer_resultados()
 
     def n_pasos(self, n=5000):
         '''
         Realiza sucesivos pasos sin almacenar información
         '''
-        for i in range(n):
-            self.paso()
+        self.evolucionar(n)
 
     def calc_energia_cinetica(self):
         '''
         Calcula la suma de la energia cinética.
         '''
-        ecin = CLIB.cinetica(self._p_vel, self._N)
+        ecin = self._lib.cinetica(self._p_vel, self._N)
         return ecin
 
     def calc_energia_potencial(self):
         '''
         Calcula la suma de la energia potencial en el modo configurado.
+        Si las posiciones no cambiaron desde el último cálculo de la fuerza
+        devuelve el valor ya calculado.
         '''
-        epot = CLIB.potencial(self._p_pos, self._N, self._L,
-                              self._p_LJ_LUT, self._g, self._rc)
-
-        if self._exacto:
-            epot = CLIB.potencial(self._pos, self._N, self._L, self._rc)
+        if not self._fza_vigente:
+            self.calc_fza()
 
-        return epot
+        return self._epot
 
     def calc_energia(self):
         '''
@@ -276,8 +983,22 @@ class md():
         '''
         Calcula el observable P / (rho*T) - 1
         '''
+        if not self._fza_vigente:
+            self.calc_fza()
+
         return self._p_exceso / 3
 
+    def calc_presion_total(self):
+        '''
+        Calcula la presión instantánea P = (2 Ecin + virial) / 3V, la que
+        controla el barostato
+        '''
+        if not self._fza_vigente:
+            self.calc_fza()
+
+        return (2 * self.calc_energia_cinetica() + self._p_exceso) / \
+            (3 * self.volumen)
+
     def rescaling(self, T_deseada, T_actual):
         '''
         Realiza el rescaling de velocidades
@@ -292,32 +1013,100 @@ class md():
 
     def prueba_piloto(self, precision, m_piloto=10, subm=50, dc=250):
         '''
-        Estima para la precision deseada la cantidad de promedios a considerar
+        Estima para la precision deseada la cantidad de promedios a
+        considerar. El error de la energía se estima con el análisis de
+        bloques de la serie piloto, por lo que tiene en cuenta sus
+        correlaciones. Devuelve la cantidad de promedios de subm valores y la
+        dispersión de cada uno (ver planear_muestreo para elegir además cada
+        cuántos pasos muestrear)
         '''
-        x = np.zeros(m_piloto, dtype=float)
+        energia = acumulador()
 
         for i in range(m_piloto):
             self.n_pasos(dc)
-            energia, presion = self.llenar_vectores(subm)
-            x[i] = np.mean(energia)
+            ecin, epot, virial = self._muestrear(subm)
+            energia.agregar(ecin.astype(float) + epot)
+
+        self._acumuladores = {'energia': energia}
+
+        # La varianza de la media cae como 1/n: n = n_piloto (error / p)²
+        error = energia.error()
+        m = int(np.ceil(energia.n * (error / precision)**2 / subm))
+
+        return m, error * (energia.n / subm)**0.5
+
+    def tiempos_correlacion(self, pasos=4000, k=1):
+        '''
+        Evoluciona pasos guardando energía y presión cada k pasos y estima el
+        tiempo integrado de autocorrelación de cada serie con FFT (ver
+        md_estadistica.tiempo_integrado), en pasos. Devuelve (tau, varianza)
+        de la energía y de la presión. Sin termostato el tiempo de la energía
+        es el de la energía potencial: la total se conserva y su serie sólo
+        tiene la deriva y el ruido del integrador.
+        '''
+        ecin, epot, virial = self._muestrear(pasos // k, k)
+        energia = ecin.astype(float) + epot
+        presion = virial.astype(float) / 3
+
+        lenta = epot.astype(float) if self._termostato == 'nve' else energia
+        return [(k * tiempo_integrado(lenta), np.var(energia)),
+                (k * tiempo_integrado(presion), np.var(presion))]
+
+    def planear_muestreo(self, precision, precision_p=None, pasos=4000, k=1,
+                         subm=20):
+        '''
+        Elige m, subm, dc y k para tomar_muestra a partir de una serie piloto
+        de pasos pasos (ver tiempos_correlacion). Las muestras se separan el
+        doble del mayor de los tiempos de correlación de energía y presión,
+        así casi no queda correlación entre ellas ni hace falta descartar
+        pasos entre grupos (dc = 0), y se toman las necesarias para que el
+        error de la energía sea precision (y el de la presión precision_p, si
+        se pide). Las precisiones son de los valores que devuelve
+        tomar_muestra (energía y presión de exceso totales, no por partícula).
+        Devuelve un diccionario para pasarle a tomar_muestra.
+        '''
+        (tau_e, var_e), (tau_p, var_p) = self.tiempos_correlacion(pasos, k)
+        k_muestreo = int(np.ceil(max(2 * tau_e, 2 * tau_p, k)))
+
+        def necesarias(tau, var, precision):
+            # Con correlación exponencial, muestras separadas k_muestreo
+            # pasos tienen ineficiencia coth(k_muestreo / tau) (tau / k
+            # cuando están muy juntas, 1 cuando están muy separadas) y hacen
+            # falta var / precision² independientes
+            return var / np.tanh(k_muestreo / tau) / precision**2
+
+        muestras = necesarias(tau_e, var_e, precision)
+        if precision_p is not None:
+            muestras = max(muestras, necesarias(tau_p, var_p, precision_p))
+        m = max(int(np.ceil(muestras / subm)), 1)
+
+        return dict(m=m, subm=subm, dc=0, k=k_muestreo)
+
+    def _muestrear(self, subm, k=10):
+        '''
+        Evoluciona subm * k pasos guardando energía cinética, potencial y
+        virial cada k pasos en vectores que se reutilizan entre llamadas
+        '''
+        if self._muestras.shape[1] != subm:
+            self._muestras = np.zeros((3, subm), dtype=self._acum)
+        ecin, epot, virial = self._muestras
 
-        var_piloto = np.var(x)
+        self.evolucionar(subm * k, k, ecin, epot, virial)
 
-        return int(m_piloto * var_piloto / (precision**2)), var_piloto**0.5
+        return ecin, epot, virial
 
     def llenar_vectores(self, subm, k=10, plot=False):
         '''
         Promedia subm valores de energia y presion saltandose k pasos
         '''
-        temp = np.zeros(subm, dtype=float)
-        energia = np.zeros(subm, dtype=float)
-        presion = np.zeros(subm, dtype=float)
+        # Evoluciona subm * k pasos guardando los observables cada k pasos
+        ecin, epot, virial = self._muestrear(subm, k)
 
-        for i in range(subm):
-            self.n_pasos(k)
-            temp[i] = self.calc_temp()
-            energia[i] = self.calc_energia()
-            presion[i] = self.calc_presion()
+        # T = <v²> con la velocidad media nula (llenar_vel la anula y el
+        # integrador y los termostatos la conservan, ver termostato.h)
+        temp = 2 * ecin.astype(float) / (3 * self._N)
+        energia = ecin.astype(float) + epot
+        presion = virial.astype(float) / 3
 
         if plot:
             fig, ax = plt.subplots(2)
@@ -328,62 +1117,241 @@ class md():
 
         return temp, energia, presion
 
+    def termalizar(self, max_pasos=50000, k=10, bloque=20, fraccion=0.5):
+        '''
+        Evoluciona hasta que la energía potencial y la presión de exceso son
+        estacionarias, como mucho max_pasos. Las guarda cada k pasos y, cada
+        bloque muestras, busca en cada serie el inicio de la parte
+        estacionaria (ver detectar_equilibrio). Termina cuando esa parte es
+        al menos la fracción pedida de lo realizado y tiene al menos
+        MUESTRAS_EQUILIBRIO muestras efectivas en las dos series. Devuelve
+        los pasos descartados (el prefijo no estacionario) y los realizados.
+        '''
+        ecin = np.zeros(bloque, dtype=self._acum)
+        epot = np.zeros(bloque, dtype=self._acum)
+        virial = np.zeros(bloque, dtype=self._acum)
+        series = [[], []]
+        realizados = 0
+        estacionario = False
+
+        while not estacionario and realizados + bloque * k <= max_pasos:
+            self.evolucionar(bloque * k, k, ecin, epot, virial)
+            realizados += bloque * k
+            series[0].extend(epot.astype(float))
+            series[1].extend(virial.astype(float))
+
+            n = len(series[0])
+            cortes = [detectar_equilibrio(x) for x in series]
+            t0 = max(c[0] for c in cortes)
+            efectivas = min(c[2] for c in cortes)
+            estacionario = n - t0 >= fraccion * n and \
+                efectivas >= MUESTRAS_EQUILIBRIO
+
+        # Si no se llegó al equilibrio se completan los max_pasos y se
+        # descarta todo lo realizado
+        if estacionario:
+            descartados = t0 * k
+        else:
+            self.n_pasos(max_pasos - realizados)
+            realizados = descartados = max_pasos
+
+        self._t_termalizacion = descartados
+        return descartados, realizados
+
     def tomar_muestra(self, m=20, subm=20, dc=200, k=50):
         '''
-        Toma n muestras promediando 'm' grupos de 'dc' pasos
+        Toma n muestras promediando 'm' grupos de 'dc' pasos. Los valores se
+        acumulan a medida que se miden (ver md_estadistica) y se devuelven
+        [promedio, error del promedio] de temperatura, energía y presión,
+        con el error del análisis de bloques de cada serie.
         '''
-        t, e, p = 0.0, 0.0, 0.0
-        temp = np.zeros(m, dtype=float)
-        energia = np.zeros(m, dtype=float)
-        presion = np.zeros(m, dtype=float)
+        acumuladores = {'temp': acumulador(), 'energia': acumulador(),
+                        'presion': acumulador()}
+        self._acumuladores = acumuladores
 
         for i in range(m):
             self.n_pasos(dc)
             t, e, p = self.llenar_vectores(subm, k)
-            temp[i] = np.mean(t)
-            energia[i] = np.mean(e)
-            presion[i] = np.mean(p)
+            acumuladores['temp'].agregar(t)
+            acumuladores['energia'].agregar(e)
+            acumuladores['presion'].agregar(p)
+            if self._h_adaptativo:
+                self.ajustar_h(e)
 
-        avg_temp = np.average(temp)
-        std_temp = np.std(temp)
-        avg_energia = np.average(energia)
-        std_energia = np.std(energia)
-        avg_presion = np.average(presion)
-        std_presion = np.std(presion)
+        return [[acumuladores[x].media, acumuladores[x].error()]
+                for x in ('temp', 'energia', 'presion')]
 
-        temp = [avg_temp, std_temp]
-        energia = [avg_energia, std_energia]
-        presion = [avg_presion, std_presion]
+    def tomar_muestra_hasta(self, precision=None, precision_p=None,
+                            max_pasos=1000000, subm=20, k=50, m_min=4):
+        '''
+        Muestrea por grupos de subm valores separados k pasos hasta que el
+        error de la energía media sea a lo sumo precision y el de la presión
+        media a lo sumo precision_p (las que se pidan), o hasta agotar
+        max_pasos. Los errores son los del análisis de bloques (ver
+        md_estadistica) y se miran a partir de m_min grupos. Devuelve
+        temperatura, energía y presión como tomar_muestra y si se alcanzaron
+        las precisiones pedidas (False si se agotaron los pasos).
+        '''
+        if precision is None and precision_p is None:
+            raise ValueError('Falta la precisión de la energía o la presión')
 
-        return temp, energia, presion
+        acumuladores = {'temp': acumulador(), 'energia': acumulador(),
+                        'presion': acumulador()}
+        self._acumuladores = acumuladores
+        objetivos = [(acumuladores['energia'], precision),
+                     (acumuladores['presion'], precision_p)]
+
+        realizados, grupos, alcanzado = 0, 0, False
+        while not alcanzado and realizados + subm * k <= max_pasos:
+            t, e, p = self.llenar_vectores(subm, k)
+            acumuladores['temp'].agregar(t)
+            acumuladores['energia'].agregar(e)
+            acumuladores['presion'].agregar(p)
+            if self._h_adaptativo:
+                self.ajustar_h(e)
+            realizados += subm * k
+            grupos += 1
+
+            if grupos >= m_min:
+                alcanzado = all(x is None or a.error() <= x
+                                for a, x in objetivos)
+
+        temp, energia, presion = [[acumuladores[x].media,
+                                   acumuladores[x].error()]
+                                  for x in ('temp', 'energia', 'presion')]
+        return temp, energia, presion, alcanzado
 
     def medir_temp(self, m=20, subm=20, dc=200, k=50):
         '''
         Mide la temperatura con un criterio identico a tomar_muestra
         '''
-        temp = np.zeros((m, subm), dtype=float)
+        temp = acumulador()
+        self._acumuladores = {'temp': temp}
+
+        for i in range(m):
+            self.n_pasos(dc)
+            ecin, epot, virial = self._muestrear(subm, k)
+            temp.agregar(2 * ecin.astype(float) / (3 * self._N))
+
+        return temp.media, temp.error()
+
+    def medir_densidad(self, m=20, subm=20, dc=200, k=50):
+        '''
+        Mide la densidad con el barostato activo, con un criterio idéntico a
+        medir_temp (m grupos de subm muestras separadas k pasos, con dc pasos
+        entre grupos). Devuelve el promedio y su error por análisis de bloques
+        '''
+        densidad = acumulador()
+        self._acumuladores = {'densidad': densidad}
+        muestras = np.zeros(subm, dtype=float)
+
         for i in range(m):
             self.n_pasos(dc)
             for j in range(subm):
                 self.n_pasos(k)
-                temp[i, j] = self.calc_temp()
+                muestras[j] = self._rho
+            densidad.agregar(muestras)
+
+        return densidad.media, densidad.error()
 
-        temp = np.average(temp, axis=1)
-        return temp.mean(), temp.std()
+    def reiniciar_gr(self, r_max=None, bins=None):
+        '''
+        Vacía el histograma de la distribución radial y fija su alcance
+        r_max (por defecto rc, a lo sumo L/2) y su cantidad de intervalos
+        (por defecto Q)
+        '''
+        if r_max is None:
+            r_max = self._rc
+        if bins is None:
+            bins = self._Q
+        if r_max > self._L / 2:
+            raise ValueError('r_max = %g supera L/2 = %g' %
+                             (r_max, self._L / 2))
+
+        self._r_max_gr = r_max
+        self._hist_gr = np.zeros(int(bins), dtype=np.float64)
+        self._p_hist_gr = self._hist_gr.ctypes.data_as(dbp)
+        self._norma_gr = 0.0
+
+        # Celdas de lado r_max: con r_max = rc sirven las de las fuerzas
+        self._M_gr = self._lib.celdas_por_lado(self._L, r_max)
+        if self._celdas and self._M_gr == self._M:
+            self._p_cabeza_gr = self._p_cabeza
+            self._p_lista_gr = self._p_lista
+        else:
+            self._cabeza_gr = np.zeros(max(self._M_gr, 1)**3,
+                                       dtype=C.c_int)
+            self._lista_gr = np.zeros(self._N, dtype=C.c_int)
+            self._p_cabeza_gr = self._cabeza_gr.ctypes.data_as(inp)
+            self._p_lista_gr = self._lista_gr.ctypes.data_as(inp)
 
-    def dist_radial(self, n=100, m=100):
+    def acumular_gr(self, vecinos=False):
+        '''
+        Suma la configuración actual al histograma de la distribución radial.
+        Con vecinos=True usa la lista de vecinos si la hay y r_max <= rc +
+        skin. Es barato (O(N) con celdas), para llamarlo cada pocos pasos.
+        Devuelve la cantidad de pares contados
         '''
-        Calcula la  funcion de distribucion radial promediando los resultados
-        n pasos totales, donde entre cada paso se realizan m pasos de Verlet
+        if self._hist_gr is None:
+            self.reiniciar_gr()
+        if self._r_max_gr > self._L / 2:
+            raise ValueError('r_max = %g supera L/2 = %g' %
+                             (self._r_max_gr, self._L / 2))
+
+        bins = self._hist_gr.size
+        if vecinos and self._vecinos and self._r_max_gr <= self._rv:
+            self.actualizar_vecinos()
+            pares = self._lib.histograma_radial_vecinos(
+                self._p_hist_gr, self._p_pos, self._N, self._L,
+                self._r_max_gr, bins, self._p_inicio, self._sis.vecinos)
+        else:
+            # Con barostato la caja cambia y con ella las celdas que entran
+            M = self._lib.celdas_por_lado(self._L, self._r_max_gr)
+            if M != self._M_gr:
+                r_max, hist, norma = self._r_max_gr, self._hist_gr, \
+                    self._norma_gr
+                self.reiniciar_gr(r_max, bins)
+                self._hist_gr[:] = hist
+                self._norma_gr = norma
+            pares = self._lib.histograma_radial(
+                self._p_hist_gr, self._p_pos, self._N, self._L,
+                self._r_max_gr, bins, self._M_gr, self._p_cabeza_gr,
+                self._p_lista_gr)
+
+        # Pares esperados por unidad de volumen para un gas ideal
+        self._norma_gr += 0.5 * (self._N - 1) * self._rho
+        return pares
+
+    def gr(self):
+        '''
+        Distribución radial normalizada con lo acumulado hasta ahora: el
+        centro de cada intervalo y g(r) (volumen exacto de cada cáscara)
+        '''
+        if self._hist_gr is None or self._norma_gr == 0:
+            raise ValueError('No hay configuraciones acumuladas '
+                             '(ver acumular_gr)')
+        bins = self._hist_gr.size
+        bordes = np.linspace(0, self._r_max_gr, bins + 1)
+        cascaras = 4 / 3 * np.pi * np.diff(bordes**3)
+        r = 0.5 * (bordes[1:] + bordes[:-1])
+        return r, self._hist_gr / (self._norma_gr * cascaras)
+
+    def dist_radial(self, n=100, m=100, vecinos=False, r_max=None,
+                    bins=None):
         '''
+        Calcula la funcion de distribucion radial promediando los resultados
+        de n configuraciones, donde entre cada una se realizan m pasos de
+        Verlet. r_max (por defecto rc) puede llegar hasta L/2. Con
+        vecinos=True usa la lista de vecinos (válido para r_max < rc + skin).
+        Devuelve los centros de los intervalos y g(r)
+        '''
+        self.reiniciar_gr(r_max, bins)
 
         for i in range(n):
-            CLIB.distrib_radial(self._p_distrad, self._p_pos, self._N, self._L,
-                                self._rho, self._Q)
+            self.acumular_gr(vecinos)
             self.n_pasos(m)
 
-        self._distrad = [i / (n * 0.5 * self._N) for i in self._distrad]
-        return self._distrad
+        return self.gr()
 
     def lindemann(self, m=10, subm=100, k=50, plot=False, ax=None):
         '''
@@ -394,40 +1362,49 @@ class md():
         N = self.N
         L = self.L
 
-        saltos = np.zeros(3 * N, dtype=float)
         lind_matriz = np.zeros((m, subm), dtype=float)
 
+        # Desplazamiento acumulado de cada coordenada y su media y suma de
+        # cuadrados de las desviaciones (Welford) sobre los instantes vistos
+        r = np.zeros(3 * N, dtype=float)
+        media = np.zeros(3 * N, dtype=float)
+        m2 = np.zeros(3 * N, dtype=float)
+        delta = np.zeros(3 * N, dtype=float)
+        # La diferencia entre posiciones con el tipo de las posiciones
+        dx = np.zeros(3 * N, dtype=self._real)
+
         for i in range(m):
-            pos_anterior = np.copy(self._pos)
-            r = np.zeros((subm + 1, 3 * N), dtype=float)
+            pos_anterior = self.en_orden(self._pos)
+            r[:] = 0
+            media[:] = 0
+            m2[:] = 0
 
             for j in range(subm):
+                # El desplazamiento hasta el instante j entra en las
+                # varianzas (las del instante j se calculan con r_0..r_j)
+                np.subtract(r, media, out=delta)
+                media += delta / (j + 1)
+                m2 += delta * (r - media)
+
                 # Da un paso
                 self.n_pasos(k)
 
-                # Calcula la diferencia con posición la anterior
-                dx = self._pos - pos_anterior
+                # Calcula la diferencia con posición la anterior (por
+                # identidad, las partículas pueden haberse reordenado)
+                pos_actual = self.en_orden(self._pos)
+                np.subtract(pos_actual, pos_anterior, out=dx)
 
-                # Detecta las diferencias mayores a L/2 (saltos por CC)
-                saltos = abs(dx) > (L / 2)
-
-                # Compensa las diferencias sumando o restando L
+                # Compensa las diferencias mayores a L/2 (saltos por CC)
+                saltos = np.abs(dx) > (L / 2)
                 dx[saltos] -= np.sign(dx[saltos]) * L
 
-                # Añade la una nueva fila al matriz de posiciones
-                r[j + 1] = r[j] + dx
-
-                # Calcula las varianzas de las posiciones
-                var_r = np.var(r[0:j + 1, :], axis=0)
-
-                # Calcula el coeficiente de Lindemann
-                lind = np.mean(var_r)**0.5
+                r += dx
 
-                # Actualiza la matriz de coeficientes
-                lind_matriz[i][j] = lind
+                # Coeficiente de Lindemann: raíz de la varianza media
+                lind_matriz[i][j] = (m2.sum() / ((j + 1) * 3 * N))**0.5
 
                 # Guarda la posición para el siguiente paso
-                pos_anterior = np.copy(self._pos)
+                pos_anterior = pos_actual
 
         lind_avg = np.average(lind_matriz, axis=0)
         lind_std = np.std(lind_matriz, axis=0)
@@ -457,44 +1434,123 @@ class md():
                   self.h,
                   self.T,
                   self.lut_precision,
-                  self.cant_pasos]
-
-        particulas = [self._pos,
-                      self._vel]
-
-        np.save(ruta + nombre, [params, particulas])
+                  self.cant_pasos,
+                  self.tabla,
+                  self.termostato,
+                  self.T_objetivo,
+                  self.tau,
+                  self.barostato,
+                  self.P_objetivo,
+                  self.tau_P,
+                  self._compresibilidad,
+                  self.respa,
+                  self.rc_interno,
+                  self.precision]
+
+        # Las partículas se guardan en el orden de sus identidades
+        particulas = [self.en_orden(self._pos),
+                      self.en_orden(self._vel)]
+
+        # Se arma elemento por elemento para que NumPy no intente
+        # combinar las listas en un único arreglo
+        estado = np.empty(3, dtype=object)
+        estado[0] = params
+        estado[1] = particulas
+        estado[2] = self._historia_h
+
+        np.save(ruta + nombre, estado, allow_pickle=True)
 
     @classmethod
-    def load(cls, nombre='temp.npy', ruta='../datos/'):
+    def load(cls, nombre='temp.npy', ruta='../datos/', **kwargs):
         '''
-        Recupera el estado de una simulación almacenada
+        Recupera el estado de una simulación almacenada. Los argumentos
+        extra se pasan al constructor (backend, celdas, h_adaptativo, ...)
+        y reemplazan a los guardados.
         '''
-        params, particulas = np.load(ruta + nombre)
-
-        N, rho, h, T, lut_precision, cant_pasos = params
-
-        md_load = cls(N, rho, h, T, lut_precision)
+        estado = np.load(ruta + nombre, allow_pickle=True)
+        params, particulas = estado[:2]
+
+        N, rho, h, T, lut_precision, cant_pasos = params[:6]
+        # Los estados anteriores no guardan la tabla ni el termostato
+        tabla = params[6] if len(params) > 6 else 'r'
+        termostato, T_objetivo, tau = params[7:10] if len(params) > 9 else \
+            ('nve', T, 0.1)
+        barostato, P, tau_P, compresibilidad = params[10:14] \
+            if len(params) > 13 else ('ninguno', None, 1.0, 1.0)
+        respa, rc_interno = params[14:16] if len(params) > 15 else (1, 1.6)
+        precision = params[16] if len(params) > 16 else 'simple'
+
+        config = dict(tabla=tabla, termostato=termostato, tau=tau,
+                      barostato=barostato, P=P, tau_P=tau_P,
+                      compresibilidad=compresibilidad, respa=respa,
+                      rc_interno=rc_interno, precision=precision)
+        config.update(kwargs)
+        md_load = cls(N, rho, h, T_objetivo, lut_precision, **config)
         md_load._cant_pasos = cant_pasos
+        # Los estados anteriores no guardan la historia de h
+        if len(estado) > 2:
+            md_load._historia_h = [tuple(x) for x in estado[2]]
+        else:
+            md_load._historia_h = [(0, h)]
 
-        md_load._pos = np.asarray(particulas[0], dtype=C.c_float)
-        md_load._vel = np.asarray(particulas[1], dtype=C.c_float)
+        md_load._pos = np.asarray(particulas[0], dtype=md_load._real)
+        md_load._vel = np.asarray(particulas[1], dtype=md_load._real)
 
-        md_load._p_pos = md_load._pos.ctypes.data_as(flp)
-        md_load._p_vel = md_load._vel.ctypes.data_as(flp)
+        md_load._p_pos = md_load._pos.ctypes.data_as(md_load._rlp)
+        md_load._p_vel = md_load._vel.ctypes.data_as(md_load._rlp)
+        md_load.enlazar()
 
-        md_load._p_exceso = CLIB.nueva_fza(md_load._p_pos, md_load._p_fza,
-                                           md_load._N, md_load._L,
-                                           md_load._rc, md_load._p_FZA_LUT,
-                                           md_load._g)
+        # Recalcula fuerza, presión y energía con las posiciones cargadas
+        md_load.calc_fza()
 
         return md_load
 
+    @classmethod
+    def desde_estados(cls, ruta, N, rho, T, relajacion=200, **kwargs):
+        '''
+        Arranque en caliente: entre los estados guardados en ruta con N
+        partículas toma el más cercano a (rho, T) (con distancias relativas
+        y la temperatura medida de las velocidades), lo lleva a la densidad
+        rho escalando la caja y las posiciones, reescala las velocidades a T
+        y lo relaja relajacion pasos. Los argumentos extra se pasan a load.
+        Devuelve None si no hay ningún estado con N partículas.
+        '''
+        if not os.path.isdir(ruta):
+            return None
+
+        mejor, distancia = None, np.inf
+        for nombre in os.listdir(ruta):
+            if not nombre.endswith('.npy'):
+                continue
+            try:
+                estado = np.load(os.path.join(ruta, nombre),
+                                 allow_pickle=True)
+                params, particulas = estado[:2]
+            except (OSError, ValueError):
+                continue
+            if params[0] != N:
+                continue
+            T_estado = np.var(np.asarray(particulas[1], dtype=float))
+            d = np.hypot((params[1] - rho) / rho, (T_estado - T) / T)
+            if d < distancia:
+                mejor, distancia = nombre, d
+
+        if mejor is None:
+            return None
+
+        mdsys = cls.load(mejor, ruta=os.path.join(ruta, ''), **kwargs)
+        mdsys.fijar_densidad(rho)
+        mdsys.rescaling(T, mdsys.T)
+        mdsys.T_objetivo = T
+        mdsys.n_pasos(relajacion)
+        return mdsys
+
     def animacion(self, frames=1000, n_pasos=2):
 
         pos = np.zeros((frames, 3 * self.N), dtype=float)
         for i in range(frames):
             self.n_pasos(n_pasos)
-            pos[i] = np.copy(self._pos)
+            pos[i] = self.en_orden(self._pos)
 
         fig = plt.figure()
         ax = p3.Axes3D(fig)
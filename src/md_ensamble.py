@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_ensamble.py
+
+'''
+Ensamble de R sistemas independientes y chicos (N = 64-125) que se
+evolucionan juntos con una única llamada al backend (evolucionar_lote). Con
+pocas partículas una instancia de md no alcanza para ocupar un núcleo y el
+costo de cada llamada domina; aquí cada hilo se ocupa de sistemas enteros.
+
+Cada réplica es una instancia de md con su densidad, temperatura y semilla,
+pero sus posiciones, velocidades y fuerzas son filas de vectores (R, 3N)
+contiguos del ensamble.
+'''
+
+import numpy as np
+import os
+
+from md_class import md
+from md_estadistica import acumulador
+
+
+class ensamble():
+
+    def __init__(self, N=64, rho=0.8442, T=2, semillas=None, hilos=None,
+                 **kwargs):
+        '''
+        rho, T y semillas pueden ser números o vectores de largo R (se
+        combinan como en NumPy). Sin semillas se toman de np.random. Los
+        argumentos extra se pasan a cada md (h, termostato, backend, ...).
+        hilos es la cantidad de hilos entre los que se reparten las réplicas
+        (por defecto de la variable MD_HILOS); cada réplica usa uno solo.
+        '''
+        if kwargs.get('skin') or kwargs.get('reordenar'):
+            raise ValueError('El ensamble no admite lista de vecinos ni '
+                             'reordenamiento')
+
+        if semillas is None:
+            R = np.broadcast(np.atleast_1d(rho), np.atleast_1d(T)).size
+            semillas = np.random.randint(0, 2**31, size=R)
+        rho, T, semillas = np.broadcast_arrays(np.atleast_1d(rho),
+                                               np.atleast_1d(T),
+                                               np.atleast_1d(semillas))
+        R = rho.size
+
+        if hilos is None:
+            hilos = int(os.environ.get('MD_HILOS', 1))
+        self._hilos = max(hilos, 1)
+        self._N = N
+        self._R = R
+
+        self._replicas = []
+        for r in range(R):
+            np.random.seed(int(semillas[r]))
+            self._replicas.append(md(N=N, rho=rho[r], T=T[r], hilos=1,
+                                     **kwargs))
+        self._semillas = semillas.copy()
+
+        primera = self._replicas[0]
+        self._lib = primera._lib
+        self._acum = primera._acum
+        self._acp = primera._acp
+
+        # Vectores (R, 3N) contiguos: cada réplica trabaja sobre su fila
+        self._pos = np.zeros((R, 3 * N), dtype=primera._real)
+        self._vel = np.zeros((R, 3 * N), dtype=primera._real)
+        self._fza = np.zeros((R, 3 * N), dtype=self._acum)
+        for r, mdsys in enumerate(self._replicas):
+            self._pos[r] = mdsys._pos
+            self._vel[r] = mdsys._vel
+            self._fza[r] = mdsys._fza
+            mdsys._pos = self._pos[r]
+            mdsys._vel = self._vel[r]
+            mdsys._fza = self._fza[r]
+            mdsys._p_pos = mdsys._pos.ctypes.data_as(mdsys._rlp)
+            mdsys._p_vel = mdsys._vel.ctypes.data_as(mdsys._rlp)
+            mdsys.enlazar()
+
+        # Vector de punteros a los estados compartidos con C
+        sisp = type(primera._p_sis)
+        self._p_sis = (sisp * R)(*[mdsys._p_sis for mdsys in
+                                   self._replicas])
+
+    @classmethod
+    def grilla(cls, N, rhos, temps, **kwargs):
+        '''
+        Una réplica por cada punto (rho, T) de la grilla de md_map.py,
+        ordenadas con rho como índice lento
+        '''
+        rho, T = np.meshgrid(rhos, temps, indexing='ij')
+        return cls(N=N, rho=rho.ravel(), T=T.ravel(), **kwargs)
+
+    @property
+    def R(self):
+        return self._R
+
+    @property
+    def N(self):
+        return self._N
+
+    @property
+    def replicas(self):
+        return self._replicas
+
+    @property
+    def semillas(self):
+        return self._semillas
+
+    @property
+    def hilos(self):
+        return self._hilos
+
+    @property
+    def rho(self):
+        return np.array([mdsys.rho for mdsys in self._replicas])
+
+    @property
+    def L(self):
+        return np.array([mdsys.L for mdsys in self._replicas])
+
+    @property
+    def T_objetivo(self):
+        return np.array([mdsys.T_objetivo for mdsys in self._replicas])
+
+    @property
+    def pos(self):
+        return self._pos
+
+    @property
+    def vel(self):
+        return self._vel
+
+    def evolucionar(self, pasos, k=0):
+        '''
+        Realiza pasos de Verlet en todas las réplicas con una única llamada.
+        Con k > 0 devuelve la energía cinética, potencial y el virial de cada
+        réplica cada k pasos, en vectores (R, pasos // k)
+        '''
+        largo = pasos // k if k > 0 else 0
+        ecin = np.zeros((self._R, largo), dtype=self._acum)
+        epot = np.zeros((self._R, largo), dtype=self._acum)
+        virial = np.zeros((self._R, largo), dtype=self._acum)
+
+        p_ecin, p_epot, p_virial = None, None, None
+        if largo > 0:
+            p_ecin = ecin.ctypes.data_as(self._acp)
+            p_epot = epot.ctypes.data_as(self._acp)
+            p_virial = virial.ctypes.data_as(self._acp)
+
+        self._lib.evolucionar_lote(self._p_sis, self._R, pasos, k, p_ecin,
+                                   p_epot, p_virial, self._hilos)
+
+        for mdsys in self._replicas:
+            mdsys.actualizar_caja()
+            mdsys._cant_pasos += pasos
+            if pasos > 0:
+                mdsys.leer_resultados()
+
+        return ecin, epot, virial
+
+    def n_pasos(self, n=5000):
+        '''
+        Realiza sucesivos pasos sin almacenar información
+        '''
+        self.evolucionar(n)
+
+    def llenar_vectores(self, subm, k=10):
+        '''
+        Temperatura, energía y presión de cada réplica en subm instantes
+        separados k pasos, en vectores (R, subm)
+        '''
+        ecin, epot, virial = self.evolucionar(subm * k, k)
+
+        temp = 2 * ecin.astype(float) / (3 * self._N)
+        energia = ecin.astype(float) + epot
+        presion = virial.astype(float) / 3
+
+        return temp, energia, presion
+
+    def tomar_muestra(self, m=20, subm=20, dc=200, k=50):
+        '''
+        Como md.tomar_muestra para todas las réplicas a la vez. Devuelve
+        temperatura, energía y presión como [promedios, errores], cada uno un
+        vector de largo R, con el error del análisis de bloques de la serie
+        de cada réplica
+        '''
+        acumuladores = [[acumulador() for r in range(self._R)]
+                        for x in range(3)]
+
+        for i in range(m):
+            self.n_pasos(dc)
+            for acums, serie in zip(acumuladores,
+                                    self.llenar_vectores(subm, k)):
+                for acum, x in zip(acums, serie):
+                    acum.agregar(x)
+
+        return [[np.array([acum.media for acum in acums]),
+                 np.array([acum.error() for acum in acums])]
+                for acums in acumuladores]
+
+    def calc_temp(self):
+        '''
+        Temperatura instantánea de cada réplica
+        '''
+        return np.var(self._vel, axis=1)
+
+    def rescaling(self, T_deseada, T_actual=None):
+        '''
+        Reescala las velocidades de cada réplica a T_deseada (número o
+        vector de largo R). Sin T_actual usa la temperatura instantánea
+        '''
+        if T_actual is None:
+            T_actual = self.calc_temp()
+        factor = (np.asarray(T_deseada) / T_actual)**0.5
+        self._vel *= np.broadcast_to(factor, self._R)[:, None]
+
+    def fijar_temperatura(self, T):
+        '''
+        Reescala las velocidades a T y la fija como temperatura de los
+        termostatos
+        '''
+        T = np.broadcast_to(np.asarray(T, dtype=float), self._R)
+        self.rescaling(T)
+        for mdsys, T_r in zip(self._replicas, T):
+            mdsys.T_objetivo = T_r
+
+    def save(self, nombres, ruta='../datos/'):
+        '''
+        Almacena el estado de cada réplica (ver md.save) con los R nombres
+        recibidos
+        '''
+        for mdsys, nombre in zip(self._replicas, nombres):
+            mdsys.save(nombre=nombre, ruta=ruta)
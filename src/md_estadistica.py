@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_estadistica.py
+
+'''
+Acumuladores para promediar observables sin guardar la serie completa:
+media y varianza en línea (Welford) y el análisis de bloques de Flyvbjerg y
+Petersen (J. Chem. Phys. 91, 461 (1989)) hecho a medida que llegan los
+datos, que da el error de la media de una serie correlacionada. Además, el
+tiempo integrado de autocorrelación de una serie corta calculado con FFT,
+para elegir cada cuántos pasos muestrear.
+'''
+
+import numpy as np
+
+# Mínima cantidad de bloques de un nivel para usar su error (con menos el
+# error del error es demasiado grande)
+BLOQUES_MIN = 8
+
+# La ventana de la suma de la autocorrelación es el primer M con M >= c tau
+# (Sokal, Monte Carlo Methods in Statistical Mechanics (1997))
+VENTANA_SOKAL = 5
+
+
+def autocorrelacion(x):
+    '''
+    Autocorrelación normalizada de la serie x para todos los retardos,
+    calculada con FFT en O(n log n). Se rellena con ceros hasta el doble del
+    largo para que la correlación no sea circular.
+    '''
+    x = np.asarray(x, dtype=float)
+    n = x.size
+    dx = x - x.mean()
+    largo = 2**int(np.ceil(np.log2(max(2 * n, 2))))
+
+    f = np.fft.rfft(dx, largo)
+    c = np.fft.irfft(f * np.conj(f), largo)[:n]
+    if n == 0 or c[0] <= 0:
+        return np.ones(min(n, 1))
+    return c / c[0]
+
+
+def tiempo_integrado(x, c=VENTANA_SOKAL):
+    '''
+    Tiempo integrado de autocorrelación tau = 1 + 2 sum_t C(t) de la serie x,
+    en unidades de su espaciado, sumando hasta el primer M con M >= c tau(M).
+    Es la ineficiencia estadística: cada tau valores equivalen a uno
+    independiente. Si la serie es más corta que c tau devuelve el tau de la
+    serie completa, que lo subestima.
+    '''
+    C = autocorrelacion(x)
+    if C.size < 2:
+        return 1.0
+
+    tau = 2 * np.cumsum(C) - 1
+    ventana = np.arange(C.size) >= c * tau
+    M = np.argmax(ventana) if ventana.any() else C.size - 1
+    return max(tau[M], 1.0)
+
+
+class acumulador():
+    '''
+    El nivel l guarda cantidad, media y suma de cuadrados de las desviaciones
+    de los promedios de 2^l valores consecutivos, y el valor que espera su
+    pareja para pasar al nivel siguiente. El nivel 0 es la serie misma. La
+    memoria crece como log2 de la cantidad de valores.
+    '''
+
+    def __init__(self):
+        self._n = []
+        self._media = []
+        self._m2 = []
+        self._pendiente = []
+
+    def agregar(self, x):
+        '''
+        Agrega un valor o un vector de valores consecutivos de la serie
+        '''
+        x = np.asarray(x, dtype=float).ravel()
+        nivel = 0
+        while x.size > 0:
+            if nivel == len(self._n):
+                self._n.append(0)
+                self._media.append(0.0)
+                self._m2.append(0.0)
+                self._pendiente.append(None)
+
+            # Welford por lotes: combina lo acumulado con la media y la suma
+            # de cuadrados del lote (Chan, Golub y LeVeque)
+            n_a, n_b = self._n[nivel], x.size
+            media_b = x.mean()
+            delta = media_b - self._media[nivel]
+            n = n_a + n_b
+            self._media[nivel] += delta * n_b / n
+            self._m2[nivel] += np.sum((x - media_b)**2) + \
+                delta**2 * n_a * n_b / n
+            self._n[nivel] = n
+
+            # Promedios de a pares (con el que esperaba del lote anterior)
+            # para el nivel siguiente
+            if self._pendiente[nivel] is not None:
+                x = np.concatenate(([self._pendiente[nivel]], x))
+            if x.size % 2:
+                self._pendiente[nivel] = x[-1]
+                x = x[:-1]
+            else:
+                self._pendiente[nivel] = None
+            x = 0.5 * (x[0::2] + x[1::2])
+            nivel += 1
+
+    @property
+    def n(self):
+        return self._n[0] if self._n else 0
+
+    @property
+    def media(self):
+        return self._media[0] if self._n else np.nan
+
+    @property
+    def varianza(self):
+        '''
+        Varianza muestral de la serie
+        '''
+        if self.n < 2:
+            return 0.0
+        return self._m2[0] / (self.n - 1)
+
+    @property
+    def desviacion(self):
+        return self.varianza**0.5
+
+    def errores(self, minimo=BLOQUES_MIN):
+        '''
+        Error de la media estimado en cada nivel con al menos minimo bloques,
+        como vectores (error, error del error)
+        '''
+        error, d_error = [], []
+        for n, m2 in zip(self._n, self._m2):
+            if n < max(minimo, 2):
+                break
+            e = (m2 / (n * (n - 1)))**0.5
+            error.append(e)
+            d_error.append(e / (2 * (n - 1))**0.5)
+        return np.array(error), np.array(d_error)
+
+    def error(self, minimo=BLOQUES_MIN):
+        '''
+        Error de la media teniendo en cuenta las correlaciones: el del primer
+        nivel a partir del cual deja de crecer (dentro de su incerteza). Si
+        no llega a estabilizarse devuelve el mayor, que aun así lo subestima.
+        Con menos de minimo valores usa el nivel 0.
+        '''
+        if self.n < 2:
+            return 0.0
+        error, d_error = self.errores(min(minimo, self.n))
+        for i in range(error.size - 1):
+            if error[i + 1] <= error[i] + d_error[i]:
+                return error[i]
+        return error.max()
+
+    def ineficiencia(self, minimo=BLOQUES_MIN):
+        '''
+        Ineficiencia estadística: cuántos valores de la serie equivalen a
+        uno independiente
+        '''
+        if self.n < 2 or self.varianza == 0:
+            return 1.0
+        return max(self.n * self.error(minimo)**2 / self.varianza, 1.0)
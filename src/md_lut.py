@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_lut.py
+
+from md_class import md
+from md_numpy import fza_pares, fuerza_suave, lennardjones_suave
+import argparse
+import ctypes as C
+import time
+import numpy as np
+
+######################
+# PARÁMETROS EXTERNOS
+######################
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-N', type=int, default=2048)
+parser.add_argument('-rho', type=float, default=0.8442)
+parser.add_argument('-T', type=float, default=0.728)
+parser.add_argument('-term', type=int, default=500)
+parser.add_argument('-repeticiones', type=int, default=20)
+parser.add_argument('-r', type=int, nargs='+', default=[1000, 10000])
+parser.add_argument('-r2', type=int, nargs='+', default=[10, 100, 1000])
+parser.add_argument('-backend', type=str, default=None)
+
+params = parser.parse_args()
+
+N = params.N
+rho = params.rho
+T = params.T
+term = params.term
+repeticiones = params.repeticiones
+backend = params.backend
+
+tablas = [('r', g) for g in params.r] + [('r2', g) for g in params.r2]
+
+
+############
+# FUNCIONES
+############
+
+def referencia(pos, L, rc):
+    '''
+    Fuerza y presión para las posiciones dadas con el potencial que guardan
+    ambas tablas (truncado, con el shift y el spline antes de rc, ver
+    lennardjones_suave) evaluado de forma analítica en double. El modo exacto
+    usa el potencial truncado sin suavizar y no sirve para compararlas.
+    '''
+    x = pos.astype(float)
+    fza = np.zeros_like(x)
+    dbp = C.POINTER(C.c_double)
+    p_exceso, _ = fza_pares(x.ctypes.data_as(dbp), fza.ctypes.data_as(dbp),
+                            N, L, rc, lambda r: fuerza_suave(r, rc),
+                            lambda r: lennardjones_suave(r, rc))
+    return fza, p_exceso / 3
+
+
+def medir(tabla, g, pos, fza_exacta, presion_exacta):
+    '''
+    Compara la fuerza y la presión de la tabla con las de referencia para
+    las posiciones dadas. Devuelve el error relativo de ambas, el largo de la
+    tabla y el tiempo por cálculo de la fuerza (en ms).
+    '''
+    mdsys = md(N=N, rho=rho, T=T, lut_precision=g, tabla=tabla,
+               celdas=True, backend=backend)
+    mdsys._pos[:] = pos
+
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        mdsys.calc_fza()
+    t_fza = (time.perf_counter() - inicio) / repeticiones * 1e3
+
+    error_fza = np.linalg.norm(mdsys._fza - fza_exacta) / \
+        np.linalg.norm(fza_exacta)
+    error_presion = abs(mdsys.calc_presion() / presion_exacta - 1)
+
+    return error_fza, error_presion, mdsys._long_lut, t_fza
+
+
+#####################
+# PROGRAMA PRINCIPAL
+#####################
+
+# Configuración de líquido con la que se comparan todas las tablas
+np.random.seed(0)
+mdsys = md(N=N, rho=rho, T=T, celdas=True, backend=backend)
+mdsys.n_pasos(term)
+pos = np.copy(mdsys._pos)
+fza_exacta, presion_exacta = referencia(pos, mdsys.L, mdsys.rc)
+
+print('N: %d, rho: %6.3f, T: %6.3f, backend: %s\n' %
+      (N, rho, T, mdsys.backend))
+print('%-6s %8s %10s %8s %12s %12s %10s' %
+      ('Tabla', 'g', 'Elementos', 'KB', 'Error fza', 'Error pres',
+       'ms/fza'))
+
+for tabla, g in tablas:
+    error_fza, error_presion, largo, t_fza = medir(tabla, g, pos, fza_exacta,
+                                                   presion_exacta)
+    # dos tablas (fuerza y potencial) de floats
+    kb = 2 * 4 * largo / 1024
+    print('%-6s %8d %10d %8.1f %12.2e %12.2e %10.3f' %
+          (tabla, g, largo, kb, error_fza, error_presion, t_fza))
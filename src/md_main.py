@@ -69,7 +69,7 @@ def doc():
     print('    list_md()')
     print('    load_md(index=-1)\n')
     print('    mdsys.ver_pos(plot_vel=False, size=30)')
-    print('    mdsys.dist_radial(n=100, m=100)')
+    print('    r, g = mdsys.dist_radial(n=100, m=100, r_max=None)')
     print('    mdsys.lindemann(m=10, subm=100, k=50, plot=False, ax=None)')
     print('    mdsys.ver_pos(plot_vel=False, size=30)')
     print('    mdsys.animacion(frames=1000, n_pasos=2)')
@@ -93,6 +93,13 @@ parser.add_argument('-subm', type=int, default=30)
 parser.add_argument('-dc', type=int, default=150)
 parser.add_argument('-k', type=int, default=50)
 parser.add_argument('-actual', type=int, default=0)
+parser.add_argument('-termostato', type=str, default=None)
+parser.add_argument('-tau', type=float, default=0.1)
+parser.add_argument('-equilibrio', action='store_true')
+parser.add_argument('-adaptativo', action='store_true')
+parser.add_argument('-precision', type=float, default=None)
+parser.add_argument('-precision_p', type=float, default=None)
+parser.add_argument('-max_pasos', type=int, default=None)
 parser.add_argument('-plot', action='store_true')
 
 args_params = parser.parse_args()
@@ -108,8 +115,25 @@ term = args_params.term
 m = args_params.m
 subm = args_params.subm
 dc = args_params.dc
-k = args_params.dc
+k = args_params.k
 actual = args_params.actual
+termostato = args_params.termostato
+tau = args_params.tau
+# Con -equilibrio pterm y term son máximos: la termalización termina cuando
+# energía y presión son estacionarias (ver md.termalizar)
+equilibrio = args_params.equilibrio
+# Con -adaptativo la escalera de temperaturas se arma sobre la marcha (ver
+# siguiente_temperatura): mismos extremos y como mucho 'pasos' puntos
+adaptativo = args_params.adaptativo
+# Con -precision m, subm, dc y k se eligen en cada temperatura a partir del
+# tiempo de correlación de energía y presión (ver md.planear_muestreo) para
+# alcanzar esa precisión en la energía (y -precision_p en la presión)
+precision = args_params.precision
+precision_p = args_params.precision_p
+# Con -max_pasos (y -precision o -precision_p) en cambio se muestrea hasta
+# alcanzar la precisión pedida, con a lo sumo max_pasos pasos por temperatura
+# (ver md.tomar_muestra_hasta)
+max_pasos = args_params.max_pasos
 
 
 str_n = '%03d' % N
@@ -131,6 +155,10 @@ mds = []
 
 array_pasos = np.arange(pasos)
 temp = array_pasos * dT + T
+if adaptativo:
+    # las temperaturas que todavía no se eligieron quedan en nan
+    temp = np.full(pasos, np.nan)
+    temp[0] = T
 temp_real = np.zeros(pasos, dtype=float)
 energia = np.zeros(pasos, dtype=float)
 presion = np.zeros(pasos, dtype=float)
@@ -143,7 +171,7 @@ ld_std = np.zeros(pasos, dtype=float)
 ld_array_avg = np.zeros(100, dtype=float)
 ld_array_std = np.zeros(100, dtype=float)
 
-mdsys = md(N=N, T=T, rho=rho)
+mdsys = md(N=N, T=T, rho=rho, termostato=termostato, tau=tau)
 int_params = [N, pasos, pterm, term, m, subm, dc, k, actual]
 float_params = [rho, T, dT]
 mds = []
@@ -158,7 +186,7 @@ if os.path.isfile(nombre_cfg) and os.path.isfile(nombre_mds):
         rta = input('[C]argar, [R]eemplazar, [S]alir: ').upper()
 
     if rta == 'C':
-        int_params, float_params = np.load(nombre_cfg)
+        int_params, float_params = np.load(nombre_cfg, allow_pickle=True)
         N, pasos, pterm, term, m, subm, dc, k, actual = int_params
         rho, T, dT = float_params
 
@@ -178,6 +206,9 @@ if os.path.isfile(nombre_cfg) and os.path.isfile(nombre_mds):
         mds = np.load(nombre_mds).tolist()
         mdsys = md.load(mds[-1])
 
+        # Una escalera adaptativa se continúa como tal
+        adaptativo = adaptativo or bool(np.isnan(temp).any())
+
         print('Simulación cargada.')
 
         doc()
@@ -188,7 +219,8 @@ if os.path.isfile(nombre_cfg) and os.path.isfile(nombre_mds):
         while rta2 not in ('SI', 'NO', 'S', 'N'):
             rta2 = input(msj).upper()
         if rta2 in ('SI', 'S'):
-            np.save(nombre_cfg, [int_params, float_params])
+            np.save(nombre_cfg,
+                    np.array([int_params, float_params], dtype=object))
             np.save(nombre_lds, lds)
             np.save(nombre_mds, mds)
         else:
@@ -206,26 +238,99 @@ if os.path.isfile(nombre_cfg) and os.path.isfile(nombre_mds):
 ############
 
 
+def termalizar(n, mensaje=''):
+    if not equilibrio:
+        mdsys.n_pasos(n)
+        return
+
+    descartados, realizados = mdsys.termalizar(max_pasos=n)
+    print(mensaje + 'Termalizado en %d pasos (%d descartados)' %
+          (realizados, descartados))
+
+
 def corregir(T, mensaje=''):
+    # Con termostato la temperatura se alcanza y se mantiene en el integrador
+    if mdsys.termostato != 'nve':
+        mdsys.T_objetivo = T
+        termalizar(term, mensaje)
+        print(mensaje + 'Termostato %s en T: %6.3f' % (mdsys.termostato, T))
+        return
+
+    # t_std es el error de la temperatura media (ver md.medir_temp)
     t_avg, t_std = mdsys.medir_temp(m=m, subm=subm, dc=dc)
 
-    while (t_avg + t_std / 2 < T or T < t_avg - t_std / 2):
-        str_t = '%06.3f +/-%-06.3f' % (t_avg, t_std / 2)
+    while (t_avg + t_std < T or T < t_avg - t_std):
+        str_t = '%06.3f +/-%-06.3f' % (t_avg, t_std)
         str_dif = 'Ta: ' + str_t + 'Td: %-6.3f' % T
         print(mensaje + 'Corrigiendo', str_dif)
         mdsys.rescaling(T_deseada=T, T_actual=t_avg)
-        mdsys.n_pasos(term)
+        termalizar(term, mensaje)
         t_avg, t_std = mdsys.medir_temp(m=m, subm=subm, dc=dc)
-    str_t = '%06.3f +/-%-06.3f' % (t_avg, t_std / 2)
+    str_t = '%06.3f +/-%-06.3f' % (t_avg, t_std)
     print(mensaje + 'Temp. estabilizada en ' + str_t)
 
 
+def siguiente_temperatura(paso):
+    '''
+    Elige la temperatura del punto paso + 1 de la escalera adaptativa. El
+    cambio de energía, presión y Lindemann por unidad de temperatura en el
+    último tramo se compara con su mediana en los anteriores: donde los
+    observables cambian más rápido que lo típico se achica dT y donde
+    cambian más lento se agranda (como mucho un factor 2 por punto y entre
+    |dT|/4 y 4|dT|), partiendo de 2|dT| en los tramos típicos para que
+    sobren puntos donde refinar. Con los puntos que quedan siempre se llega
+    a la temperatura final de la escalera fija. Devuelve nan si ya se llegó.
+    '''
+    T_final = T + (pasos - 1) * dT
+    restante = T_final - temp[paso]
+    if abs(restante) < 1e-9 * abs(dT):
+        return np.nan
+
+    paso_T = abs(dT)
+    if paso >= 2:
+        dT_previo = abs(temp[paso] - temp[paso - 1])
+        tramos = np.abs(np.diff(temp[:paso + 1]))
+        relativos = []
+        for x in (energia, presion, ld_avg):
+            pendientes = np.abs(np.diff(x[:paso + 1])) / tramos
+            tipica = np.median(pendientes[:-1])
+            if tipica > 0:
+                relativos.append(pendientes[-1] / tipica)
+        if relativos:
+            paso_T = 2 * abs(dT) / max(max(relativos), 1e-3)
+        paso_T = np.clip(paso_T, dT_previo / 2, dT_previo * 2)
+    paso_T = np.clip(paso_T, abs(dT) / 4, abs(dT) * 4)
+
+    # Presupuesto: con los puntos que quedan (a lo sumo 4|dT| cada uno)
+    # todavía hay que poder llegar a T_final
+    quedan = pasos - 1 - paso
+    minimo = abs(restante) - (quedan - 1) * 4 * abs(dT)
+    paso_T = min(max(paso_T, minimo), abs(restante))
+
+    return temp[paso] + np.sign(restante) * paso_T
+
+
 def siguiente_paso(paso):
     actual = paso
     str_actual = "%3d/%3d - " % (paso + 1, pasos)
 
     print('\n' + str_actual + 'Tomando muestra')
-    t_m, e_m, p_m = mdsys.tomar_muestra(m=m, subm=subm, dc=dc, k=k)
+    muestreo = dict(m=m, subm=subm, dc=dc, k=k)
+    if max_pasos is not None:
+        t_m, e_m, p_m, alcanzado = mdsys.tomar_muestra_hasta(
+            precision, precision_p, max_pasos, subm=subm, k=k)
+        usados = mdsys.acumuladores['energia'].n * k
+        if alcanzado:
+            print(str_actual + 'Precisión alcanzada en %d pasos' % usados)
+        else:
+            print(str_actual + 'Precisión no alcanzada en %d pasos' % usados)
+    else:
+        if precision is not None:
+            muestreo = mdsys.planear_muestreo(precision, precision_p,
+                                              subm=subm)
+            print(str_actual + 'Muestreo: m=%(m)d, subm=%(subm)d, k=%(k)d' %
+                  muestreo)
+        t_m, e_m, p_m = mdsys.tomar_muestra(**muestreo)
 
     print(str_actual + 'Calculando Lindemann')
     ld_m = mdsys.lindemann(m=10, subm=100, k=50)
@@ -240,10 +345,16 @@ def siguiente_paso(paso):
     ld_avg[paso] = ld_m[0][-1]
     ld_std[paso] = ld_m[1][-1]
 
-    if paso + 1 < pasos:
+    if adaptativo and paso + 1 < pasos:
+        temp[paso + 1] = siguiente_temperatura(paso)
+        if not np.isnan(temp[paso + 1]):
+            print(str_actual + 'Próxima temperatura: %6.3f' % temp[paso + 1])
+
+    if paso + 1 < pasos and not np.isnan(temp[paso + 1]):
         print(str_actual + 'Rescaleando y verificando')
-        mdsys.rescaling(T_deseada=temp[paso + 1], T_actual=t_m[0])
-        mdsys.n_pasos(term)
+        if mdsys.termostato == 'nve':
+            mdsys.rescaling(T_deseada=temp[paso + 1], T_actual=t_m[0])
+            termalizar(term, str_actual)
 
         corregir(temp[paso + 1], mensaje=str_actual)
 
@@ -257,13 +368,16 @@ def siguiente_paso(paso):
     nombre_ld = 'n' + str_n + '_r_' + str_rho + '_t_' + str_temp + '_ld.npy'
 
     int_params[-1] = actual + 1
+    # La escalera adaptativa puede terminar antes de usar todos los puntos
+    if paso + 1 < pasos and np.isnan(temp[paso + 1]):
+        int_params[-1] = pasos
     mds.append(ruta + 'mds/' + nombre_md)
     lds.append(ruta + 'lds/' + nombre_ld)
 
     mdsys.save(nombre=nombre_md, ruta=ruta + 'mds/')
     np.save(lds[-1], lindemann)
 
-    np.save(nombre_cfg, [int_params, float_params])
+    np.save(nombre_cfg, np.array([int_params, float_params], dtype=object))
     np.save(nombre_datos, datos)
     np.save(nombre_lds, lds)
     np.save(nombre_mds, mds)
@@ -390,12 +504,14 @@ if 0 < actual < pasos:
 
 if actual < pasos and continuar:
     print('\nPreparando la configuración')
-    mdsys.n_pasos(pterm)
+    termalizar(pterm)
     corregir(T)
 
     print('')
 
     for i in range(actual, pasos):
+        if np.isnan(temp[i]):
+            break
         siguiente_paso(i)
 
     print('Simulación finalizada\n')
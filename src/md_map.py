@@ -3,6 +3,7 @@
 # file: md_map.py
 
 from md_class import md
+from md_ensamble import ensamble
 import os
 import time
 import numpy as np
@@ -25,6 +26,16 @@ parser.add_argument('-preterm', type=int, default=500)
 parser.add_argument('-term', type=int, default=50)
 parser.add_argument('-m', type=int, default=200)
 parser.add_argument('-dc', type=int, default=50)
+parser.add_argument('-paso', type=float, default=0.001)
+parser.add_argument('-h_adaptativo', action='store_true')
+parser.add_argument('-h_min', type=float, default=None)
+parser.add_argument('-h_max', type=float, default=None)
+parser.add_argument('-equilibrio', action='store_true')
+parser.add_argument('-tibio', action='store_true')
+parser.add_argument('-lote', action='store_true')
+parser.add_argument('-precision', type=float, default=None)
+parser.add_argument('-precision_p', type=float, default=None)
+parser.add_argument('-max_pasos', type=int, default=None)
 parser.add_argument('-plot', action='store_true')
 
 params = parser.parse_args()
@@ -50,10 +61,34 @@ assert rho_stop < 1.5
 
 term = params.term
 preterm = params.preterm
+# Con -equilibrio term y preterm son máximos: la termalización termina cuando
+# energía y presión son estacionarias (ver md.termalizar)
+equilibrio = params.equilibrio
+# Con -tibio cada fila de densidad parte del estado guardado más cercano en
+# (rho, T), llevado a la nueva densidad, en lugar de una red cúbica
+tibio = params.tibio
+# Con -lote todas las densidades de la etapa se evolucionan juntas, una
+# réplica por densidad con una única llamada al backend (ver md_ensamble)
+lote = params.lote
+# Con -precision cada punto elige m, subm, dc y k según el tiempo de
+# correlación de energía y presión (ver md.planear_muestreo)
+precision = params.precision
+# Con -max_pasos se muestrea hasta alcanzar la precisión, con a lo sumo
+# max_pasos pasos por punto (ver md.tomar_muestra_hasta). Los puntos que no
+# la alcanzan quedan en no_alcanzados_<etapa>_<n_etapas>.npy
+max_pasos = params.max_pasos
+if lote and (equilibrio or tibio or params.h_adaptativo or precision or
+             max_pasos):
+    parser.error('-lote no admite -equilibrio, -tibio, -h_adaptativo, '
+                 '-precision ni -max_pasos')
 
 m = params.m
 dc = params.dc
 
+# Paso temporal inicial y controlador opcional entre bloques de muestreo
+h = params.paso
+h_adaptativo = params.h_adaptativo
+
 n_rhos = int(abs((rho_start - rho_stop) / rho_step)) + 1
 n_temps = int(abs((T_start - T_stop) / T_step)) + 1
 
@@ -74,6 +109,13 @@ with open(path + 'params.txt', 'w') as f:
     f.write('preterm:  %6d\n' % preterm)
     f.write('m:        %6d\n' % m)
     f.write('dc:       %6d\n' % dc)
+    f.write('h:        %6.4f\n' % h)
+    f.write('h_adapt.: %6s\n' % h_adaptativo)
+    f.write('equilib.: %6s\n' % equilibrio)
+    f.write('tibio:    %6s\n' % tibio)
+    f.write('lote:     %6s\n' % lote)
+    f.write('precis.:  %6s\n' % precision)
+    f.write('max_pasos:%6s\n' % max_pasos)
 
 # DIVISIÓN DEL TRABAJO PARA PROCESOS SIMULTÁNEOS
 
@@ -95,71 +137,146 @@ n_rhos = len(rhos)
 
 np.save(path + 'rhos_%d_%d' % (etapa, n_etapas), rhos)
 
+
+def termalizar(n):
+    if equilibrio:
+        mdsys.termalizar(max_pasos=n)
+    else:
+        mdsys.n_pasos(n)
+
+
+def guardar_promedios():
+    np.save(path + 'avg_energia_%d_%d' % (etapa, n_etapas), avg_energia)
+    np.save(path + 'std_energia_%d_%d' % (etapa, n_etapas), std_energia)
+    np.save(path + 'avg_presion_%d_%d' % (etapa, n_etapas), avg_presion)
+    np.save(path + 'std_presion_%d_%d' % (etapa, n_etapas), std_presion)
+
+
+def barrido_lote():
+    '''
+    Enfría todas las densidades de la etapa a la par: cada temperatura se
+    termaliza y se muestrea en todas las réplicas con las mismas llamadas
+    '''
+    ens = ensamble(N=N, rho=rhos, T=T_start, h=h)
+
+    for j, T in enumerate(temps):
+
+        elapsed = time.gmtime(time.time() - time_start)
+        str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
+        str_progreso = ' - T: %3d/%-3d (%6.3f) - ' % (j + 1, n_temps, T)
+        print('\r' + str_elapsed + str_progreso + '%-35s' % 'Muestreando',
+              end='')
+
+        if j > 0:
+            ens.rescaling(T)
+            ens.n_pasos(preterm)
+        else:
+            ens.n_pasos(term)
+
+        t, e, p = ens.tomar_muestra(m, dc)
+
+        avg_energia[:, j] = e[0]
+        std_energia[:, j] = e[1]
+        avg_presion[:, j] = p[0]
+        std_presion[:, j] = p[1]
+
+        nombres = ['md_' + str(N) + '_r_%5.3f' % rho + '_T_%5.3f' % T +
+                   '.npy' for rho in rhos]
+        ens.save(nombres, ruta=path + '/estados/')
+        guardar_promedios()
+
+        elapsed = time.gmtime(time.time() - time_start)
+        str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
+        print('\r' + str_elapsed + str_progreso + '%-35s' % 'Listo.')
+
+
 avg_energia = np.zeros((n_rhos, n_temps), dtype=float)
 avg_presion = np.zeros((n_rhos, n_temps), dtype=float)
 std_energia = np.zeros((n_rhos, n_temps), dtype=float)
 std_presion = np.zeros((n_rhos, n_temps), dtype=float)
+no_alcanzados = np.zeros((n_rhos, n_temps), dtype=bool)
 
 time_start = time.time()
 str_total = '--:--:--'
 
 print('\nSimulación iniciada\n')
 
-for i, rho in enumerate(rhos):
-
-    for j, T in enumerate(temps):
-
-        str_rho = 'Rho: %3d/%-3d (%6.3f)' % (i + 1, n_rhos, rho)
-        str_T = 'T: %3d/%-3d (%6.3f)' % (j + 1, n_temps, T)
-        str_progreso = ' - ' + str_rho + ', ' + str_T + ' - '
-        str_nuevo_rho = '%-35s' % 'Nuevo Rho'
-        str_rescaling = '%-35s' % 'Nueva T'
-        str_muestra = '%-35s' % 'Muestreando'
-        str_guardar = '%-35s' % 'Guardando'
-        str_listo = '%-35s' % 'Listo.'
+if lote:
+    barrido_lote()
+else:
+    for i, rho in enumerate(rhos):
+
+        for j, T in enumerate(temps):
+
+            str_rho = 'Rho: %3d/%-3d (%6.3f)' % (i + 1, n_rhos, rho)
+            str_T = 'T: %3d/%-3d (%6.3f)' % (j + 1, n_temps, T)
+            str_progreso = ' - ' + str_rho + ', ' + str_T + ' - '
+            str_nuevo_rho = '%-35s' % 'Nuevo Rho'
+            str_rescaling = '%-35s' % 'Nueva T'
+            str_muestra = '%-35s' % 'Muestreando'
+            str_guardar = '%-35s' % 'Guardando'
+            str_listo = '%-35s' % 'Listo.'
+
+            if j > 0:
+                elapsed = time.gmtime(time.time() - time_start)
+                str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
+                print('\r' + str_elapsed + str_progreso + str_rescaling,
+                      end='')
+                mdsys.rescaling(T, mdsys.T)
+                termalizar(preterm)
+
+            else:
+                elapsed = time.gmtime(time.time() - time_start)
+                str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
+                print('\r' + str_elapsed + str_progreso + str_nuevo_rho,
+                      end='')
+                config = dict(h_adaptativo=h_adaptativo, h_min=params.h_min,
+                              h_max=params.h_max)
+                mdsys = None
+                if tibio:
+                    mdsys = md.desde_estados(path + '/estados/', N, rho, T,
+                                             relajacion=0, **config)
+                if mdsys is None:
+                    mdsys = md(N=N, T=T_start, rho=rho, h=h, **config)
+                termalizar(term)
 
-        if j > 0:
             elapsed = time.gmtime(time.time() - time_start)
             str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
-            print('\r' + str_elapsed + str_progreso + str_rescaling, end='')
-            mdsys.rescaling(T)
-            mdsys.n_pasos(preterm)
+            print('\r' + str_elapsed + str_progreso + str_muestra, end='')
+            if max_pasos is not None:
+                t, e, p, alcanzado = mdsys.tomar_muestra_hasta(
+                    precision, params.precision_p, max_pasos)
+                no_alcanzados[i][j] = not alcanzado
+                np.save(path + 'no_alcanzados_%d_%d' % (etapa, n_etapas),
+                        no_alcanzados)
+            elif precision is None:
+                t, e, p = mdsys.tomar_muestra(m, dc)
+            else:
+                muestreo = mdsys.planear_muestreo(precision,
+                                                  params.precision_p)
+                t, e, p = mdsys.tomar_muestra(**muestreo)
+
+            avg_energia[i][j] = e[0]
+            std_energia[i][j] = e[1]
+            avg_presion[i][j] = p[0]
+            std_presion[i][j] = p[1]
 
-        else:
             elapsed = time.gmtime(time.time() - time_start)
             str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
-            print('\r' + str_elapsed + str_progreso + str_nuevo_rho, end='')
-            mdsys = md(N=N, T=T_start, rho=rho)
-            mdsys.n_pasos(term)
+            print('\r' + str_elapsed + str_progreso + str_guardar, end='')
 
-        elapsed = time.gmtime(time.time() - time_start)
-        str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
-        print('\r' + str_elapsed + str_progreso + str_muestra, end='')
-        e, p = mdsys.tomar_muestra(m, dc)
+            nombre_md = 'md_' + str(N) + '_r_%5.3f' % rho + '_T_%5.3f' % T + \
+                '.npy'
+            mdsys.save(nombre=nombre_md, ruta=path + '/estados/')
 
-        avg_energia[i][j] = e[0]
-        std_energia[i][j] = e[1]
-        avg_presion[i][j] = p[0]
-        std_presion[i][j] = p[1]
+            guardar_promedios()
 
-        elapsed = time.gmtime(time.time() - time_start)
-        str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
-        print('\r' + str_elapsed + str_progreso + str_guardar, end='')
-
-        nombre_md = 'md_' + str(N) + '_r_%5.3f' % rho + '_T_%5.3f' % T + '.npy'
-        mdsys.save(nombre=nombre_md, ruta=path + '/estados/')
-
-        np.save(path + 'avg_energia_%d_%d' % (etapa, n_etapas), avg_energia)
-        np.save(path + 'std_energia_%d_%d' % (etapa, n_etapas), std_energia)
-        np.save(path + 'avg_presion_%d_%d' % (etapa, n_etapas), avg_presion)
-        np.save(path + 'std_presion_%d_%d' % (etapa, n_etapas), std_presion)
-
-        elapsed = time.gmtime(time.time() - time_start)
-        str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
-        print('\r' + str_elapsed + str_progreso + str_listo)
+            elapsed = time.gmtime(time.time() - time_start)
+            str_elapsed = time.strftime('%X', elapsed) + ' / ' + str_total
+            print('\r' + str_elapsed + str_progreso + str_listo)
 
-    total = (time.time() - time_start) * (n_rhos / (i + 1))
-    str_total = time.strftime('%X', time.gmtime(total))
+        total = (time.time() - time_start) * (n_rhos / (i + 1))
+        str_total = time.strftime('%X', time.gmtime(total))
 
 if params.plot:
     plt.ion()
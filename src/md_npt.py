@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_npt.py
+
+from md_class import md
+import argparse
+import os
+import numpy as np
+
+######################
+# PARÁMETROS EXTERNOS
+######################
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-N', type=int, default=512)
+parser.add_argument('-rho', type=float, default=0.8442)
+parser.add_argument('-T', type=float, default=1.5)
+parser.add_argument('-P', type=float, nargs='+',
+                    default=[0.5, 1.0, 2.0, 4.0, 8.0])
+parser.add_argument('-barostato', type=str, default='mtk')
+parser.add_argument('-termostato', type=str, default='csvr')
+parser.add_argument('-tau', type=float, default=0.1)
+parser.add_argument('-tau_P', type=float, default=0.5)
+parser.add_argument('-paso', type=float, default=0.002)
+parser.add_argument('-term', type=int, default=5000)
+parser.add_argument('-m', type=int, default=20)
+parser.add_argument('-subm', type=int, default=20)
+parser.add_argument('-dc', type=int, default=200)
+parser.add_argument('-k', type=int, default=50)
+parser.add_argument('-backend', type=str, default=None)
+parser.add_argument('-ruta', type=str, default='../datos/npt/')
+params = parser.parse_args()
+
+N = params.N
+T = params.T
+presiones = params.P
+ruta = params.ruta
+
+
+#####################
+# PROGRAMA PRINCIPAL
+#####################
+
+# Isoterma: una corrida a presión constante por cada presión, en lugar de una
+# grilla de densidades a volumen fijo (ver md_ej2.plot_presion_vs_V)
+print('N: %d, T: %6.3f, barostato: %s, termostato: %s\n' %
+      (N, T, params.barostato, params.termostato))
+print('%8s %10s %10s %10s %10s' % ('P', 'rho', 'error rho', 'V/N', 'T'))
+
+isoterma = np.zeros((len(presiones), 5), dtype=float)
+
+for i, P in enumerate(presiones):
+    mdsys = md(N=N, rho=params.rho, h=params.paso, T=T,
+               termostato=params.termostato, tau=params.tau,
+               barostato=params.barostato, P=P, tau_P=params.tau_P,
+               celdas=True, backend=params.backend)
+    mdsys.n_pasos(params.term)
+    rho, error_rho = mdsys.medir_densidad(params.m, params.subm, params.dc,
+                                          params.k)
+    isoterma[i] = P, rho, error_rho, 1 / rho, mdsys.T
+    print('%8.3f %10.4f %10.4f %10.4f %10.4f' % tuple(isoterma[i]))
+
+os.makedirs(ruta, exist_ok=True)
+np.save(ruta + 'n%d_T%.3f_isoterma.npy' % (N, T), isoterma)
@@ -0,0 +1,506 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_numba.py
+
+'''
+Backend compilado con Numba. Implementa las mismas funciones que libmd.so
+con los mismos argumentos (punteros de ctypes), igual que md_numpy.py.
+
+La fuerza se calcula siempre con lista de celdas (si entran al menos 3 por
+lado) y en paralelo con prange: cada partícula suma la fuerza de todas sus
+vecinas, de modo que ningún hilo escribe en la memoria de otro. El
+integrador completo (evolucionar) también está compilado, así que los pasos
+no vuelven a Python, salvo con termostato, barostato o r-RESPA: se usan los
+de md_numpy.py entre partes compiladas de cada paso.
+
+Los tipos de posiciones, velocidades, tablas y fuerzas son los de los
+punteros recibidos (ver precision.h), pero la suma de la fuerza, la energía y
+el virial de cada partícula se hace siempre en double, como en la precisión
+mixta, y se guarda con el tipo de la fuerza.
+
+Las funciones compiladas se guardan en disco (cache=True, en __pycache__ o
+en NUMBA_CACHE_DIR) para no recompilar en cada proceso de un barrido.
+'''
+
+import ctypes as C
+import numpy as np
+import numba
+from numba import njit, prange
+
+from md_backend import MODO_EXACTO, TABLA_R, TABLA_R2, largo_lut
+from md_backend import TERMOSTATO_NVE, BAROSTATO_NINGUNO, evolucionar_en_serie
+# Funciones del backend que no cambian respecto de md_numpy (md_backend las
+# busca como atributos del módulo)
+from md_numpy import vector, termostato, barostato
+from md_numpy import lennardjones_lut, fuerza_lut  # noqa: F401
+from md_numpy import lennardjones_lut2, fuerza_lut2  # noqa: F401
+from md_numpy import celdas_por_lado  # noqa: F401
+
+NOMBRE = 'numba'
+
+
+###########################
+# Núcleos compilados
+###########################
+
+@njit(cache=True)
+def _fza_par(x, i, j, L, rc, lut_fza, lut_lj, g, tabla, exacto):
+    # Fuerza sobre i debida a j, energía y virial del par
+    dx = x[i, 0] - x[j, 0]
+    dy = x[i, 1] - x[j, 1]
+    dz = x[i, 2] - x[j, 2]
+
+    # condiciones de contorno
+    if dx > L / 2:
+        dx -= L
+    if dx < -L / 2:
+        dx += L
+    if dy > L / 2:
+        dy -= L
+    if dy < -L / 2:
+        dy += L
+    if dz > L / 2:
+        dz -= L
+    if dz < -L / 2:
+        dz += L
+
+    rij2 = dx * dx + dy * dy + dz * dz
+    if rij2 >= rc * rc:
+        return 0.0, 0.0, 0.0, 0.0, 0.0
+
+    # parte radial de la fuerza dividida por r
+    if exacto:
+        radial_r = 24 * (2 * rij2**-7 - rij2**-4)
+        energia = 4 * (rij2**-6 - rij2**-3)
+    elif tabla == TABLA_R2:
+        xg = rij2 * g
+        indice = int(xg)
+        a = xg - indice
+        radial_r = lut_fza[indice] + a * (lut_fza[indice + 1] -
+                                          lut_fza[indice])
+        energia = lut_lj[indice] + a * (lut_lj[indice + 1] - lut_lj[indice])
+    else:
+        rij = np.sqrt(rij2)
+        indice = int(rij * g)
+        radial_r = lut_fza[indice] / rij
+        energia = lut_lj[indice]
+
+    return (radial_r * dx, radial_r * dy, radial_r * dz, energia,
+            rij2 * radial_r)
+
+
+@njit(cache=True)
+def _armar_celdas(x, L, M, cabeza, lista):
+    # Distribuye las partículas en las celdas mediante listas enlazadas
+    cabeza[:] = -1
+    for i in range(x.shape[0]):
+        c = _indice_celda(x, i, L, M)
+        lista[i] = cabeza[c]
+        cabeza[c] = i
+
+
+@njit(cache=True)
+def _indice_celda(x, i, L, M):
+    cx = int(np.floor(x[i, 0] / L * M)) % M
+    cy = int(np.floor(x[i, 1] / L * M)) % M
+    cz = int(np.floor(x[i, 2] / L * M)) % M
+    return cx + M * cy + M * M * cz
+
+
+@njit(parallel=True, cache=True)
+def _fuerzas(x, f, L, rc, lut_fza, lut_lj, g, tabla, exacto):
+    # Calcula las fuerzas y devuelve energía potencial y presión de exceso
+    n = x.shape[0]
+    M = int(np.floor(L / rc))
+    epot_i = np.zeros(n)
+    virial_i = np.zeros(n)
+
+    cabeza = np.empty(max(M, 1)**3, dtype=np.int64)
+    lista = np.empty(n, dtype=np.int64)
+    if M >= 3:
+        _armar_celdas(x, L, M, cabeza, lista)
+
+    for i in prange(n):
+        fx, fy, fz, e, v = 0.0, 0.0, 0.0, 0.0, 0.0
+
+        if M >= 3:
+            c = _indice_celda(x, i, L, M)
+            cx = c % M
+            cy = (c // M) % M
+            cz = c // (M * M)
+            for ddz in range(-1, 2):
+                for ddy in range(-1, 2):
+                    for ddx in range(-1, 2):
+                        vc = ((cx + ddx) % M + M * ((cy + ddy) % M) +
+                              M * M * ((cz + ddz) % M))
+                        j = cabeza[vc]
+                        while j != -1:
+                            if j != i:
+                                px, py, pz, pe, pv = _fza_par(
+                                    x, i, j, L, rc, lut_fza, lut_lj, g,
+                                    tabla, exacto)
+                                fx += px
+                                fy += py
+                                fz += pz
+                                e += pe
+                                v += pv
+                            j = lista[j]
+        else:
+            for j in range(n):
+                if j != i:
+                    px, py, pz, pe, pv = _fza_par(x, i, j, L, rc, lut_fza,
+                                                  lut_lj, g, tabla, exacto)
+                    fx += px
+                    fy += py
+                    fz += pz
+                    e += pe
+                    v += pv
+
+        f[i, 0] = fx
+        f[i, 1] = fy
+        f[i, 2] = fz
+        # cada par se cuenta dos veces
+        epot_i[i] = 0.5 * e
+        virial_i[i] = 0.5 * v
+
+    return epot_i.sum(), virial_i.sum()
+
+
+@njit(parallel=True, cache=True)
+def _primer_paso(x, v, f, h):
+    for i in prange(x.size):
+        v[i] += 0.5 * f[i] * h
+        x[i] += v[i] * h
+
+
+@njit(parallel=True, cache=True)
+def _ultimo_paso(v, f, h):
+    for i in prange(v.size):
+        v[i] += 0.5 * f[i] * h
+
+
+@njit(parallel=True, cache=True)
+def _c_cont(x, L):
+    for i in prange(x.size):
+        x[i] = x[i] - L * np.floor(x[i] / L)
+
+
+@njit(parallel=True, cache=True)
+def _cinetica(v):
+    suma = 0.0
+    for i in prange(v.size):
+        suma += v[i] * v[i]
+    return suma / 2
+
+
+@njit(cache=True)
+def _evolucionar(x, v, f, L, h, rc, lut_fza, lut_lj, g, tabla, exacto,
+                 desde, hasta, k, ecin, epot, virial):
+    # Pasos de Verlet guardando los observables cada k pasos
+    x3 = x.reshape((-1, 3))
+    f3 = f.reshape((-1, 3))
+    e, p = 0.0, 0.0
+
+    for t in range(desde, hasta):
+        _primer_paso(x, v, f, h)
+        e, p = _fuerzas(x3, f3, L, rc, lut_fza, lut_lj, g, tabla, exacto)
+        _ultimo_paso(v, f, h)
+        _c_cont(x, L)
+
+        if k > 0 and (t + 1) % k == 0:
+            i = (t + 1) // k - 1
+            if ecin.size > 0:
+                ecin[i] = _cinetica(v)
+            if epot.size > 0:
+                epot[i] = e
+            if virial.size > 0:
+                virial[i] = p
+
+    return e, p
+
+
+@njit(parallel=True, cache=True)
+def _distrib_radial(g_r, x, L, rho, dR1, bloques):
+    # Histograma de distancias por bloques de partículas, uno por hilo
+    n = x.shape[0]
+    Q = g_r.size
+    parcial = np.zeros((bloques, Q))
+
+    for b in prange(bloques):
+        for i in range(b, n - 1, bloques):
+            for j in range(i + 1, n):
+                dx = x[i, 0] - x[j, 0]
+                dy = x[i, 1] - x[j, 1]
+                dz = x[i, 2] - x[j, 2]
+                dx -= L * np.round(dx / L)
+                dy -= L * np.round(dy / L)
+                dz -= L * np.round(dz / L)
+                rij = np.sqrt(dx * dx + dy * dy + dz * dz)
+                q = int(rij / dR1)
+                if q < Q:
+                    parcial[b, q] += 1.0 / (4 * np.pi * rij * rij * dR1 * rho)
+
+    for b in range(bloques):
+        for q in range(Q):
+            g_r[q] += parcial[b, q]
+
+
+@njit(parallel=True, cache=True)
+def _histograma_radial(hist, x, L, r_max, M, bloques):
+    # Pares (j > i) con r < r_max por bloques de partículas, uno por hilo,
+    # recorriendo las 27 celdas vecinas (o todas las partículas con M < 3)
+    n = x.shape[0]
+    bins = hist.size
+    dR = r_max / bins
+    parcial = np.zeros((bloques, bins))
+
+    cabeza = np.empty(max(M, 1)**3, dtype=np.int64)
+    lista = np.empty(n, dtype=np.int64)
+    if M >= 3:
+        _armar_celdas(x, L, M, cabeza, lista)
+
+    for b in prange(bloques):
+        for i in range(b, n, bloques):
+            if M >= 3:
+                c = _indice_celda(x, i, L, M)
+                cx = c % M
+                cy = (c // M) % M
+                cz = c // (M * M)
+                for v in range(27):
+                    vc = ((cx + v % 3 - 1) % M +
+                          M * ((cy + (v // 3) % 3 - 1) % M) +
+                          M * M * ((cz + v // 9 - 1) % M))
+                    j = cabeza[vc]
+                    while j != -1:
+                        if j > i:
+                            _sumar_par(parcial[b], x, i, j, L, r_max, dR)
+                        j = lista[j]
+            else:
+                for j in range(i + 1, n):
+                    _sumar_par(parcial[b], x, i, j, L, r_max, dR)
+
+    pares = 0.0
+    for b in range(bloques):
+        for q in range(bins):
+            hist[q] += parcial[b, q]
+            pares += parcial[b, q]
+    return int(pares)
+
+
+@njit(cache=True)
+def _sumar_par(hist, x, i, j, L, r_max, dR):
+    dx = x[i, 0] - x[j, 0]
+    dy = x[i, 1] - x[j, 1]
+    dz = x[i, 2] - x[j, 2]
+    dx -= L * np.round(dx / L)
+    dy -= L * np.round(dy / L)
+    dz -= L * np.round(dz / L)
+    rij2 = dx * dx + dy * dy + dz * dz
+    if rij2 < r_max * r_max:
+        q = min(int(np.sqrt(rij2) / dR), hist.size - 1)
+        hist[q] += 1.0
+
+
+###########################
+# Funciones auxiliares
+###########################
+
+def luts(g, rc, FZA_LUT, LJ_LUT, tabla, exacto):
+    '''
+    Vistas de las Lookup-tables (vacías en el modo exacto)
+    '''
+    if exacto:
+        return np.zeros(1, dtype=np.float32), np.zeros(1, dtype=np.float32)
+    long_lut = largo_lut(g, rc, tabla)
+    return vector(FZA_LUT, long_lut), vector(LJ_LUT, long_lut)
+
+
+def hilos(s):
+    '''
+    Configura la cantidad de hilos de Numba según el sistema
+    '''
+    if s.hilos > 0:
+        numba.set_num_threads(min(s.hilos, numba.config.NUMBA_NUM_THREADS))
+
+
+##############################
+# Funciones de libmd
+##############################
+
+def primer_paso(pos, vel, fza, N, h):
+    x = vector(pos, 3 * N)
+    _primer_paso(x, vector(vel, 3 * N), vector(fza, 3 * N), x.dtype.type(h))
+    return 0
+
+
+def ultimo_paso(vel, fza, N, h):
+    v = vector(vel, 3 * N)
+    _ultimo_paso(v, vector(fza, 3 * N), v.dtype.type(h))
+    return 0
+
+
+def c_cont(pos, N, L):
+    x = vector(pos, 3 * N)
+    _c_cont(x, x.dtype.type(L))
+    return 0
+
+
+def cinetica(vel, N):
+    return _cinetica(vector(vel, 3 * N))
+
+
+def nueva_fza(pos, fza, n, L, rc, FZA_LUT, LJ_LUT, g, tabla, epot):
+    lut_fza, lut_lj = luts(g, rc, FZA_LUT, LJ_LUT, tabla, False)
+    x = vector(pos, 3 * n).reshape(n, 3)
+    real = x.dtype.type
+    e, p = _fuerzas(x, vector(fza, 3 * n).reshape(n, 3), real(L), real(rc),
+                    lut_fza, lut_lj, g, tabla, False)
+    vector(epot, 1)[0] = e
+    return p
+
+
+def nueva_fza_exacto(pos, fza, n, L, rc, epot):
+    lut_fza, lut_lj = luts(0, rc, None, None, TABLA_R, True)
+    x = vector(pos, 3 * n).reshape(n, 3)
+    real = x.dtype.type
+    e, p = _fuerzas(x, vector(fza, 3 * n).reshape(n, 3), real(L), real(rc),
+                    lut_fza, lut_lj, 0, TABLA_R, True)
+    vector(epot, 1)[0] = e
+    return p
+
+
+def potencial(pos, N, L, LJ_LUT, g, rc):
+    fza = np.zeros(3 * N)
+    epot = C.c_double(0.0)
+    nueva_fza(pos, fza.ctypes.data_as(C.POINTER(C.c_double)), N, L, rc,
+              LJ_LUT, LJ_LUT, g, TABLA_R, C.pointer(epot))
+    return epot.value
+
+
+def potencial_exacto(pos, N, L, rc):
+    fza = np.zeros(3 * N)
+    epot = C.c_double(0.0)
+    nueva_fza_exacto(pos, fza.ctypes.data_as(C.POINTER(C.c_double)), N, L, rc,
+                     C.pointer(epot))
+    return epot.value
+
+
+def distrib_radial(distrad, pos, n, L, rho, Q):
+    n = int(n)
+    x = vector(pos, 3 * n).reshape(n, 3)
+    real = x.dtype.type
+    _distrib_radial(vector(distrad, int(Q)), x, real(L), real(rho),
+                    real(L / (Q + 2)), numba.get_num_threads())
+    return 0
+
+
+def histograma_radial(hist, pos, n, L, r_max, bins, M, cabeza, lista):
+    n = int(n)
+    x = vector(pos, 3 * n).reshape(n, 3)
+    real = x.dtype.type
+    return _histograma_radial(vector(hist, bins), x, real(L), real(r_max),
+                              int(M), numba.get_num_threads())
+
+
+##############################
+# Integrador
+##############################
+
+def actualizar_vecinos(p_sis):
+    # Sin lista de vecinos no hay nada que actualizar
+    return 0
+
+
+def calc_fza(p_sis):
+    s = p_sis.contents
+    hilos(s)
+    exacto = s.modo == MODO_EXACTO
+    lut_fza, lut_lj = luts(s.g, s.rc, s.FZA_LUT, s.LJ_LUT, s.tabla, exacto)
+
+    x = vector(s.pos, 3 * s.n).reshape(s.n, 3)
+    real = x.dtype.type
+    s.epot, s.p_exceso = _fuerzas(x, vector(s.fza, 3 * s.n).reshape(s.n, 3),
+                                  real(s.L), real(s.rc), lut_fza, lut_lj,
+                                  s.g, s.tabla, exacto)
+    return 0
+
+
+def evolucionar(p_sis, desde, hasta, k, ecin, epot, virial):
+    s = p_sis.contents
+    hilos(s)
+    exacto = s.modo == MODO_EXACTO
+    lut_fza, lut_lj = luts(s.g, s.rc, s.FZA_LUT, s.LJ_LUT, s.tabla, exacto)
+
+    largo = hasta // k if k > 0 else 0
+    x = vector(s.pos, 3 * s.n)
+    v = vector(s.vel, 3 * s.n)
+    f = vector(s.fza, 3 * s.n)
+    real = x.dtype.type
+    L, h, rc = real(s.L), real(s.h), real(s.rc)
+
+    vacio = np.zeros(0, dtype=f.dtype)
+    v_ecin = vacio if ecin is None else vector(ecin, largo)
+    v_epot = vacio if epot is None else vector(epot, largo)
+    v_virial = vacio if virial is None else vector(virial, largo)
+
+    respa = s.respa > 1 and not exacto
+    if s.termostato == TERMOSTATO_NVE and s.barostato == BAROSTATO_NINGUNO \
+            and not respa:
+        s.epot, s.p_exceso = _evolucionar(x, v, f, L, h, rc, lut_fza, lut_lj,
+                                          s.g, s.tabla, exacto, desde, hasta,
+                                          k, v_ecin, v_epot, v_virial)
+        return hasta
+
+    # Con termostato, barostato o r-RESPA se llama a cada parte del paso por
+    # separado. El barostato cambia L entre las partes
+    x3 = x.reshape((-1, 3))
+    f3 = f.reshape((-1, 3))
+    if respa:
+        # la fuerza rápida usa celdas de lado rc_interno
+        rc_int = real(s.rc_interno)
+        h_int = real(s.h / s.respa)
+        lut_rapida = vector(s.FZA_LUT_rapida, lut_fza.size)
+        fr = vector(s.fza_rapida, 3 * s.n)
+        fr3 = fr.reshape((-1, 3))
+        _fuerzas(x3, fr3, L, rc_int, lut_rapida, lut_lj, s.g, s.tabla, False)
+
+    for t in range(desde, hasta):
+        termostato(p_sis, 0)
+        if respa:
+            _ultimo_paso(v, f - fr, h)
+            for i in range(s.respa):
+                _primer_paso(x, v, fr, h_int)
+                _fuerzas(x3, fr3, L, rc_int, lut_rapida, lut_lj, s.g,
+                         s.tabla, False)
+                _ultimo_paso(v, fr, h_int)
+            s.epot, s.p_exceso = _fuerzas(x3, f3, L, rc, lut_fza, lut_lj,
+                                          s.g, s.tabla, exacto)
+            _ultimo_paso(v, f - fr, h)
+        else:
+            barostato(p_sis, 0)
+            _primer_paso(x, v, f, h)
+            barostato(p_sis, 1)
+            L = real(s.L)
+            s.epot, s.p_exceso = _fuerzas(x3, f3, L, rc, lut_fza, lut_lj,
+                                          s.g, s.tabla, exacto)
+            _ultimo_paso(v, f, h)
+            barostato(p_sis, 2)
+        termostato(p_sis, 1)
+        _c_cont(x, real(s.L))
+
+        if k > 0 and (t + 1) % k == 0:
+            i = (t + 1) // k - 1
+            if v_ecin.size > 0:
+                v_ecin[i] = _cinetica(v)
+            if v_epot.size > 0:
+                v_epot[i] = s.epot
+            if v_virial.size > 0:
+                v_virial[i] = s.p_exceso
+
+    return hasta
+
+
+def evolucionar_lote(p_sis, R, pasos, k, ecin, epot, virial, hilos):
+    # Los sistemas se evolucionan en serie (ver md_backend)
+    return evolucionar_en_serie(evolucionar, p_sis, R, pasos, k, ecin, epot,
+                                virial)
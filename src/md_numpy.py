@@ -0,0 +1,580 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_numpy.py
+
+'''
+Backend vectorizado con NumPy. Implementa las mismas funciones que libmd.so
+con los mismos argumentos (punteros de ctypes), trabajando sobre vistas de
+NumPy de esa misma memoria. Los pares se recorren por bloques de filas para
+que la memoria usada no crezca como N².
+
+Los tipos (float o double, ver precision.h) son los de los punteros que se
+reciben: las cuentas por par se hacen con el de las posiciones y las sumas de
+fuerzas y energías con el de la fuerza.
+
+No implementa celdas, lista de vecinos ni hilos: esos modos se calculan
+recorriendo todos los pares.
+'''
+
+import ctypes as C
+import numpy as np
+
+from md_backend import MODO_EXACTO, TABLA_R2, largo_lut, evolucionar_en_serie
+from md_backend import SPLINE_ANCHO
+from md_backend import TERMOSTATO_NVE, TERMOSTATO_BERENDSEN, TERMOSTATO_CSVR
+from md_backend import TERMOSTATO_ANDERSEN, TERMOSTATO_NOSE_HOOVER
+from md_backend import BAROSTATO_NINGUNO, BAROSTATO_BERENDSEN, BAROSTATO_MTK
+
+NOMBRE = 'numpy'
+
+# Cantidad aproximada de pares que se procesan a la vez
+TAM_BLOQUE = 2**18
+
+
+###########################
+# Funciones auxiliares
+###########################
+
+def vector(p, largo):
+    '''
+    Devuelve una vista de NumPy (sin copiar) de la memoria del puntero
+    '''
+    return np.ctypeslib.as_array(p, shape=(int(largo),))
+
+
+def bloques(pos, n, L):
+    '''
+    Recorre los pares por bloques de filas. Para las partículas a..b-1
+    devuelve las diferencias dr (con condiciones de contorno) y las
+    distancias al cuadrado r2 con todas las demás (r2 = inf consigo misma).
+    Cada par aparece dos veces, una como (i, j) y otra como (j, i).
+    '''
+    x = pos.reshape(n, 3)
+    filas = max(1, TAM_BLOQUE // max(n, 1))
+
+    for a in range(0, n, filas):
+        b = min(a + filas, n)
+
+        # calcula los dk con k = (x, y, z)
+        dr = x[a:b, None, :] - x[None, :, :]
+
+        # condiciones de contorno para dk
+        dr = np.where(dr > L / 2, dr - L, dr)
+        dr = np.where(dr < -L / 2, dr + L, dr)
+
+        r2 = np.sum(dr * dr, axis=2)
+        r2[np.arange(b - a), np.arange(a, b)] = np.inf
+
+        yield a, b, dr, r2
+
+
+def fza_pares(pos, fza, n, L, rc, radial_r, potencial_r):
+    '''
+    Calcula la fuerza con la parte radial dada y devuelve la presión de
+    exceso y la energía potencial
+    '''
+    x = vector(pos, 3 * n)
+    f = vector(fza, 3 * n).reshape(n, 3)
+    p_exceso = 0.0
+    potencial = 0.0
+
+    for a, b, dr, r2 in bloques(x, n, L):
+        r = np.sqrt(r2)
+        dentro = r < rc
+
+        radial = np.zeros_like(r)
+        radial[dentro] = radial_r(r[dentro])
+
+        # fuerza sobre cada partícula del bloque (suma sobre todas las j, en
+        # el tipo de los acumuladores)
+        f[a:b] = np.sum((radial / r)[:, :, None] * dr, axis=1, dtype=f.dtype)
+
+        # cada par se cuenta dos veces
+        p_exceso += 0.5 * np.sum(r[dentro] * radial[dentro], dtype=float)
+        potencial += 0.5 * np.sum(potencial_r(r[dentro]), dtype=float)
+
+    return p_exceso, potencial
+
+
+def potencial_pares(pos, n, L, rc, potencial_r):
+    '''
+    Calcula la energía potencial con el potencial dado
+    '''
+    x = vector(pos, 3 * n)
+    potencial = 0.0
+
+    for a, b, dr, r2 in bloques(x, n, L):
+        r = np.sqrt(r2)
+        potencial += 0.5 * np.sum(potencial_r(r[r < rc]), dtype=float)
+
+    return potencial
+
+
+def lookup(LUT, g, r):
+    '''
+    Busca en la LUT el valor para las distancias r (valor de la izquierda)
+    '''
+    return LUT[np.floor(r * g).astype(int)]
+
+
+def lookup2(LUT, g, r2):
+    '''
+    Interpola linealmente en la LUT indexada por r² para las distancias r2
+    '''
+    x = r2 * g
+    indice = np.floor(x).astype(int)
+    a = x - indice
+    return LUT[indice] + a * (LUT[indice + 1] - LUT[indice])
+
+
+def lennardjones(r):
+    '''
+    Evalua el potencial de Lennard-Jones de forma analitica
+    '''
+    return 4 * (r**-12.0 - r**-6.0)
+
+
+def spline_suave(rc):
+    '''
+    Parámetros del spline de lennardjones_suave (ver lennardjones.c)
+    '''
+    x1 = (1 - SPLINE_ANCHO) * rc
+    y1 = lennardjones(x1) - lennardjones(rc)
+    k1 = -24 * (2 * x1**-13.0 - x1**-7.0)
+    return x1, y1, k1 * (rc - x1) + y1, -y1
+
+
+def lennardjones_suave(r, rc):
+    '''
+    Potencial de la tabla por r evaluado de forma analitica: con el shift y
+    con el spline antes de rc. Vale 0 para r >= rc
+    '''
+    x1, y1, a, b = spline_suave(rc)
+    s = (r - x1) / (rc - x1)
+    return np.where(r >= rc, 0.0, np.where(
+        r < x1, lennardjones(r) - lennardjones(rc),
+        (1 - s) * y1 + s * (1 - s) * (a * (1 - s) + b * s)))
+
+
+def fuerza_suave(r, rc):
+    '''
+    Fuerza -dV/dr del potencial de lennardjones_suave
+    '''
+    x1, y1, a, b = spline_suave(rc)
+    s = (r - x1) / (rc - x1)
+    return np.where(r >= rc, 0.0, np.where(
+        r < x1, 24 * (2 * r**-13.0 - r**-7.0),
+        -(-y1 + (1 - 2 * s) * (a * (1 - s) + b * s) +
+          s * (1 - s) * (b - a)) / (rc - x1)))
+
+
+def escribir(p, valor):
+    '''
+    Escribe un float en la memoria del puntero
+    '''
+    vector(p, 1)[0] = valor
+
+
+##############################
+# Funciones de libmd
+##############################
+
+def primer_paso(pos, vel, fza, N, h):
+    x = vector(pos, 3 * N)
+    v = vector(vel, 3 * N)
+    f = vector(fza, 3 * N)
+    v += v.dtype.type(0.5 * h) * f
+    x += v * v.dtype.type(h)
+    return 0
+
+
+def ultimo_paso(vel, fza, N, h):
+    v = vector(vel, 3 * N)
+    f = vector(fza, 3 * N)
+    v += v.dtype.type(0.5 * h) * f
+    return 0
+
+
+def c_cont(pos, N, L):
+    x = vector(pos, 3 * N)
+    L = x.dtype.type(L)
+    x -= L * np.floor(x / L)
+    return 0
+
+
+def lennardjones_lut(LJ_LUT, k, rc):
+    lut = vector(LJ_LUT, k)
+    rc = lut.dtype.type(rc)
+    r = (np.arange(k) + 1) * (rc / k)
+
+    # LUT de Lennard-Jones con el shift (desborda a inf en r chico, como en C)
+    with np.errstate(over='ignore'):
+        lut[:] = lennardjones(r.astype(float)) - lennardjones(float(rc))
+
+    # Crea la spline alrededor de rc
+    spline(lut, k, rc)
+    return 0
+
+
+def spline(lut, k, rc):
+    p = k // 10
+    dr = rc / k
+    x1 = (k - p + 1) * dr
+    x2 = rc
+    y1 = lut[k - p]
+    k1 = (lut[k - p + 1] - lut[k - p]) / ((k - p + 2) * dr - (k - p + 1) * dr)
+    a = k1 * (x2 - x1) + y1
+    b = -y1
+
+    t = ((np.arange(k - p, k) + 1) * dr - x1) / (x2 - x1)
+    lut[k - p:k] = (1 - t) * y1 + t * (1 - t) * (a * (1 - t) + b * t)
+    return 0
+
+
+def fuerza_lut(FZA_LUT, LJ_LUT, k, rc):
+    fza = vector(FZA_LUT, k)
+    lj = vector(LJ_LUT, k)
+    delta_r = fza.dtype.type(rc) / k
+
+    # Fuerza mediante diferencia finita y caso aparte para el ultimo
+    with np.errstate(over='ignore', invalid='ignore'):
+        fza[:-1] = -(lj[1:] - lj[:-1]) / delta_r
+        fza[-1] = lj[-1] / delta_r
+    return 0
+
+
+def lennardjones_lut2(LJ_LUT, k, g, rc):
+    lut = vector(LJ_LUT, k)
+    r = np.sqrt(np.arange(k) / lut.dtype.type(g))
+
+    # LUT de Lennard-Jones suavizado en r² = i/g (inf en r = 0, como en C)
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        lut[:] = lennardjones_suave(r, lut.dtype.type(rc))
+    return 0
+
+
+def fuerza_lut2(FZA_LUT, k, g, rc):
+    fza = vector(FZA_LUT, k)
+    r = np.sqrt(np.arange(k) / fza.dtype.type(g))
+
+    # F(r)/r en r² = i/g
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        fza[:] = fuerza_suave(r, fza.dtype.type(rc)) / r
+    return 0
+
+
+def cinetica(vel, N):
+    v = vector(vel, 3 * N)
+    return float(np.sum(v * v, dtype=float) / 2)
+
+
+def nueva_fza(pos, fza, n, L, rc, FZA_LUT, LJ_LUT, g, tabla, epot):
+    long_lut = largo_lut(g, rc, tabla)
+    lut_fza = vector(FZA_LUT, long_lut)
+    lut_lj = vector(LJ_LUT, long_lut)
+
+    if tabla == TABLA_R2:
+        # la tabla de fuerza por r² guarda F(r)/r
+        p_exceso, potencial = fza_pares(
+            pos, fza, n, L, rc, lambda r: r * lookup2(lut_fza, g, r * r),
+            lambda r: lookup2(lut_lj, g, r * r))
+    else:
+        p_exceso, potencial = fza_pares(pos, fza, n, L, rc,
+                                        lambda r: lookup(lut_fza, g, r),
+                                        lambda r: lookup(lut_lj, g, r))
+    escribir(epot, potencial)
+    return p_exceso
+
+
+def nueva_fza_exacto(pos, fza, n, L, rc, epot):
+    p_exceso, potencial = fza_pares(pos, fza, n, L, rc,
+                                    lambda r: -24 * (r**-7 - 2 * r**-13),
+                                    lennardjones)
+    escribir(epot, potencial)
+    return p_exceso
+
+
+def potencial(pos, N, L, LJ_LUT, g, rc):
+    # como en C, sólo con la tabla por r
+    lut_lj = vector(LJ_LUT, largo_lut(g, rc))
+    return potencial_pares(pos, N, L, rc, lambda r: lookup(lut_lj, g, r))
+
+
+def potencial_exacto(pos, N, L, rc):
+    return potencial_pares(pos, N, L, rc, lennardjones)
+
+
+def distrib_radial(distrad, pos, n, L, rho, Q):
+    n = int(n)
+    Q = int(Q)
+    g_r = vector(distrad, Q)
+    x = vector(pos, 3 * n)
+    dR1 = L / (Q + 2)
+
+    for a, b, dr, r2 in bloques(x, n, L):
+        r = np.sqrt(r2[np.isfinite(r2)])
+        # cada par se cuenta dos veces
+        peso = 0.5 / (4 * np.pi * r * r * dR1 * rho)
+        suma = np.bincount(np.floor(r / dR1).astype(int), weights=peso,
+                           minlength=Q)
+        g_r += suma[:Q].astype(g_r.dtype)
+    return 0
+
+
+def histograma_radial(hist, pos, n, L, r_max, bins, M, cabeza, lista):
+    n = int(n)
+    h = vector(hist, bins)
+    x = vector(pos, 3 * n)
+    dR = x.dtype.type(r_max / bins)
+    pares = 0
+
+    for a, b, dr, r2 in bloques(x, n, L):
+        # cada par se cuenta una vez (j > i)
+        r2 = r2[np.arange(n)[None, :] > np.arange(a, b)[:, None]]
+        r = np.sqrt(r2[r2 < r_max * r_max])
+        q = np.minimum((r / dR).astype(int), bins - 1)
+        h += np.bincount(q, minlength=bins)
+        pares += r.size
+    return pares
+
+
+def celdas_por_lado(L, rc):
+    return int(np.floor(np.float32(L) / np.float32(rc)))
+
+
+##############################
+# Integrador
+##############################
+
+def actualizar_vecinos(p_sis):
+    # Sin lista de vecinos no hay nada que actualizar
+    return 0
+
+
+def calc_fza(p_sis):
+    s = p_sis.contents
+    epot = C.c_double(0.0)
+
+    if s.modo == MODO_EXACTO:
+        s.p_exceso = nueva_fza_exacto(s.pos, s.fza, s.n, s.L, s.rc,
+                                      C.pointer(epot))
+    else:
+        s.p_exceso = nueva_fza(s.pos, s.fza, s.n, s.L, s.rc, s.FZA_LUT,
+                               s.LJ_LUT, s.g, s.tabla, C.pointer(epot))
+    s.epot = epot.value
+    return 0
+
+
+def generador(s):
+    '''
+    Generador aleatorio a partir del estado guardado en el sistema. Avanza
+    el estado para que la próxima llamada use otra secuencia.
+    '''
+    rng = np.random.default_rng(s.semilla)
+    s.semilla = int(rng.integers(1, 2**63))
+    return rng
+
+
+def nose_hoover(s, v, nf):
+    '''
+    Medio paso de la cadena de Nosé-Hoover (ver termostato.c)
+    '''
+    M = s.largo_cadena
+    xi = vector(s.xi, M)
+    v_xi = vector(s.v_xi, M)
+    T0 = s.T_objetivo
+    Q = np.full(M, T0 * s.tau**2)
+    Q[0] *= nf
+    h2, h4, h8 = s.h / 2, s.h / 4, s.h / 8
+    ecin = float(np.sum(v * v, dtype=float) / 2)
+
+    def fuerza(j):
+        if j == 0:
+            return (2 * ecin - nf * T0) / Q[0]
+        return (Q[j - 1] * v_xi[j - 1]**2 - T0) / Q[j]
+
+    def avanzar(j):
+        if j < M - 1:
+            v_xi[j] *= np.exp(-v_xi[j + 1] * h8)
+        v_xi[j] += fuerza(j) * h4
+        if j < M - 1:
+            v_xi[j] *= np.exp(-v_xi[j + 1] * h8)
+
+    for j in range(M - 1, -1, -1):
+        avanzar(j)
+
+    escala = np.exp(-v_xi[0] * h2)
+    v *= v.dtype.type(escala)
+    ecin *= escala**2
+    xi += v_xi * h2
+
+    for j in range(M):
+        avanzar(j)
+
+
+def termostato(p_sis, etapa):
+    s = p_sis.contents
+    v = vector(s.vel, 3 * s.n)
+    nf = 3 * s.n
+
+    if s.termostato == TERMOSTATO_NOSE_HOOVER:
+        nose_hoover(s, v, nf)
+        return 0
+
+    # el resto actúa una vez por paso, al final
+    if etapa == 0 or s.termostato == TERMOSTATO_NVE:
+        return 0
+
+    ecin = float(np.sum(v * v, dtype=float) / 2)
+    T0 = s.T_objetivo
+
+    if s.termostato == TERMOSTATO_BERENDSEN and ecin > 0:
+        v *= v.dtype.type(np.sqrt(1 + s.h / s.tau * (T0 / (2 * ecin / nf) -
+                                                     1)))
+
+    elif s.termostato == TERMOSTATO_CSVR and ecin > 0:
+        rng = generador(s)
+        c = np.exp(-s.h / s.tau)
+        e_obj = 0.5 * nf * T0
+        r1 = rng.standard_normal()
+        r2 = rng.chisquare(nf - 1)
+        alfa2 = c + (1 - c) * e_obj / (nf * ecin) * (r1 * r1 + r2) + \
+            2 * r1 * np.sqrt(c * (1 - c) * e_obj / (nf * ecin))
+        signo = np.sign(r1 + np.sqrt(c * nf * ecin / ((1 - c) * e_obj)))
+        v *= v.dtype.type(signo * np.sqrt(alfa2))
+
+    elif s.termostato == TERMOSTATO_ANDERSEN:
+        rng = generador(s)
+        choques = rng.random(s.n) < s.h / s.tau
+        v3 = v.reshape(s.n, 3)
+        v3[choques] = np.sqrt(T0) * rng.standard_normal((choques.sum(), 3))
+        # los choques no conservan el momento: se quita la velocidad del
+        # centro de masa para que T = 2 Ecin / 3N siga valiendo
+        if choques.any():
+            v3 -= v3.mean(axis=0, dtype=float).astype(v3.dtype)
+
+    return 0
+
+
+def dilatar(s, factor):
+    '''
+    Escala la caja y las posiciones por factor (ver barostato.c). Sin
+    celdas no hay nada más que actualizar
+    '''
+    x = vector(s.pos, 3 * s.n)
+    x *= x.dtype.type(factor)
+    s.L = s.L * factor
+
+
+def barostato(p_sis, etapa):
+    s = p_sis.contents
+    if s.barostato == BAROSTATO_NINGUNO:
+        return 0
+
+    v = vector(s.vel, 3 * s.n)
+    nf = 3 * s.n
+    alfa = 1 + 3 / nf
+    V = float(s.L)**3
+
+    def medio_paso():
+        # medio paso de la velocidad del barostato MTK
+        ecin = float(np.sum(v * v, dtype=float) / 2)
+        W = (nf + 3) * s.T_objetivo * s.tau_P**2
+        G = (alfa * 2 * ecin + s.p_exceso - 3 * V * s.P_objetivo) / W
+        s.v_eps += G * s.h / 2
+
+    if s.barostato == BAROSTATO_MTK:
+        if etapa == 0:
+            medio_paso()
+            v *= v.dtype.type(np.exp(-alfa * s.v_eps * s.h / 2))
+            dilatar(s, np.exp(s.v_eps * s.h / 2))
+        elif etapa == 1:
+            dilatar(s, np.exp(s.v_eps * s.h / 2))
+        else:
+            v *= v.dtype.type(np.exp(-alfa * s.v_eps * s.h / 2))
+            medio_paso()
+
+    elif s.barostato == BAROSTATO_BERENDSEN and etapa == 2:
+        ecin = float(np.sum(v * v, dtype=float) / 2)
+        P = (2 * ecin + s.p_exceso) / (3 * V)
+        mu3 = 1 - s.compresibilidad * s.h / s.tau_P * (s.P_objetivo - P)
+        dilatar(s, np.cbrt(mu3))
+
+    return 0
+
+
+def fuerza_rapida(s):
+    '''
+    Parte rápida de la fuerza para r-RESPA (r < rc_interno)
+    '''
+    epot = C.c_double(0.0)
+    nueva_fza(s.pos, s.fza_rapida, s.n, s.L, s.rc_interno, s.FZA_LUT_rapida,
+              s.LJ_LUT, s.g, s.tabla, C.pointer(epot))
+
+
+def paso_lento(s):
+    '''
+    Medio paso de velocidad con la fuerza lenta (completa menos rápida)
+    '''
+    v = vector(s.vel, 3 * s.n)
+    f = vector(s.fza, 3 * s.n)
+    f_rapida = vector(s.fza_rapida, 3 * s.n)
+    v += v.dtype.type(0.5 * s.h) * (f - f_rapida)
+
+
+def paso_respa(p_sis):
+    s = p_sis.contents
+    h = s.h / s.respa
+
+    paso_lento(s)
+    for i in range(s.respa):
+        primer_paso(s.pos, s.vel, s.fza_rapida, s.n, h)
+        fuerza_rapida(s)
+        ultimo_paso(s.vel, s.fza_rapida, s.n, h)
+    calc_fza(p_sis)
+    paso_lento(s)
+
+
+def evolucionar(p_sis, desde, hasta, k, ecin, epot, virial):
+    s = p_sis.contents
+    largo = hasta // k if k > 0 else 0
+    v_ecin = None if ecin is None else vector(ecin, largo)
+    v_epot = None if epot is None else vector(epot, largo)
+    v_virial = None if virial is None else vector(virial, largo)
+
+    # r-RESPA (ver integrador.c)
+    respa = s.respa > 1 and s.modo != MODO_EXACTO
+    if respa:
+        fuerza_rapida(s)
+
+    for t in range(desde, hasta):
+        termostato(p_sis, 0)
+        if respa:
+            paso_respa(p_sis)
+        else:
+            barostato(p_sis, 0)
+            primer_paso(s.pos, s.vel, s.fza, s.n, s.h)
+            barostato(p_sis, 1)
+            calc_fza(p_sis)
+            ultimo_paso(s.vel, s.fza, s.n, s.h)
+            barostato(p_sis, 2)
+        termostato(p_sis, 1)
+        c_cont(s.pos, s.n, s.L)
+
+        # guarda los observables cada k pasos
+        if k > 0 and (t + 1) % k == 0:
+            i = (t + 1) // k - 1
+            if v_ecin is not None:
+                v_ecin[i] = cinetica(s.vel, s.n)
+            if v_epot is not None:
+                v_epot[i] = s.epot
+            if v_virial is not None:
+                v_virial[i] = s.p_exceso
+
+    return hasta
+
+
+def evolucionar_lote(p_sis, R, pasos, k, ecin, epot, virial, hilos):
+    # Los sistemas se evolucionan en serie (ver md_backend)
+    return evolucionar_en_serie(evolucionar, p_sis, R, pasos, k, ecin, epot,
+                                virial)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_precision.py
+
+from md_class import md
+import argparse
+import time
+import numpy as np
+
+######################
+# PARÁMETROS EXTERNOS
+######################
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-N', type=int, default=4000)
+parser.add_argument('-rho', type=float, default=0.8442)
+parser.add_argument('-T', type=float, default=0.728)
+parser.add_argument('-paso', type=float, default=0.001)
+parser.add_argument('-pasos', type=int, default=5000)
+parser.add_argument('-term', type=int, default=500)
+parser.add_argument('-k', type=int, default=50)
+parser.add_argument('-precision', type=str, nargs='+',
+                    default=['simple', 'mixta', 'doble'])
+parser.add_argument('-backend', type=str, default=None)
+
+params = parser.parse_args()
+
+N = params.N
+rho = params.rho
+T = params.T
+h = params.paso
+pasos = params.pasos
+k = params.k
+backend = params.backend
+
+
+############
+# FUNCIONES
+############
+
+def medir(pos, vel, precision):
+    '''
+    Evoluciona pasos desde pos, vel con la precisión dada (con celdas).
+    Devuelve la energía total por partícula cada k pasos, la presión de
+    exceso media y el tiempo de cálculo en segundos
+    '''
+    mdsys = md(N=N, rho=rho, T=T, h=h, backend=backend, celdas=True,
+               precision=precision)
+    mdsys._pos[:] = pos
+    mdsys._vel[:] = vel
+    mdsys.calc_fza()
+
+    ecin = np.zeros(pasos // k, dtype=mdsys._acum)
+    epot = np.zeros(pasos // k, dtype=mdsys._acum)
+    virial = np.zeros(pasos // k, dtype=mdsys._acum)
+
+    inicio = time.perf_counter()
+    mdsys.evolucionar(pasos, k, ecin, epot, virial)
+    t = time.perf_counter() - inicio
+
+    energia = (ecin.astype(float) + epot) / N
+    return energia, virial.mean() / 3, t
+
+
+#####################
+# PROGRAMA PRINCIPAL
+#####################
+
+# Configuración termalizada común a todas las precisiones. La corrida
+# en doble sirve de referencia para validar las otras
+np.random.seed(0)
+mdsys = md(N=N, rho=rho, T=T, h=h, backend=backend, celdas=True,
+           precision='doble')
+mdsys.n_pasos(params.term)
+pos, vel = mdsys._pos.astype(float), mdsys._vel.astype(float)
+
+print('N: %d, rho: %6.3f, T: %6.3f, h: %g, pasos: %d\n' %
+      (N, rho, T, h, pasos))
+print('%-9s %10s %10s %10s %10s %10s %8s' %
+      ('Precisión', 'E', 'deriva', 'std E', 'E - Edoble', 'P exc', 's'))
+
+resultados = {p: medir(pos, vel, p) for p in params.precision}
+referencia = resultados.get('doble', resultados[params.precision[-1]])[0]
+
+for precision, (energia, presion, t) in resultados.items():
+    # Deriva: pendiente de la energía por unidad de tiempo
+    tiempo = (np.arange(energia.size) + 1) * k * h
+    deriva = np.polyfit(tiempo, energia, 1)[0]
+    print('%-9s %10.6f %10.2e %10.2e %10.2e %10.4f %8.2f' %
+          (precision, energia.mean(), deriva, energia.std(),
+           np.abs(energia - referencia).max(), presion, t))
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_pt.py
+
+'''
+Replica exchange (parallel tempering): una réplica de md por temperatura,
+repartidas en un pool de procesos. Cada 'cada' pasos se intentan
+intercambios de Metropolis entre temperaturas vecinas, alternando los pares
+pares e impares. Se intercambian las temperaturas y no las coordenadas: la
+réplica que acepta reescala sus velocidades y cambia la temperatura de su
+termostato. Al terminar se mide cada temperatura y se guarda con el mismo
+formato que md_main.py (más las tasas de aceptación).
+'''
+
+from md_class import md
+import argparse
+import multiprocessing as mp
+import numpy as np
+import os
+import time
+
+######################
+# PARÁMETROS EXTERNOS
+######################
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-ruta', type=str, default='../datos/pt/')
+parser.add_argument('-N', type=int, default=512)
+parser.add_argument('-rho', type=float, default=0.8442)
+parser.add_argument('-T', type=float, default=2.0)
+parser.add_argument('-dT', type=float, default=-0.1)
+parser.add_argument('-pasos', type=int, default=16)
+parser.add_argument('-term', type=int, default=2000)
+parser.add_argument('-intercambios', type=int, default=200)
+parser.add_argument('-cada', type=int, default=100)
+parser.add_argument('-m', type=int, default=30)
+parser.add_argument('-subm', type=int, default=30)
+parser.add_argument('-dc', type=int, default=150)
+parser.add_argument('-k', type=int, default=50)
+parser.add_argument('-paso', type=float, default=0.001)
+parser.add_argument('-termostato', type=str, default='csvr')
+parser.add_argument('-tau', type=float, default=0.1)
+parser.add_argument('-procesos', type=int, default=None)
+parser.add_argument('-semilla', type=int, default=0)
+parser.add_argument('-backend', type=str, default=None)
+
+args_params = parser.parse_args()
+
+ruta = args_params.ruta
+N = args_params.N
+rho = args_params.rho
+T = args_params.T
+dT = args_params.dT
+pasos = args_params.pasos
+term = args_params.term
+m = args_params.m
+subm = args_params.subm
+dc = args_params.dc
+k = args_params.k
+
+# Escalera de temperaturas (la misma que md_main.py)
+temp = np.arange(pasos) * dT + T
+
+
+############
+# FUNCIONES
+############
+
+def trabajador(conexion, replicas):
+    '''
+    Proceso del pool: crea las réplicas asignadas (índice -> temperatura
+    inicial) y atiende las órdenes del proceso principal hasta recibir 'fin'
+    '''
+    sistemas = {}
+    for i, T_i in replicas.items():
+        np.random.seed(args_params.semilla + i)
+        sistemas[i] = md(N=N, rho=rho, T=T_i, h=args_params.paso,
+                         termostato=args_params.termostato,
+                         tau=args_params.tau, celdas=True,
+                         backend=args_params.backend)
+
+    while True:
+        orden, args = conexion.recv()
+
+        if orden == 'evolucionar':
+            # Devuelve la energía potencial de cada réplica
+            for mdsys in sistemas.values():
+                mdsys.n_pasos(args)
+            conexion.send({i: mdsys.calc_energia_potencial()
+                           for i, mdsys in sistemas.items()})
+
+        elif orden == 'temperaturas':
+            # Reescala las velocidades a la nueva temperatura
+            for i, T_i in args.items():
+                mdsys = sistemas[i]
+                mdsys.rescaling(T_i, mdsys.T_objetivo)
+                mdsys.T_objetivo = T_i
+            conexion.send(None)
+
+        elif orden == 'muestra':
+            muestras = {}
+            for i, mdsys in sistemas.items():
+                t_m, e_m, p_m = mdsys.tomar_muestra(m=m, subm=subm, dc=dc,
+                                                    k=k)
+                ld_m = mdsys.lindemann(m=10, subm=100, k=50)
+                muestras[i] = (t_m, e_m, p_m, ld_m)
+            conexion.send(muestras)
+
+        elif orden == 'guardar':
+            for i, (nombre, ruta_md) in args.items():
+                sistemas[i].save(nombre=nombre, ruta=ruta_md)
+            conexion.send(None)
+
+        elif orden == 'fin':
+            conexion.send(None)
+            conexion.close()
+            return
+
+
+def ordenar(conexiones, orden, args=None):
+    '''
+    Envía la orden a todos los procesos y junta sus respuestas. args puede
+    ser un diccionario por réplica, que se reparte según asignacion
+    '''
+    for p, conexion in enumerate(conexiones):
+        if isinstance(args, dict):
+            conexion.send((orden, {i: a for i, a in args.items()
+                                   if asignacion[i] == p}))
+        else:
+            conexion.send((orden, args))
+
+    respuestas = {}
+    for conexion in conexiones:
+        respuesta = conexion.recv()
+        if respuesta is not None:
+            respuestas.update(respuesta)
+    return respuestas
+
+
+def intercambiar(epot, replica, ronda):
+    '''
+    Intenta los intercambios de Metropolis entre las temperaturas vecinas
+    (j, j+1), con j par o impar según la ronda. replica[j] es la réplica
+    que está en la temperatura j. Devuelve las nuevas temperaturas de las
+    réplicas que cambiaron
+    '''
+    cambios = {}
+    for j in range(ronda % 2, pasos - 1, 2):
+        a, b = replica[j], replica[j + 1]
+        delta = (1 / temp[j] - 1 / temp[j + 1]) * (epot[a] - epot[b])
+        intentos[j] += 1
+        if delta >= 0 or np.random.random() < np.exp(delta):
+            aceptados[j] += 1
+            replica[j], replica[j + 1] = b, a
+            cambios[a] = temp[j + 1]
+            cambios[b] = temp[j]
+    return cambios
+
+
+#####################
+# PROGRAMA PRINCIPAL
+#####################
+
+if __name__ == '__main__':
+
+    if args_params.termostato == 'nve':
+        raise ValueError('El replica exchange necesita un termostato')
+
+    str_n = '%03d' % N
+    str_rho = '%06.3f' % rho
+    if not ruta[-1] == '/':
+        ruta += '/'
+    ruta += 'n' + str_n + '/'
+
+    nombre_datos = ruta + 'r_' + str_rho + '_data.npy'
+    nombre_cfg = ruta + 'r_' + str_rho + '_config.npy'
+    nombre_lds = ruta + 'r_' + str_rho + '_lds.npy'
+    nombre_mds = ruta + 'r_' + str_rho + '_mds.npy'
+    nombre_intercambios = ruta + 'r_' + str_rho + '_intercambios.npy'
+
+    os.makedirs(ruta + '/mds/', exist_ok=True)
+    os.makedirs(ruta + '/lds/', exist_ok=True)
+
+    # Reparte las réplicas entre los procesos
+    procesos = args_params.procesos or mp.cpu_count()
+    procesos = max(1, min(procesos, pasos))
+    asignacion = np.arange(pasos) % procesos
+
+    conexiones = []
+    pool = []
+    for p in range(procesos):
+        propia, ajena = mp.Pipe()
+        replicas = {i: temp[i] for i in range(pasos) if asignacion[i] == p}
+        proceso = mp.Process(target=trabajador, args=(ajena, replicas))
+        proceso.start()
+        # el extremo del trabajador sólo queda abierto en su proceso
+        ajena.close()
+        conexiones.append(propia)
+        pool.append(proceso)
+
+    np.random.seed(args_params.semilla)
+    replica = np.arange(pasos)
+    intentos = np.zeros(pasos - 1, dtype=int)
+    aceptados = np.zeros(pasos - 1, dtype=int)
+
+    inicio = time.time()
+    print('N: %d, rho: %6.3f, %d réplicas en %d procesos\n' %
+          (N, rho, pasos, procesos))
+
+    print('Termalizando')
+    ordenar(conexiones, 'evolucionar', term)
+
+    for ronda in range(args_params.intercambios):
+        epot = ordenar(conexiones, 'evolucionar', args_params.cada)
+        cambios = intercambiar(epot, replica, ronda)
+        if cambios:
+            ordenar(conexiones, 'temperaturas', cambios)
+
+        if (ronda + 1) % 10 == 0:
+            tasa = aceptados.sum() / max(intentos.sum(), 1)
+            print('\rRonda %d/%d - aceptación: %5.3f' %
+                  (ronda + 1, args_params.intercambios, tasa), end='')
+
+    print('\nTomando muestras')
+    muestras = ordenar(conexiones, 'muestra')
+
+    # Datos por temperatura con el formato de md_main.py
+    array_pasos = np.arange(pasos)
+    datos = np.zeros((10, pasos), dtype=float)
+    datos[0] = array_pasos
+    datos[1] = temp
+    mds = []
+    lds = []
+    guardar = {}
+
+    for j in range(pasos):
+        t_m, e_m, p_m, ld_m = muestras[replica[j]]
+        datos[2:10, j] = (t_m[0], t_m[1], e_m[0], e_m[1], p_m[0], p_m[1],
+                          ld_m[0][-1], ld_m[1][-1])
+
+        str_temp = '%06.3f' % t_m[0]
+        nombre_md = 'n' + str_n + '_r_' + str_rho + '_t_' + str_temp + \
+            '_md.npy'
+        nombre_ld = 'n' + str_n + '_r_' + str_rho + '_t_' + str_temp + \
+            '_ld.npy'
+        mds.append(ruta + 'mds/' + nombre_md)
+        lds.append(ruta + 'lds/' + nombre_ld)
+        guardar[replica[j]] = (nombre_md, ruta + 'mds/')
+        np.save(lds[-1], [ld_m[0], ld_m[1]])
+
+    ordenar(conexiones, 'guardar', guardar)
+    ordenar(conexiones, 'fin')
+    for proceso in pool:
+        proceso.join()
+
+    # La misma configuración que md_main.py, con todos los pasos realizados
+    int_params = [N, pasos, 0, term, m, subm, dc, k, pasos]
+    float_params = [rho, T, dT]
+    np.save(nombre_cfg, np.array([int_params, float_params], dtype=object))
+    np.save(nombre_datos, datos)
+    np.save(nombre_lds, lds)
+    np.save(nombre_mds, mds)
+
+    # Tasa de aceptación de cada par de temperaturas vecinas
+    tasas = aceptados / np.maximum(intentos, 1)
+    np.save(nombre_intercambios, [temp[:-1], temp[1:], tasas])
+
+    print('\n%8s %8s %10s' % ('T', 'T+dT', 'Aceptación'))
+    for j in range(pasos - 1):
+        print('%8.3f %8.3f %10.3f' % (temp[j], temp[j + 1], tasas[j]))
+    transcurrido = time.gmtime(time.time() - inicio)
+    print('\nTiempo: %s' % time.strftime('%X', transcurrido))
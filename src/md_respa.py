@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# file: md_respa.py
+
+from md_class import md
+import argparse
+import time
+import numpy as np
+
+######################
+# PARÁMETROS EXTERNOS
+######################
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-N', type=int, default=2048)
+parser.add_argument('-rho', type=float, nargs='+', default=[0.8442])
+parser.add_argument('-T', type=float, nargs='+', default=[0.728, 1.5])
+parser.add_argument('-paso', type=float, default=0.001)
+parser.add_argument('-respa', type=int, default=4)
+parser.add_argument('-rc_interno', type=float, default=1.6)
+parser.add_argument('-tiempo', type=float, default=2.0)
+parser.add_argument('-term', type=int, default=2000)
+parser.add_argument('-k', type=int, default=20)
+parser.add_argument('-skin', type=float, default=None)
+parser.add_argument('-backend', type=str, default=None)
+
+params = parser.parse_args()
+
+N = params.N
+h = params.paso
+respa = params.respa
+rc_interno = params.rc_interno
+k = params.k
+backend = params.backend
+
+# Con skin se usa la lista de vecinos para la fuerza completa, si no celdas
+config = {'skin': params.skin} if params.skin else {'celdas': True}
+
+
+############
+# FUNCIONES
+############
+
+def medir(rho, T, pos, vel, h, respa):
+    '''
+    Evoluciona params.tiempo unidades de tiempo desde pos, vel con paso h
+    (y respa subpasos para la fuerza rápida). Devuelve energía por
+    partícula, presión de exceso (con sus desviaciones), deriva de la
+    energía y el tiempo de cálculo en segundos. Los observables se toman
+    cada k pasos de h / respa, los mismos instantes en las dos corridas
+    '''
+    mdsys = md(N=N, rho=rho, T=T, h=h, backend=backend, respa=respa,
+               rc_interno=rc_interno, **config)
+    mdsys._pos[:] = pos
+    mdsys._vel[:] = vel
+    mdsys.calc_fza()
+
+    pasos = int(round(params.tiempo / h))
+    cada = max(k // respa, 1)
+    ecin = np.zeros(pasos // cada, dtype=mdsys._acum)
+    epot = np.zeros(pasos // cada, dtype=mdsys._acum)
+    virial = np.zeros(pasos // cada, dtype=mdsys._acum)
+
+    inicio = time.perf_counter()
+    mdsys.evolucionar(pasos, cada, ecin, epot, virial)
+    t = time.perf_counter() - inicio
+
+    energia = (ecin.astype(float) + epot) / N
+    presion = virial.astype(float) / 3
+    return (energia.mean(), energia.std(), presion.mean(), presion.std(),
+            energia[-1] - energia[0], t)
+
+
+#####################
+# PROGRAMA PRINCIPAL
+#####################
+
+print('N: %d, h: %g, r-RESPA: %d subpasos de h (h externo: %g), '
+      'rc_interno: %g\n' % (N, h, respa, respa * h, rc_interno))
+print('%6s %6s %-7s %10s %9s %9s %9s %9s %8s %8s' %
+      ('rho', 'T', 'Modo', 'E', 'std E', 'deriva', 'P exc', 'std P',
+       's', 'Speedup'))
+
+for rho in params.rho:
+    for T in params.T:
+        # Misma configuración termalizada para las dos corridas
+        np.random.seed(0)
+        mdsys = md(N=N, rho=rho, T=T, h=h, backend=backend, **config)
+        mdsys.n_pasos(params.term)
+        pos, vel = np.copy(mdsys._pos), np.copy(mdsys._vel)
+
+        verlet = medir(rho, T, pos, vel, h, 1)
+        multiple = medir(rho, T, pos, vel, respa * h, respa)
+
+        for nombre, r in (('verlet', verlet), ('respa', multiple)):
+            e, std_e, p, std_p, deriva, t = r
+            print('%6.3f %6.3f %-7s %10.5f %9.2e %9.2e %9.4f %9.2e %8.2f '
+                  '%8.2f' % (rho, T, nombre, e, std_e, deriva, p, std_p, t,
+                             verlet[-1] / t))
+        print('')
@@ -0,0 +1,26 @@
+#ifndef PRECISION_H
+#define PRECISION_H
+
+/*
+ * Tipos de punto flotante según la precisión con la que se compila:
+ *
+ *   (por defecto): simple, todo en float
+ *   -DMIXTA: posiciones, velocidades, Lookup-tables y cuentas por par en
+ *            float, y fuerzas, energías y virial acumulados en double
+ *   -DDOBLE: todo en double (para validar las otras dos)
+ *
+ * real: almacenamiento y cuentas por par
+ * acum: acumuladores (fuerza sobre cada partícula, energías y virial)
+ */
+#if defined(DOBLE)
+typedef double real;
+typedef double acum;
+#elif defined(MIXTA)
+typedef float real;
+typedef double acum;
+#else
+typedef float real;
+typedef float acum;
+#endif
+
+#endif
@@ -0,0 +1,123 @@
+/* Función de distribución radial. Los pares se cuentan en un histograma de
+double que se acumula entre llamadas; la normalización (volumen de cada
+cáscara y densidad) se hace al final, una sola vez. */
+
+#include "stdio.h"
+#include "math.h"
+
+#include "radial.h"
+#include "celdas.h"
+
+
+static int sumar_par(double *hist, real *pos, int i, int j, real L,
+    real r_max2, real dR, int bins){
+    // Suma el par i, j al histograma si está a distancia menor a r_max
+    real rij2 = 0;
+    real dr;
+    int bin;
+
+    for(int k=0; k<3; k++){
+        dr = pos[i*3+k] - pos[j*3+k];
+
+        // condiciones de contorno para dk
+        if(dr > L/2){
+            dr -= L;
+        }
+        else if(dr < -L/2){
+            dr += L;
+        }
+
+        rij2 += dr * dr;
+    }
+
+    if(rij2 >= r_max2){
+        return 0;
+    }
+
+    // el redondeo puede dar bins para r apenas menor a r_max
+    bin = sqrt(rij2) / dR;
+    if(bin >= bins){
+        bin = bins - 1;
+    }
+    hist[bin] += 1;
+
+    return 1;
+}
+
+
+int histograma_radial(double *hist, real *pos, int n, real L, real r_max,
+    int bins, int M, int *cabeza, int *lista){
+
+    int c, v, cx, cy, cz;
+    int pares = 0;
+    real r_max2 = r_max * r_max;
+    real dR = r_max / bins;
+
+    // caja chica: recorre todos los pares
+    if(M < 3) {
+        for(int i=0; i<n-1; i++) {
+            for(int j=i+1; j<n; j++) {
+                pares += sumar_par(hist, pos, i, j, L, r_max2, dR, bins);
+            }
+        }
+        return pares;
+    }
+
+    armar_celdas(pos, n, L, M, cabeza, lista);
+
+    for(cz=0; cz<M; cz++) {
+    for(cy=0; cy<M; cy++) {
+    for(cx=0; cx<M; cx++) {
+
+        c = cx + M*cy + M*M*cz;
+
+        // pares dentro de la misma celda
+        for(int i=cabeza[c]; i!=-1; i=lista[i]) {
+            for(int j=lista[i]; j!=-1; j=lista[j]) {
+                pares += sumar_par(hist, pos, i, j, L, r_max2, dR, bins);
+            }
+        }
+
+        // pares con las 13 vecinas "posteriores" a la celda c
+        for(int dz=-1; dz<=1; dz++) {
+        for(int dy=-1; dy<=1; dy++) {
+        for(int dx=-1; dx<=1; dx++) {
+
+            if(dz < 0 || (dz == 0 && dy < 0) ||
+               (dz == 0 && dy == 0 && dx <= 0)) {
+                continue;
+            }
+
+            v = (cx+dx+M)%M + M*((cy+dy+M)%M) + M*M*((cz+dz+M)%M);
+
+            for(int i=cabeza[c]; i!=-1; i=lista[i]) {
+                for(int j=cabeza[v]; j!=-1; j=lista[j]) {
+                    pares += sumar_par(hist, pos, i, j, L, r_max2, dR, bins);
+                }
+            }
+        }
+        }
+        }
+    }
+    }
+    }
+
+    return pares;
+}
+
+
+int histograma_radial_vecinos(double *hist, real *pos, int n, real L,
+    real r_max, int bins, int *inicio, int *vecinos){
+
+    int pares = 0;
+    real r_max2 = r_max * r_max;
+    real dR = r_max / bins;
+
+    for(int i=0; i<n; i++) {
+        for(int a=inicio[i]; a<inicio[i+1]; a++) {
+            pares += sumar_par(hist, pos, i, vecinos[a], L, r_max2, dR, bins);
+        }
+    }
+
+    return pares;
+}
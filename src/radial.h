@@ -0,0 +1,52 @@
+#ifndef RADIAL_H
+#define RADIAL_H
+
+#include "precision.h"
+
+int histograma_radial(double *hist, real *pos, int n, real L, real r_max,
+                      int bins, int M, int *cabeza, int *lista);
+/*
+ * Función: histograma_radial
+ * --------------------------
+ * Suma al histograma los pares de partículas a distancia menor a r_max, en
+ * bins intervalos de ancho r_max/bins. Con M >= 3 (celdas de lado mayor o
+ * igual a r_max) recorre sólo los pares de celdas vecinas, como
+ * nueva_fza_celdas; con menos celdas recorre todos los pares. El histograma
+ * es de double sin importar la precisión, para poder acumular muchas
+ * configuraciones sin perder cuentas.
+ *
+ * hist: (double *) Vector de dimensión bins donde se suman los pares
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * n: (int) Cantidad de particulas
+ * L: (real) Tamano de la caja
+ * r_max: (real) Distancia máxima (a lo sumo L/2)
+ * bins: (int) Cantidad de intervalos
+ * M: (int) Cantidad de celdas por lado (celdas_por_lado(L, r_max))
+ * cabeza: (int *) Vector de dimensión M^3 (memoria de trabajo)
+ * lista: (int *) Vector de dimensión N (memoria de trabajo)
+ *
+ * return: (int) Cantidad de pares sumados
+ */
+
+int histograma_radial_vecinos(double *hist, real *pos, int n, real L,
+                              real r_max, int bins, int *inicio,
+                              int *vecinos);
+/*
+ * Función: histograma_radial_vecinos
+ * ----------------------------------
+ * Igual que histograma_radial pero recorriendo la lista de vecinos, por lo
+ * que sólo vale para r_max <= rc + skin y con la lista vigente.
+ *
+ * hist: (double *) Vector de dimensión bins donde se suman los pares
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * n: (int) Cantidad de particulas
+ * L: (real) Tamano de la caja
+ * r_max: (real) Distancia máxima
+ * bins: (int) Cantidad de intervalos
+ * inicio: (int *) Vector de dimensión N+1 con el comienzo de cada lista
+ * vecinos: (int *) Vector con los vecinos
+ *
+ * return: (int) Cantidad de pares sumados
+ */
+
+#endif
@@ -5,9 +5,9 @@
 
 #include "setup.h"
 
-int llenar (float *pos, float N, float L){
+int llenar (real *pos, real N, real L){
     int n,i,j,k;
-    float p,a;
+    real p,a;
     p = pow(N, (double)1/3); //raiz cubica del numero de particulas
     n = ceil(p);
     printf("%d\n", n);
@@ -33,9 +33,9 @@ int llenar (float *pos, float N, float L){
 }
 
 
-int velocidades(float *vel, int N, float T){
-    float sigma = sqrt(T);
-    float vels;
+int velocidades(real *vel, int N, real T){
+    real sigma = sqrt(T);
+    real vels;
     int k = 20;
     int i,j;
 
@@ -43,7 +43,7 @@ int velocidades(float *vel, int N, float T){
     for(i=0; i<3*N; i++){
         vels = 0;
         for(j=0; j<k; j++){
-            vels += ((float)rand()/RAND_MAX - 0.5)*2*sigma*sqrt(3*k);
+            vels += ((real)rand()/RAND_MAX - 0.5)*2*sigma*sqrt(3*k);
         }
         vels /= k;
         vel[i] = vels;
@@ -51,7 +51,7 @@ int velocidades(float *vel, int N, float T){
 
     //Resto velocidad promedio
     for(i=0; i<3; i++){
-        float promedio = avg_vel(vel, N, i);
+        real promedio = avg_vel(vel, N, i);
         for(j=0; j<3*N; j=j+3){
             vel[j+i] -= promedio;
         }
@@ -60,8 +60,8 @@ int velocidades(float *vel, int N, float T){
     return 0;
 }
 
-float avg_vel(float *vel, int N, int coordenada){
-    float promedio = 0;
+real avg_vel(real *vel, int N, int coordenada){
+    real promedio = 0;
     for(int i=0; i<3*N; i=i+3){
         promedio += vel[i+coordenada];
     }
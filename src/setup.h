@@ -1,18 +1,20 @@
 #ifndef SETUP_H
 #define SETUP_H
 
+#include "precision.h"
+
 
 /*
  * Funcion: llenar
  * ---------------
  * Llena la caja con las N partiuclas en una configuracion de red simple.
  *
- * pos: (float *) Vector de dimension 3N para las posiciones.
+ * pos: (real *) Vector de dimension 3N para las posiciones.
  * N: (int) Cantidad de particulas
- * L: (float) Tamano de la caja
+ * L: (real) Tamano de la caja
  *
  */
-int llenar (float *pos, float N, float L);
+int llenar (real *pos, real N, real L);
 
 /*
  * Funcion: velocidades
@@ -20,12 +22,12 @@ int llenar (float *pos, float N, float L);
  * Asigna velocidades a cada particula siguiendo la distribucion de
  * Maxwell-Boltzman para una dada temperatura.
  *
- * vel: (float *) Vector de dimension 3N para las velocidades.
+ * vel: (real *) Vector de dimension 3N para las velocidades.
  * N: (int) Cantidad de particulas
- * T: (float) Temperatura
+ * T: (real) Temperatura
  *
  */
-int velocidades(float *vel, int N, float T);
+int velocidades(real *vel, int N, real T);
 
 /*
  * Funcion: avg_vel
@@ -33,11 +35,11 @@ int velocidades(float *vel, int N, float T);
  * Calcula la velocidad promedio de todas las particulas para una
  * dada coordenada.
  *
- * vel: (float *) Vector de dimension 3N para las velocidades.
+ * vel: (real *) Vector de dimension 3N para las velocidades.
  * N: (int) Cantidad de particulas
  * coordenada: (int) Coordenada elegida donde x=0, y=1 y z=2.
  *
  */
-float avg_vel(float *vel, int N, int coordenada);
+real avg_vel(real *vel, int N, int coordenada);
 
 #endif
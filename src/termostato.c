@@ -0,0 +1,184 @@
+/* Termostatos para simular a temperatura constante (NVT) dentro del
+integrador, sin tener que medir la temperatura y reescalar desde Python. */
+
+#include "stdio.h"
+#include "math.h"
+
+#include "termostato.h"
+#include "energia.h"
+
+
+double aleatorio_uniforme(unsigned long long *estado){
+    // xorshift64*
+    *estado ^= *estado >> 12;
+    *estado ^= *estado << 25;
+    *estado ^= *estado >> 27;
+    // toma los 53 bits altos y evita el cero
+    return ((*estado * 2685821657736338717ULL >> 11) + 0.5) / 9007199254740992.0;
+}
+
+
+double aleatorio_normal(unsigned long long *estado){
+    double u1 = aleatorio_uniforme(estado);
+    double u2 = aleatorio_uniforme(estado);
+    return sqrt(-2 * log(u1)) * cos(2 * M_PI * u2);
+}
+
+
+static int reescalar(sistema *s, double lambda){
+    // Multiplica todas las velocidades por lambda
+    for(int i=0; i<3*s->n; i++){
+        s->vel[i] *= lambda;
+    }
+    return 0;
+}
+
+
+static double berendsen(sistema *s, double ecin, int nf){
+    // Factor de Berendsen: relaja T hacia T0 con tiempo tau
+    double T = 2 * ecin / nf;
+    if(T <= 0){
+        return 1;
+    }
+    return sqrt(1 + s->h / s->tau * (s->T_objetivo / T - 1));
+}
+
+
+static double csvr(sistema *s, double ecin, int nf){
+    // Reescalado estocástico de Bussi, Donadio y Parrinello (2007)
+    double c = exp(-s->h / s->tau);
+    double e_obj = 0.5 * nf * s->T_objetivo;
+    double r1 = aleatorio_normal(&s->semilla);
+    double r2 = 0;
+    double alfa2;
+    double r;
+
+    if(ecin <= 0){
+        return 1;
+    }
+
+    // suma de nf-1 normales al cuadrado (chi cuadrado con nf-1 grados)
+    for(int i=0; i<nf-1; i++){
+        r = aleatorio_normal(&s->semilla);
+        r2 += r * r;
+    }
+
+    alfa2 = c + (1 - c) * e_obj / (nf * ecin) * (r1 * r1 + r2) +
+            2 * r1 * sqrt(c * (1 - c) * e_obj / (nf * ecin));
+
+    // el signo se elige para que alfa sea continuo con c -> 1
+    if(r1 + sqrt(c * nf * ecin / ((1 - c) * e_obj)) < 0){
+        return -sqrt(alfa2);
+    }
+    return sqrt(alfa2);
+}
+
+
+static int andersen(sistema *s){
+    // Cada partícula choca con el baño con probabilidad h/tau
+    double p = s->h / s->tau;
+    double sigma = sqrt(s->T_objetivo);
+    double vcm[3] = {0, 0, 0};
+    int choques = 0;
+
+    for(int i=0; i<s->n; i++){
+        if(aleatorio_uniforme(&s->semilla) < p){
+            for(int k=0; k<3; k++){
+                s->vel[i*3+k] = sigma * aleatorio_normal(&s->semilla);
+            }
+            choques++;
+        }
+    }
+
+    if(choques == 0){
+        return 0;
+    }
+
+    // los choques no conservan el momento: se quita la velocidad del centro
+    // de masa para que T = 2 Ecin / 3N siga valiendo
+    for(int i=0; i<s->n; i++){
+        for(int k=0; k<3; k++){
+            vcm[k] += s->vel[i*3+k];
+        }
+    }
+    for(int i=0; i<s->n; i++){
+        for(int k=0; k<3; k++){
+            s->vel[i*3+k] -= vcm[k] / s->n;
+        }
+    }
+    return 0;
+}
+
+
+static double fuerza_cadena(sistema *s, int j, double ecin, int nf,
+    double Q0, double Qj){
+    // Fuerza sobre el elemento j de la cadena de Nosé-Hoover
+    if(j == 0){
+        return (2 * ecin - nf * s->T_objetivo) / Q0;
+    }
+    return ((j == 1 ? Q0 : Qj) * s->v_xi[j-1] * s->v_xi[j-1] -
+            s->T_objetivo) / Qj;
+}
+
+
+static int nose_hoover(sistema *s, double ecin, int nf){
+    // Medio paso (h/2) de la cadena de Nosé-Hoover (Martyna, Tuckerman y
+    // Klein), recorriendo la cadena desde el final y luego hacia atrás
+    int M = s->largo_cadena;
+    double Q0 = nf * s->T_objetivo * s->tau * s->tau;
+    double Qj = s->T_objetivo * s->tau * s->tau;
+    double h2 = s->h / 2, h4 = s->h / 4, h8 = s->h / 8;
+    double escala;
+
+    s->v_xi[M-1] += fuerza_cadena(s, M-1, ecin, nf, Q0, Qj) * h4;
+    for(int j=M-2; j>=0; j--){
+        s->v_xi[j] *= exp(-s->v_xi[j+1] * h8);
+        s->v_xi[j] += fuerza_cadena(s, j, ecin, nf, Q0, Qj) * h4;
+        s->v_xi[j] *= exp(-s->v_xi[j+1] * h8);
+    }
+
+    // reescala las velocidades de las partículas
+    escala = exp(-s->v_xi[0] * h2);
+    reescalar(s, escala);
+    ecin *= escala * escala;
+
+    for(int j=0; j<M; j++){
+        s->xi[j] += s->v_xi[j] * h2;
+    }
+
+    for(int j=0; j<M-1; j++){
+        s->v_xi[j] *= exp(-s->v_xi[j+1] * h8);
+        s->v_xi[j] += fuerza_cadena(s, j, ecin, nf, Q0, Qj) * h4;
+        s->v_xi[j] *= exp(-s->v_xi[j+1] * h8);
+    }
+    s->v_xi[M-1] += fuerza_cadena(s, M-1, ecin, nf, Q0, Qj) * h4;
+
+    return 0;
+}
+
+
+int termostato(sistema *s, int etapa){
+    // Grados de libertad con la misma convención que la temperatura medida
+    int nf = 3 * s->n;
+
+    if(s->termostato == TERMOSTATO_NOSE_HOOVER){
+        return nose_hoover(s, cinetica(s->vel, s->n), nf);
+    }
+
+    // el resto actúa una vez por paso, al final
+    if(etapa == 0){
+        return 0;
+    }
+
+    if(s->termostato == TERMOSTATO_BERENDSEN){
+        reescalar(s, berendsen(s, cinetica(s->vel, s->n), nf));
+    }
+    else if(s->termostato == TERMOSTATO_CSVR){
+        reescalar(s, csvr(s, cinetica(s->vel, s->n), nf));
+    }
+    else if(s->termostato == TERMOSTATO_ANDERSEN){
+        andersen(s);
+    }
+
+    return 0;
+}
@@ -0,0 +1,52 @@
+#ifndef TERMOSTATO_H
+#define TERMOSTATO_H
+
+#include "integrador.h"
+
+int termostato(sistema *s, int etapa);
+/*
+ * Función: termostato
+ * -------------------
+ * Aplica el termostato configurado en s->termostato con temperatura objetivo
+ * s->T_objetivo y tiempo de relajación s->tau. Se llama dos veces por paso
+ * de Verlet: con etapa=0 antes de primer_paso y con etapa=1 después de
+ * ultimo_paso. La temperatura es T = <v²> = 2 Ecin / 3N, igual que en
+ * md_class.py.
+ *
+ *   TERMOSTATO_BERENDSEN: reescala v con lambda² = 1 + h/tau (T0/T - 1)
+ *   TERMOSTATO_CSVR: reescalado estocástico de velocidades (Bussi et al.),
+ *     que muestrea el ensamble canónico
+ *   TERMOSTATO_ANDERSEN: cada partícula toma una velocidad de Maxwell con
+ *     probabilidad h/tau en cada paso; luego se quita el momento total que
+ *     dejan los choques
+ *   TERMOSTATO_NOSE_HOOVER: cadena de Nosé-Hoover de largo s->largo_cadena,
+ *     integrada con medio paso antes y medio paso después de Verlet
+ *
+ * Berendsen, CSVR y Andersen actúan sólo en la etapa 1.
+ *
+ * s: (sistema *) Estado de la simulación
+ * etapa: (int) 0 antes del paso de Verlet, 1 después
+ */
+
+double aleatorio_uniforme(unsigned long long *estado);
+/*
+ * Función: aleatorio_uniforme
+ * ---------------------------
+ * Generador xorshift64* con el estado guardado en el sistema, para que la
+ * secuencia sea reproducible a partir de la semilla.
+ *
+ * estado: (unsigned long long *) Estado del generador (distinto de cero)
+ *
+ * return: (double) Número uniforme en (0, 1)
+ */
+
+double aleatorio_normal(unsigned long long *estado);
+/*
+ * Función: aleatorio_normal
+ * -------------------------
+ * Número con distribución normal estándar (Box-Muller).
+ *
+ * estado: (unsigned long long *) Estado del generador
+ */
+
+#endif
@@ -0,0 +1,167 @@
+/* Lista de vecinos de Verlet. Se arma con un radio rv = rc + skin y se reusa
+mientras ninguna particula se haya desplazado mas de skin/2, de forma que la
+busqueda de pares se paga una vez cada varios pasos. */
+
+#include "stdio.h"
+#include "math.h"
+
+#include "vecinos.h"
+#include "celdas.h"
+#include "lennardjones.h"
+
+
+static real distancia2_cc(real *pos, int i, int j, real L, real *dr){
+    // Distancia al cuadrado entre i y j con condiciones de contorno
+    real rij2 = 0;
+
+    for(int k=0; k<3; k++){
+        // calcula los dk con k = (x, y, z)
+        dr[k] = pos[i*3+k] - pos[j*3+k];
+
+        // condiciones de contorno para dk
+        if(dr[k] > L/2){
+            dr[k] -= L;
+        }
+        if(dr[k] < -L/2){
+            dr[k] += L;
+        }
+
+        // suma las diferencias cuadradas
+        rij2 += dr[k] * dr[k];
+    }
+
+    return rij2;
+}
+
+
+int armar_vecinos(real *pos, real *pos_ref, int n, real L, real rv, int M,
+    int *cabeza, int *lista, int *inicio, int *vecinos, int max_vecinos){
+
+    int c, v, cx, cy, cz;
+    int cant = 0;
+    real rv2 = rv * rv;
+    real dr[3];
+
+    if(M >= 3) {
+        armar_celdas(pos, n, L, M, cabeza, lista);
+    }
+
+    for(int i=0; i<n; i++) {
+
+        inicio[i] = cant;
+
+        if(M >= 3) {
+            // recorre las 27 celdas alrededor de la celda de i
+            c = indice_celda(&pos[i*3], L, M);
+            cx = c % M;
+            cy = (c / M) % M;
+            cz = c / (M * M);
+
+            for(int dz=-1; dz<=1; dz++) {
+            for(int dy=-1; dy<=1; dy++) {
+            for(int dx=-1; dx<=1; dx++) {
+
+                v = (cx+dx+M)%M + M*((cy+dy+M)%M) + M*M*((cz+dz+M)%M);
+
+                for(int j=cabeza[v]; j!=-1; j=lista[j]) {
+                    if(j > i && distancia2_cc(pos, i, j, L, dr) < rv2) {
+                        if(cant == max_vecinos) {
+                            return -1;
+                        }
+                        vecinos[cant++] = j;
+                    }
+                }
+            }
+            }
+            }
+        }
+        else {
+            // caja chica: recorre todos los pares
+            for(int j=i+1; j<n; j++) {
+                if(distancia2_cc(pos, i, j, L, dr) < rv2) {
+                    if(cant == max_vecinos) {
+                        return -1;
+                    }
+                    vecinos[cant++] = j;
+                }
+            }
+        }
+    }
+    inicio[n] = cant;
+
+    // guarda las posiciones de referencia
+    for(int i=0; i<3*n; i++) {
+        pos_ref[i] = pos[i];
+    }
+
+    return cant;
+}
+
+
+real desplazamiento_max(real *pos, real *pos_ref, int n, real L){
+    real dr2, dr2_max = 0;
+    real dr[3];
+
+    for(int i=0; i<n; i++) {
+        dr2 = 0;
+        for(int k=0; k<3; k++) {
+            dr[k] = pos[i*3+k] - pos_ref[i*3+k];
+            // descuenta los saltos por condiciones de contorno
+            dr[k] -= L * floor(dr[k] / L + 0.5);
+            dr2 += dr[k] * dr[k];
+        }
+        if(dr2 > dr2_max) {
+            dr2_max = dr2;
+        }
+    }
+
+    return sqrt(dr2_max);
+}
+
+
+acum nueva_fza_vecinos(real *pos, acum *fza, int n, real L, real rc,
+    real *FZA_LUT, real *LJ_LUT, int g, int tabla, int *inicio,
+    int *vecinos, acum *epot){
+
+    int j;
+    real rij2, fuerza, radial_r;
+    real dr[3];
+    acum p_exceso = 0;
+    acum potencial = 0;
+
+    //inicializa las fuerzas a cero
+    for(int i=0; i<3*n; i++) {
+        fza[i] = 0;
+    }
+
+    for(int i=0; i<n; i++) {
+        for(int a=inicio[i]; a<inicio[i+1]; a++) {
+
+            j = vecinos[a];
+
+            // calcula la distancia al cuadrado
+            rij2 = distancia2_cc(pos, i, j, L, dr);
+
+            if(rij2 < rc*rc) {
+
+                // parte radial de la fuerza (dividida por r) y energía de
+                // la interacción mediante la LUT
+                radial_r = interaccion(rij2, FZA_LUT, LJ_LUT, g, tabla,
+                                       &potencial);
+                p_exceso += rij2 * radial_r;
+
+                for(int k=0; k<3; k++) {
+                    // calcula la componente k
+                    fuerza = radial_r * dr[k];
+                    // le suma la fza a la particula i con componente k
+                    fza[i * 3 + k] += fuerza;
+                    // idem por simetria
+                    fza[j * 3 + k] += -fuerza;
+                }
+            }
+        }
+    }
+
+    *epot = potencial;
+    return p_exceso;
+}
@@ -0,0 +1,73 @@
+#ifndef VECINOS_H
+#define VECINOS_H
+
+#include "precision.h"
+
+int armar_vecinos(real *pos, real *pos_ref, int n, real L, real rv, int M,
+                  int *cabeza, int *lista, int *inicio, int *vecinos,
+                  int max_vecinos);
+/*
+ * Función: armar_vecinos
+ * ----------------------
+ * Arma la lista de vecinos de Verlet con los pares (i, j), j > i, a distancia
+ * menor a rv = rc + skin. Los vecinos de la partícula i son
+ * vecinos[inicio[i]] ... vecinos[inicio[i+1] - 1]. Además guarda en pos_ref
+ * las posiciones usadas para poder medir luego el desplazamiento.
+ *
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * pos_ref: (real *) Vector de dimensión 3N donde se copian las posiciones.
+ * n: (int) Cantidad de particulas
+ * L: (real) Tamano de la caja
+ * rv: (real) Radio de la lista (rc + skin)
+ * M: (int) Celdas por lado para la búsqueda. Si es menor a 3 se recorren
+ *    todos los pares.
+ * cabeza: (int *) Vector de dimensión M^3 (memoria de trabajo)
+ * lista: (int *) Vector de dimensión N (memoria de trabajo)
+ * inicio: (int *) Vector de dimensión N+1 con el comienzo de cada lista
+ * vecinos: (int *) Vector de dimensión max_vecinos con los vecinos
+ * max_vecinos: (int) Capacidad del vector vecinos
+ *
+ * return: (int) Cantidad de pares en la lista, o -1 si no alcanzó la memoria
+ */
+
+real desplazamiento_max(real *pos, real *pos_ref, int n, real L);
+/*
+ * Función: desplazamiento_max
+ * ---------------------------
+ * Calcula el máximo desplazamiento de las partículas respecto de las
+ * posiciones con las que se armó la lista (con condiciones de contorno).
+ *
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * pos_ref: (real *) Vector de dimensión 3N con las posiciones de referencia.
+ * n: (int) Cantidad de particulas
+ * L: (real) Tamano de la caja
+ *
+ * return: (real) Desplazamiento máximo
+ */
+
+acum nueva_fza_vecinos(real *pos, acum *fza, int n, real L, real rc,
+                       real *FZA_LUT, real *LJ_LUT, int g, int tabla,
+                       int *inicio, int *vecinos, acum *epot);
+/*
+ * Función: nueva_fza_vecinos
+ * --------------------------
+ * Calcula la nueva fuerza usando la Lookup-table y la lista de vecinos. En
+ * el mismo recorrido acumula la energia potencial y la presion de exceso.
+ *
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * fza: (acum *) Vector de dimensión 3N para las fuerzas.
+ * n: (int) Cantidad de particulas
+ * L: (real) Tamano de la caja
+ * rc: (real) Distancia de corte para el potencial
+ * FZA_LUT: (real *) Lookup-table de la fuerza
+ * LJ_LUT: (real *) Lookup-table del potencial de Lennard-Jones
+ * g: (int) Precision de la Lookup-table
+ * tabla: (int) Tipo de Lookup-table (TABLA_R o TABLA_R2)
+ * inicio: (int *) Vector de dimensión N+1 con el comienzo de cada lista
+ * vecinos: (int *) Vector con los vecinos
+ * epot: (acum *) Donde se guarda la energia potencial
+ *
+ * return: (acum) Presion de exceso
+ */
+
+#endif
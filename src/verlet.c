@@ -5,7 +5,7 @@
 #include "lennardjones.h"
 #include "math.h"
 
-int primer_paso(float *pos, float *vel, float *fza, int N, float h){
+int primer_paso(real *pos, real *vel, acum *fza, int N, real h){
 
     // Actualiza medio paso para las velocidades
     // Actualiza las posiciones
@@ -17,13 +17,14 @@ int primer_paso(float *pos, float *vel, float *fza, int N, float h){
     return 0;
 }
 
-float nueva_fza(float *pos, float *fza, int n, float L,
-    float rc, float *FZA_LUT, int g) {
-    // Calcula la nueva fuerza
+acum nueva_fza(real *pos, acum *fza, int n, real L,
+    real rc, real *FZA_LUT, real *LJ_LUT, int g, int tabla, acum *epot) {
+    // Calcula la nueva fuerza y de paso la energia potencial
 
-    float rij, rij2, fuerza, radial;
-    float dr[3];
-    float p_exceso = 0;
+    real rij2, fuerza, radial_r;
+    real dr[3];
+    acum p_exceso = 0;
+    acum potencial = 0;
 
     //inicializa las fuerzas a cero
     for(int i=0; i<3*n; i++) {
@@ -52,20 +53,18 @@ float nueva_fza(float *pos, float *fza, int n, float L,
                 rij2 += dr[k] * dr[k];
             }
 
-            // calcula el módulo de la distancia
-            rij = sqrt(rij2);
-
-            if(rij < rc) {
+            if(rij2 < rc*rc) {
 
-                // calcula la parte radial de la fuerza mediante la LUT
-                radial = lookup(FZA_LUT, g, rij);
-		p_exceso += rij * radial;
+                // parte radial de la fuerza (dividida por r) y energía de
+                // la interacción mediante la LUT
+                radial_r = interaccion(rij2, FZA_LUT, LJ_LUT, g, tabla,
+                                       &potencial);
+                p_exceso += rij2 * radial_r;
 
                 for(int k=0; k<3; k++) {
 
                     // calcula la componente k
-                    fuerza = radial * dr[k] / rij;
-                    // fuerza = 0; //ignorar
+                    fuerza = radial_r * dr[k];
                     // le suma la fza a la particula i con componente k
                     fza[i * 3 + k] += fuerza;
                     // idem por simetria
@@ -74,14 +73,18 @@ float nueva_fza(float *pos, float *fza, int n, float L,
             }
         }
     }
+    *epot = potencial;
     return p_exceso;
 }
 
-int nueva_fza_exacto(float *pos, float *fza, int n, float L, float rc) {
-    // Calcula la nueva fuerza
+acum nueva_fza_exacto(real *pos, acum *fza, int n, real L, real rc,
+    acum *epot) {
+    // Calcula la nueva fuerza y de paso la energia potencial
 
-    float rij, rij2, fuerza, radial;
-    float dr[3];
+    real rij, rij2, fuerza, radial, exp6;
+    real dr[3];
+    acum p_exceso = 0;
+    acum potencial = 0;
 
     //inicializa las fuerzas a cero
     for(int i=0; i<3*n; i++) {
@@ -117,6 +120,11 @@ int nueva_fza_exacto(float *pos, float *fza, int n, float L, float rc) {
 
                 // calcula la parte radial de la fuerza
                 radial = -24 * (pow(rij, -7) - 2 * pow(rij, -13));
+                p_exceso += rij * radial;
+
+                // suma la energía de la interacción (Lennard-Jones)
+                exp6 = 1 / (rij2 * rij2 * rij2);
+                potencial += 4 * (exp6 * exp6 - exp6);
 
                 for(int k=0; k<3; k++) {
                     // calcula la componente k
@@ -129,10 +137,11 @@ int nueva_fza_exacto(float *pos, float *fza, int n, float L, float rc) {
             }
         }
     }
-    return 0;
+    *epot = potencial;
+    return p_exceso;
 }
 
-int ultimo_paso(float *vel, float *fza, int N, float h){
+int ultimo_paso(real *vel, acum *fza, int N, real h){
     // Hace el medio paso restante para las velocidades
     for(int i=0; i<3*N; i++){
         vel[i] += 0.5 * fza[i] * h;
@@ -141,7 +150,7 @@ int ultimo_paso(float *vel, float *fza, int N, float h){
     return 0;
 }
 
-int c_cont(float *pos, int N, float L){
+int c_cont(real *pos, int N, real L){
     // Aplica condiciones de contorno
     for(int i=0; i<3*N; i++) {
         pos[i] = pos[i] - L*floor(pos[i]/L);
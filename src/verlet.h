@@ -1,11 +1,13 @@
 #ifndef VERLET_H
 #define VERLET_H
 
+#include "precision.h"
+
 #define M      1.0
 #define EPS    1.0
 #define GAMMA  1.0
 
-int primer_paso(float *pos, float *vel, float *fza, int N, float h);
+int primer_paso(real *pos, real *vel, acum *fza, int N, real h);
 /*
  * Función: primer_paso
  * ---------------
@@ -15,67 +17,77 @@ int primer_paso(float *pos, float *vel, float *fza, int N, float h);
  *   evolucionar un paso entero la posición
  *     x(t+h) = x(t) + v(t+h/2) * h
  *
- * pos: (float *) Vector de dimensión 3N para las posiciones.
- * vel: (float *) Vector de dimensión 3N para las velocidades.
- * fza: (float **) Puntero al vector de dimensión 3N para las fuerzas.
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * vel: (real *) Vector de dimensión 3N para las velocidades.
+ * fza: (acum *) Puntero al vector de dimensión 3N para las fuerzas.
  * N: (int) Cantidad de particulas
- * h: (float) Tamaño del paso de Verlet
+ * h: (real) Tamaño del paso de Verlet
  *
  */
 
-float nueva_fza(float *pos, float *fza, int n, float L, float rc, float *FZA_LUT, int g);
+acum nueva_fza(real *pos, acum *fza, int n, real L, real rc, real *FZA_LUT,
+               real *LJ_LUT, int g, int tabla, acum *epot);
 /*
  * Función: nueva_fza
  * ------------------
- * Calcula la nueva fuerza usando la Lookup-table.
+ * Calcula la nueva fuerza usando la Lookup-table. En el mismo recorrido de
+ * pares acumula la energia potencial y la presion de exceso.
  *
- * pos: (float *) Vector de dimensión 3N para las posiciones.
- * fza: (float *) Vector de dimensión 3N para las fuerzas.
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * fza: (acum *) Vector de dimensión 3N para las fuerzas.
  * n: (int) Cantidad de particulas
- * L: (float) Tamano de la caja
- * rc: (float) Distancia de corte para el potencial
- * FZA_LUT: (float *) Lookup-table de la fuerza
+ * L: (real) Tamano de la caja
+ * rc: (real) Distancia de corte para el potencial
+ * FZA_LUT: (real *) Lookup-table de la fuerza
+ * LJ_LUT: (real *) Lookup-table del potencial de Lennard-Jones
  * g: (int) Precision de la Lookup-table
+ * tabla: (int) Tipo de Lookup-table (TABLA_R o TABLA_R2)
+ * epot: (acum *) Donde se guarda la energia potencial
  *
- * return: (float) Presion de exceso
+ * return: (acum) Presion de exceso
  */
 
-int nueva_fza_exacto(float *pos, float *fza, int n, float L, float rc);
+acum nueva_fza_exacto(real *pos, acum *fza, int n, real L, real rc,
+                      acum *epot);
 /*
  * Función: nueva_fza_exacto
  * ------------------
- * Calcula la nueva fuerza de forma exacta.
+ * Calcula la nueva fuerza de forma exacta. En el mismo recorrido de pares
+ * acumula la energia potencial y la presion de exceso.
  *
- * pos: (float *) Vector de dimensión 3N para las posiciones.
- * fza: (float *) Vector de dimensión 3N para las fuerzas.
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
+ * fza: (acum *) Vector de dimensión 3N para las fuerzas.
  * n: (int) Cantidad de particulas
- * L: (float) Tamano de la caja
- * rc: (float) Distancia de corte para el potencial
+ * L: (real) Tamano de la caja
+ * rc: (real) Distancia de corte para el potencial
+ * epot: (acum *) Donde se guarda la energia potencial
+ *
+ * return: (acum) Presion de exceso
  */
 
-int ultimo_paso(float *vel, float *fza, int N, float h);
+int ultimo_paso(real *vel, acum *fza, int N, real h);
 /*
  * Función: ultimo_paso
  * ---------------
  * Realiza medio paso de verlet restante para la velocidad
  *   v(t+h/2) = v(t) + a * h/2
  *
- * vel: (float *) Vector de dimensión 3N para las velocidades.
- * fza: (float **) Puntero al vector de dimensión 3N para las fuerzas.
+ * vel: (real *) Vector de dimensión 3N para las velocidades.
+ * fza: (acum *) Puntero al vector de dimensión 3N para las fuerzas.
  * N: (int) Cantidad de particulas
- * h: (float) Tamaño del paso de Verlet
+ * h: (real) Tamaño del paso de Verlet
  *
  */
 
-int c_cont(float *pos, int N, float L);
+int c_cont(real *pos, int N, real L);
 /*
  * Función: c_cont
  * ----------------
  * Aplica las condiciones de contorno periodicas a todas las partículas.
  *
- * pos: (float *) Vector de dimensión 3N para las posiciones.
+ * pos: (real *) Vector de dimensión 3N para las posiciones.
  * N: (int) Cantidad de particulas
- * L: (float) Tamano de la caja
+ * L: (real) Tamano de la caja
  *
  */
 